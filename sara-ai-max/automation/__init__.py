@@ -12,6 +12,7 @@ from .system import (
     restart,
     lock_screen
 )
+from .metrics import SystemSampler, start_sampler, stop_sampler, get_sampler
 
 __all__ = [
     'open_app',
@@ -32,4 +33,8 @@ __all__ = [
     'shutdown',
     'restart',
     'lock_screen',
+    'SystemSampler',
+    'start_sampler',
+    'stop_sampler',
+    'get_sampler',
 ]
@@ -6,6 +6,8 @@ Using pyautogui for precise, one-by-one control.
 """
 
 import logging
+import shlex
+import subprocess
 import time
 import psutil
 import pyautogui
@@ -18,7 +20,7 @@ pyautogui.FAILSAFE = True  # Move mouse to corner to abort
 pyautogui.PAUSE = 0.5  # Default pause between actions
 
 
-def open_app(app_name: str) -> bool:
+def open_app(app_name: str, command: Optional[str] = None) -> bool:
     """
     Open an application using Windows Search - STEP BY STEP.
     
@@ -29,12 +31,30 @@ def open_app(app_name: str) -> bool:
     4. Waits for search results
     5. Presses Enter to launch
     
+    When the launch command is known (resolved from the app gazetteer), the
+    application is started directly and the search steps are skipped.
+    
     Args:
         app_name: Name of the application to open
+        command: Command line that launches the application, if known
         
     Returns:
         True if successful, False otherwise
     """
+    if command:
+        try:
+            logger.info(f"▶️ Launching {app_name} directly: {command}")
+            subprocess.Popen(
+                shlex.split(command),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True
+            )
+            logger.info(f"✅ Successfully initiated launch of {app_name}")
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning(f"  Direct launch failed ({e}), falling back to Windows Search")
+    
     try:
         logger.info(f"▶️ Opening {app_name} via Windows Search - Step by Step")
         
@@ -61,7 +81,7 @@ def open_app(app_name: str) -> bool:
         return False
 
 
-def close_app(app_name: str) -> bool:
+def close_app(app_name: str, process_name: Optional[str] = None) -> bool:
     """
     Close an application - STEP BY STEP.
     
@@ -72,6 +92,7 @@ def close_app(app_name: str) -> bool:
     
     Args:
         app_name: Name of the application to close
+        process_name: Executable name of the application, if known
         
     Returns:
         True if successful, False otherwise
@@ -86,7 +107,8 @@ def close_app(app_name: str) -> bool:
         
         for proc in psutil.process_iter(['name']):
             try:
-                if app_name.lower() in proc.info['name'].lower():
+                name = proc.info['name'].lower()
+                if app_name.lower() in name or (process_name and process_name.lower() in name):
                     processes_found.append(proc)
             except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
@@ -0,0 +1,287 @@
+"""
+Metrics - Background sampling of system load into a ring buffer.
+
+A sampler thread reads CPU, memory and disk usage, plus Sara's own process,
+at a fixed rate into a fixed-size NumPy ring buffer. Questions about the
+system are then answered from the latest sample instead of measuring on the
+spot, and windowed averages and percentiles come from the recent history.
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available, system sampler disabled. Install with: pip install numpy")
+
+# Columns of the ring buffer
+FIELDS = (
+    'time',            # Monotonic clock at the sample
+    'cpu',             # System CPU usage, percent
+    'memory',          # System memory usage, percent
+    'disk',            # Disk usage of the sampled path, percent
+    'process_cpu',     # Sara's CPU usage, percent of one core
+    'process_memory',  # Sara's resident memory, MB
+    'processes',       # Number of running processes
+)
+_COLUMN = {field: column for column, field in enumerate(FIELDS)}
+
+
+class SystemSampler:
+    """Samples system load in a background thread into a ring buffer."""
+    
+    def __init__(
+        self,
+        interval: float = 1.0,
+        capacity: int = 3600,
+        disk_path: Optional[str] = None,
+        clock=time.monotonic
+    ):
+        """
+        Initialize sampler.
+        
+        Args:
+            interval: Seconds between samples
+            capacity: Samples kept (the default holds an hour at 1 Hz)
+            disk_path: Path whose disk usage is sampled (default: system root)
+            clock: Monotonic time source
+        """
+        self.interval = interval
+        self.capacity = max(1, capacity)
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+        self._clock = clock
+        
+        self._buffer = np.full((self.capacity, len(FIELDS)), np.nan)
+        self._count = 0  # Samples taken; the newest is at (count - 1) % capacity
+        self._lock = threading.Lock()
+        self._process = psutil.Process()
+        
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    @property
+    def running(self) -> bool:
+        """Whether the sampler thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def start(self):
+        """Start sampling in a daemon thread (no-op if already running)."""
+        if self.running:
+            return
+        
+        # CPU percentages are measured since the previous call, so prime them
+        psutil.cpu_percent(interval=None)
+        self._process.cpu_percent(interval=None)
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sara-sampler", daemon=True)
+        self._thread.start()
+        logger.info(f"System sampler started ({self.interval}s interval, {self.capacity} samples)")
+    
+    def stop(self):
+        """Stop sampling, keeping the samples taken so far."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+    
+    def _run(self):
+        """Sampler thread: take a sample every interval until stopped."""
+        # The first sample is taken after one interval, so its CPU figures
+        # cover a full interval rather than the instant since priming
+        while not self._stop.wait(self.interval):
+            try:
+                self.sample()
+            except Exception as e:
+                logger.error(f"Error sampling system metrics: {e}")
+    
+    def sample(self) -> Dict[str, float]:
+        """
+        Take a sample now and store it.
+        
+        Returns:
+            The sample, by field name
+        """
+        with self._process.oneshot():
+            process_cpu = self._process.cpu_percent(interval=None)
+            process_memory = self._process.memory_info().rss / (1024 * 1024)
+        row = (
+            self._clock(),
+            psutil.cpu_percent(interval=None),
+            psutil.virtual_memory().percent,
+            psutil.disk_usage(self.disk_path).percent,
+            process_cpu,
+            process_memory,
+            len(psutil.pids()),
+        )
+        
+        with self._lock:
+            self._buffer[self._count % self.capacity] = row
+            self._count += 1
+        return dict(zip(FIELDS, row))
+    
+    def __len__(self) -> int:
+        """Number of samples held."""
+        return min(self._count, self.capacity)
+    
+    def latest(self) -> Optional[Dict[str, float]]:
+        """
+        Get the newest sample.
+        
+        Returns:
+            Sample by field name, or None before the first sample
+        """
+        with self._lock:
+            if not self._count:
+                return None
+            row = self._buffer[(self._count - 1) % self.capacity].tolist()
+        return dict(zip(FIELDS, row))
+    
+    def window(self, seconds: Optional[float] = None) -> "np.ndarray":
+        """
+        Get the samples taken in the last few seconds, oldest first.
+        
+        Args:
+            seconds: Window length (None for every sample held)
+        
+        Returns:
+            Array of samples x FIELDS (a copy)
+        """
+        with self._lock:
+            if self._count <= self.capacity:
+                rows = self._buffer[:self._count].copy()
+            else:
+                # Unroll the ring so rows run oldest to newest
+                oldest = self._count % self.capacity
+                rows = np.concatenate((self._buffer[oldest:], self._buffer[:oldest]))
+        
+        if seconds is not None and len(rows):
+            rows = rows[rows[:, _COLUMN['time']] >= self._clock() - seconds]
+        return rows
+    
+    def average(self, field: str, seconds: Optional[float] = None) -> Optional[float]:
+        """
+        Average one field over a window.
+        
+        Args:
+            field: Field name (see FIELDS)
+            seconds: Window length (None for every sample held)
+        
+        Returns:
+            Mean value, or None if the window holds no samples
+        """
+        values = self.window(seconds)[:, _COLUMN[field]]
+        return float(values.mean()) if len(values) else None
+    
+    def percentile(self, field: str, q: float, seconds: Optional[float] = None) -> Optional[float]:
+        """
+        Percentile of one field over a window.
+        
+        Args:
+            field: Field name (see FIELDS)
+            q: Percentile, 0-100
+            seconds: Window length (None for every sample held)
+        
+        Returns:
+            Percentile value, or None if the window holds no samples
+        """
+        values = self.window(seconds)[:, _COLUMN[field]]
+        return float(np.percentile(values, q)) if len(values) else None
+    
+    def summary(self, seconds: Optional[float] = None) -> Dict[str, Dict[str, float]]:
+        """
+        Summarize every measured field over a window in one pass.
+        
+        Args:
+            seconds: Window length (None for every sample held)
+        
+        Returns:
+            Field name -> mean, p50, p95 and max (empty if no samples)
+        """
+        rows = self.window(seconds)
+        if not len(rows):
+            return {}
+        
+        values = rows[:, 1:]
+        means = values.mean(axis=0)
+        p50, p95 = np.percentile(values, [50, 95], axis=0)
+        peaks = values.max(axis=0)
+        return {
+            field: {
+                'mean': float(means[i]),
+                'p50': float(p50[i]),
+                'p95': float(p95[i]),
+                'max': float(peaks[i]),
+            }
+            for i, field in enumerate(FIELDS[1:])
+        }
+
+
+_default_sampler: Optional[SystemSampler] = None
+_default_lock = threading.Lock()
+
+
+def start_sampler(interval: float = 1.0, capacity: int = 3600) -> Optional[SystemSampler]:
+    """
+    Start the shared sampler that get_system_info answers from.
+    
+    Args:
+        interval: Seconds between samples
+        capacity: Samples kept
+    
+    Returns:
+        The running sampler, or None if NumPy is not available
+    """
+    global _default_sampler
+    if not NUMPY_AVAILABLE:
+        return None
+    
+    with _default_lock:
+        if _default_sampler is None:
+            _default_sampler = SystemSampler(interval=interval, capacity=capacity)
+        _default_sampler.start()
+        return _default_sampler
+
+
+def start_sampler_from_config(config: Dict[str, Any]) -> Optional[SystemSampler]:
+    """
+    Start the shared sampler with the config's automation section.
+    
+    Args:
+        config: The automation section (see config.example.json); missing
+            keys keep their defaults
+    
+    Returns:
+        The running sampler, or None if NumPy is not available
+    """
+    return start_sampler(
+        interval=config.get('sampler_interval', 1.0),
+        capacity=config.get('sampler_capacity', 3600)
+    )
+
+
+def stop_sampler():
+    """Stop the shared sampler, if it was started."""
+    if _default_sampler is not None:
+        _default_sampler.stop()
+
+
+def get_sampler() -> Optional[SystemSampler]:
+    """
+    Get the shared sampler.
+    
+    Returns:
+        The sampler if it is running, otherwise None
+    """
+    sampler = _default_sampler
+    return sampler if sampler is not None and sampler.running else None
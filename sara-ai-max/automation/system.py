@@ -12,15 +12,26 @@ from datetime import datetime
 from typing import Optional
 import psutil
 
+from .metrics import get_sampler
+
 logger = logging.getLogger(__name__)
 
+# Seconds a helper command may run before it is killed, so a hung tool
+# cannot hold an automation worker forever
+COMMAND_TIMEOUT = 10
+
 
-def get_system_info(info_type: str = 'system') -> str:
+def get_system_info(info_type: str = 'system', window: float = 60) -> str:
     """
     Get system information.
     
+    System load is read from the background sampler when it is running
+    (see metrics.start_sampler), so the answer is instant; otherwise it is
+    measured on the spot, which takes a second.
+    
     Args:
-        info_type: Type of information (time, date, system)
+        info_type: Type of information (time, date, system, cpu, memory, disk)
+        window: Seconds of history summarized for cpu, memory and disk
         
     Returns:
         Information as a string
@@ -35,14 +46,32 @@ def get_system_info(info_type: str = 'system') -> str:
             return f"Today is {now.strftime('%A, %B %d, %Y')}"
         
         elif info_type == 'system':
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            sampler = get_sampler()
+            sample = sampler.latest() if sampler else None
+            if sample:
+                cpu_percent, memory_percent, disk_percent = sample['cpu'], sample['memory'], sample['disk']
+            else:
+                cpu_percent = psutil.cpu_percent(interval=1)
+                memory_percent = psutil.virtual_memory().percent
+                disk_percent = psutil.disk_usage('/').percent
             
             return (
                 f"CPU usage: {cpu_percent}%, "
-                f"Memory usage: {memory.percent}%, "
-                f"Disk usage: {disk.percent}%"
+                f"Memory usage: {memory_percent}%, "
+                f"Disk usage: {disk_percent}%"
+            )
+        
+        elif info_type in ('cpu', 'memory', 'disk'):
+            sampler = get_sampler()
+            name = 'CPU' if info_type == 'cpu' else info_type.capitalize()
+            average = sampler.average(info_type, window) if sampler else None
+            if average is None:
+                return "I don't have enough history yet, ask me again in a moment"
+            
+            return (
+                f"{name} usage is {sampler.latest()[info_type]:.0f}% now, "
+                f"averaging {average:.0f}% over the last {_describe_window(window)} "
+                f"with a 95th percentile of {sampler.percentile(info_type, 95, window):.0f}%"
             )
         
         else:
@@ -53,6 +82,15 @@ def get_system_info(info_type: str = 'system') -> str:
         return "Sorry, I couldn't get that information"
 
 
+def _describe_window(seconds: float) -> str:
+    """Describe a window length the way it would be spoken."""
+    if seconds >= 120:
+        return f"{seconds / 60:.0f} minutes"
+    if seconds >= 60:
+        return "minute"
+    return f"{seconds:.0f} seconds"
+
+
 def control_volume(action: str) -> bool:
     """
     Control system volume.
@@ -69,13 +107,13 @@ def control_volume(action: str) -> bool:
         # Platform-specific volume control
         if platform.system() == 'Windows':
             if action == 'increase':
-                subprocess.run(['nircmd.exe', 'changesysvolume', '2000'], check=False)
+                subprocess.run(['nircmd.exe', 'changesysvolume', '2000'], check=False, timeout=COMMAND_TIMEOUT)
             elif action == 'decrease':
-                subprocess.run(['nircmd.exe', 'changesysvolume', '-2000'], check=False)
+                subprocess.run(['nircmd.exe', 'changesysvolume', '-2000'], check=False, timeout=COMMAND_TIMEOUT)
             elif action == 'mute':
-                subprocess.run(['nircmd.exe', 'mutesysvolume', '1'], check=False)
+                subprocess.run(['nircmd.exe', 'mutesysvolume', '1'], check=False, timeout=COMMAND_TIMEOUT)
             elif action == 'unmute':
-                subprocess.run(['nircmd.exe', 'mutesysvolume', '0'], check=False)
+                subprocess.run(['nircmd.exe', 'mutesysvolume', '0'], check=False, timeout=COMMAND_TIMEOUT)
             return True
         else:
             logger.warning("Volume control not implemented for this platform")
@@ -138,9 +176,9 @@ def shutdown():
         logger.info("Shutting down system")
         
         if platform.system() == 'Windows':
-            subprocess.run(['shutdown', '/s', '/t', '5'], check=False)
+            subprocess.run(['shutdown', '/s', '/t', '5'], check=False, timeout=COMMAND_TIMEOUT)
         else:
-            subprocess.run(['shutdown', '-h', 'now'], check=False)
+            subprocess.run(['shutdown', '-h', 'now'], check=False, timeout=COMMAND_TIMEOUT)
             
     except Exception as e:
         logger.error(f"Error shutting down: {e}")
@@ -152,9 +190,9 @@ def restart():
         logger.info("Restarting system")
         
         if platform.system() == 'Windows':
-            subprocess.run(['shutdown', '/r', '/t', '5'], check=False)
+            subprocess.run(['shutdown', '/r', '/t', '5'], check=False, timeout=COMMAND_TIMEOUT)
         else:
-            subprocess.run(['shutdown', '-r', 'now'], check=False)
+            subprocess.run(['shutdown', '-r', 'now'], check=False, timeout=COMMAND_TIMEOUT)
             
     except Exception as e:
         logger.error(f"Error restarting: {e}")
@@ -166,11 +204,11 @@ def lock_screen():
         logger.info("Locking screen")
         
         if platform.system() == 'Windows':
-            subprocess.run(['rundll32.exe', 'user32.dll,LockWorkStation'], check=False)
+            subprocess.run(['rundll32.exe', 'user32.dll,LockWorkStation'], check=False, timeout=COMMAND_TIMEOUT)
         elif platform.system() == 'Darwin':  # macOS
-            subprocess.run(['/System/Library/CoreServices/Menu Extras/User.menu/Contents/Resources/CGSession', '-suspend'], check=False)
+            subprocess.run(['/System/Library/CoreServices/Menu Extras/User.menu/Contents/Resources/CGSession', '-suspend'], check=False, timeout=COMMAND_TIMEOUT)
         else:  # Linux
-            subprocess.run(['xdg-screensaver', 'lock'], check=False)
+            subprocess.run(['xdg-screensaver', 'lock'], check=False, timeout=COMMAND_TIMEOUT)
             
     except Exception as e:
         logger.error(f"Error locking screen: {e}")
@@ -0,0 +1 @@
+"""Benchmarks for Sara AI Max components."""
@@ -0,0 +1,8 @@
+"""
+NLU Benchmark - Accuracy and throughput of the intent parser.
+
+Usage:
+    python -m benchmarks.nlu                        # Print a JSON report
+    python -m benchmarks.nlu --output report.json   # Also write it to a file
+    python -m benchmarks.nlu --baseline base.json   # Fail on regressions
+"""
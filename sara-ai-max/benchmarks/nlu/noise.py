@@ -0,0 +1,100 @@
+"""
+Noise - Speech-to-text style corruption of clean utterances.
+
+Recognizers rarely hand back the text a pattern was written for. These
+transforms approximate what they do instead: misheard words, dropped or
+doubled letters, filler words and arbitrary casing.
+"""
+
+import random
+from typing import Callable, List
+
+# Words recognizers commonly confuse
+HOMOPHONES = {
+    "for": "four",
+    "to": "two",
+    "too": "to",
+    "the": "a",
+    "a": "the",
+    "weather": "whether",
+    "time": "thyme",
+    "find": "fine",
+    "right": "write",
+    "new": "knew",
+    "close": "clothes",
+    "lock": "log",
+    "up": "op",
+}
+
+# Words people add around commands
+FILLERS_BEFORE = ["um", "uh", "hey sara", "sara", "okay", "so", "can you", "please"]
+FILLERS_AFTER = ["please", "now", "thanks", "for me", "right now"]
+
+# Neighbouring keys, standing in for acoustically similar letters
+NEIGHBOURS = {
+    'a': "sq", 'b': "vn", 'c': "xv", 'd': "sf", 'e': "wr", 'f': "dg", 'g': "fh",
+    'h': "gj", 'i': "uo", 'j': "hk", 'k': "jl", 'l': "k", 'm': "n", 'n': "bm",
+    'o': "ip", 'p': "o", 'q': "w", 'r': "et", 's': "ad", 't': "ry", 'u': "yi",
+    'v': "cb", 'w': "qe", 'x': "zc", 'y': "tu", 'z': "x",
+}
+
+
+def swap_homophone(text: str, rng: random.Random) -> str:
+    """Replace one word with a word that sounds like it."""
+    words = text.split()
+    positions = [i for i, word in enumerate(words) if word.lower() in HOMOPHONES]
+    if not positions:
+        return text
+    position = rng.choice(positions)
+    words[position] = HOMOPHONES[words[position].lower()]
+    return ' '.join(words)
+
+
+def typo(text: str, rng: random.Random) -> str:
+    """Substitute, drop or double one letter."""
+    positions = [i for i, char in enumerate(text) if char.isalpha()]
+    if not positions:
+        return text
+    position = rng.choice(positions)
+    char = text[position].lower()
+    kind = rng.random()
+    if kind < 0.4 and char in NEIGHBOURS:
+        return text[:position] + rng.choice(NEIGHBOURS[char]) + text[position + 1:]
+    if kind < 0.7:
+        return text[:position] + text[position + 1:]
+    return text[:position] + text[position] + text[position:]
+
+
+def add_filler(text: str, rng: random.Random) -> str:
+    """Wrap the command in filler words."""
+    if rng.random() < 0.6:
+        text = f"{rng.choice(FILLERS_BEFORE)} {text}"
+    if rng.random() < 0.5:
+        text = f"{text} {rng.choice(FILLERS_AFTER)}"
+    return text
+
+
+def recase(text: str, rng: random.Random) -> str:
+    """Change the casing the way different recognizers report it."""
+    return rng.choice([str.upper, str.capitalize, str.title, str.lower])(text)
+
+
+TRANSFORMS: List[Callable[[str, random.Random], str]] = [swap_homophone, typo, add_filler, recase]
+
+
+def add_noise(text: str, rng: random.Random, max_transforms: int = 2) -> str:
+    """
+    Apply a random selection of noise transforms to an utterance.
+    
+    Args:
+        text: Clean utterance
+        rng: Random source
+        max_transforms: Maximum number of transforms to apply
+    
+    Returns:
+        Noisy utterance
+    """
+    count = rng.randint(1, max_transforms)
+    for transform in rng.sample(TRANSFORMS, count):
+        text = transform(text, rng)
+    return text
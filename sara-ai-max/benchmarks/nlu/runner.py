@@ -0,0 +1,320 @@
+"""
+Runner - Builds the labelled corpus, measures the NLU and reports JSON.
+
+The corpus is generated from the live intent pattern table, so it grows with
+the table, and each clean utterance also gets noisy variants. The report has
+accuracy (overall and per intent) for the clean and the noisy set, throughput
+and latency with the intent cache off and on, and memory allocated per parse.
+"""
+
+import argparse
+import gc
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sara_core.corpus import generate_corpus
+from sara_core.gazetteer import AppGazetteer, DEFAULT_APP_ALIASES
+from sara_core.nlu import NLUEngine, IntentType
+
+from .noise import add_noise
+
+# Seed differs from the classifier's training corpus (seed 0)
+DEFAULT_SEED = 1234
+
+Sample = Tuple[str, IntentType]
+
+
+def make_engine(cache_size: int = 0) -> NLUEngine:
+    """
+    Build an engine that behaves the same on every machine.
+    
+    The builtin gazetteer is used instead of the installed applications.
+    
+    Args:
+        cache_size: Intent cache size (0 measures the matcher itself)
+    
+    Returns:
+        NLU engine
+    """
+    return NLUEngine(cache_size=cache_size, gazetteer=AppGazetteer.from_aliases(DEFAULT_APP_ALIASES))
+
+
+def build_corpus(
+    nlu: NLUEngine,
+    per_pattern: int = 30,
+    noisy_variants: int = 3,
+    seed: int = DEFAULT_SEED
+) -> Dict[str, List[Sample]]:
+    """
+    Build the labelled benchmark corpus.
+    
+    Args:
+        nlu: Engine whose pattern table the corpus is generated from
+        per_pattern: Samples drawn per regex pattern
+        noisy_variants: Noisy copies of each clean utterance
+        seed: Random seed
+    
+    Returns:
+        Dictionary with "clean" and "noisy" lists of (utterance, intent) pairs
+    """
+    clean = generate_corpus(nlu.patterns, per_pattern, seed)
+    rng = random.Random(seed)
+    noisy = [
+        (add_noise(text, rng), intent_type)
+        for text, intent_type in clean
+        for _ in range(noisy_variants)
+    ]
+    return {'clean': clean, 'noisy': noisy}
+
+
+def measure_accuracy(nlu: NLUEngine, samples: Sequence[Sample]) -> Dict[str, Any]:
+    """
+    Measure overall accuracy and per-intent precision and recall.
+    
+    Args:
+        nlu: Engine under test
+        samples: (utterance, expected intent) pairs
+    
+    Returns:
+        Accuracy report
+    """
+    predicted = [intent.intent_type for intent in nlu.parse_many(text for text, _ in samples)]
+    expected = [intent_type for _, intent_type in samples]
+    
+    true_positives: Counter = Counter()
+    predicted_counts: Counter = Counter(predicted)
+    expected_counts: Counter = Counter(expected)
+    for guess, truth in zip(predicted, expected):
+        if guess == truth:
+            true_positives[truth] += 1
+    
+    per_intent = {}
+    for intent_type in sorted(expected_counts, key=lambda i: i.value):
+        hits = true_positives[intent_type]
+        precision = hits / predicted_counts[intent_type] if predicted_counts[intent_type] else 0.0
+        recall = hits / expected_counts[intent_type]
+        per_intent[intent_type.value] = {
+            'support': expected_counts[intent_type],
+            'precision': round(precision, 4),
+            'recall': round(recall, 4),
+            'f1': round(2 * precision * recall / (precision + recall), 4) if hits else 0.0,
+        }
+    
+    return {
+        'samples': len(samples),
+        'accuracy': round(sum(true_positives.values()) / len(samples), 4) if samples else 0.0,
+        'unknown_rate': round(predicted_counts[IntentType.UNKNOWN] / len(samples), 4) if samples else 0.0,
+        'per_intent': per_intent,
+    }
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def measure_speed(nlu: NLUEngine, texts: Sequence[str], rounds: int = 3) -> Dict[str, float]:
+    """
+    Measure throughput and per-parse latency.
+    
+    The garbage collector is paused while timing, as timeit does, and the
+    throughput of the median round is reported, which keeps run-to-run
+    noise well inside the regression tolerance.
+    
+    Args:
+        nlu: Engine under test
+        texts: Utterances, parsed in order once per round
+        rounds: Passes over the utterances
+    
+    Returns:
+        Parses per second and latency percentiles in microseconds
+    """
+    # Warm up caches outside the matcher (gazetteer, classifier)
+    nlu.parse_many(texts[:50])
+    
+    latencies = []
+    round_rates = []
+    clock = time.perf_counter_ns
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            round_start = clock()
+            for text in texts:
+                start = clock()
+                nlu.parse(text)
+                latencies.append(clock() - start)
+            round_rates.append(len(texts) / ((clock() - round_start) / 1e9))
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    
+    latencies.sort()
+    round_rates.sort()
+    return {
+        'parses': len(latencies),
+        'parses_per_sec': round(round_rates[len(round_rates) // 2], 1),
+        'p50_us': round(_percentile(latencies, 0.50) / 1e3, 2),
+        'p99_us': round(_percentile(latencies, 0.99) / 1e3, 2),
+        'max_us': round(latencies[-1] / 1e3, 2),
+    }
+
+
+def measure_memory(nlu: NLUEngine, texts: Sequence[str], limit: int = 500) -> Dict[str, float]:
+    """
+    Measure memory allocated while parsing one utterance.
+    
+    Args:
+        nlu: Engine under test (with its cache off, so every parse allocates)
+        texts: Utterances
+        limit: Maximum number of utterances to trace
+    
+    Returns:
+        Mean and maximum peak bytes allocated per parse
+    """
+    texts = list(texts[:limit])
+    nlu.parse_many(texts[:10])
+    
+    peaks = []
+    tracemalloc.start()
+    try:
+        for text in texts:
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            nlu.parse(text)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        'parses': len(peaks),
+        'mean_peak_bytes': round(sum(peaks) / len(peaks), 1) if peaks else 0.0,
+        'max_peak_bytes': max(peaks, default=0),
+    }
+
+
+def run(per_pattern: int = 30, noisy_variants: int = 3, rounds: int = 3, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """
+    Run the whole benchmark.
+    
+    Args:
+        per_pattern: Samples drawn per regex pattern
+        noisy_variants: Noisy copies of each clean utterance
+        rounds: Timing passes over the corpus
+        seed: Random seed
+    
+    Returns:
+        JSON-serializable report
+    """
+    nlu = make_engine(cache_size=0)
+    corpus = build_corpus(nlu, per_pattern, noisy_variants, seed)
+    texts = [text for split in corpus.values() for text, _ in split]
+    
+    # Shuffled so the cached run sees repeats the way live traffic does
+    replay = texts * 2
+    random.Random(seed).shuffle(replay)
+    cached = make_engine(cache_size=256)
+    
+    return {
+        'benchmark': 'nlu',
+        'version': 1,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'config': {
+            'per_pattern': per_pattern,
+            'noisy_variants': noisy_variants,
+            'rounds': rounds,
+            'seed': seed,
+            'patterns': sum(len(p) for p in nlu.patterns.values()),
+        },
+        'accuracy': {
+            name: measure_accuracy(nlu, samples) for name, samples in corpus.items()
+        },
+        'speed': {
+            'uncached': measure_speed(nlu, texts, rounds),
+            'cached': dict(measure_speed(cached, replay, rounds), hit_rate=round(cached.cache_stats()['hit_rate'], 4)),
+        },
+        'memory': measure_memory(nlu, texts),
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.2) -> List[str]:
+    """
+    Compare a report against a baseline report.
+    
+    Speed may vary by ``tolerance`` (relative) to absorb machine noise;
+    accuracy may not drop by more than one percentage point.
+    
+    Args:
+        report: Current report
+        baseline: Report to compare with
+        tolerance: Allowed relative slowdown
+    
+    Returns:
+        Descriptions of the regressions found (empty if none)
+    """
+    regressions = []
+    
+    for split, current in report['accuracy'].items():
+        previous = baseline.get('accuracy', {}).get(split)
+        if previous and current['accuracy'] < previous['accuracy'] - 0.01:
+            regressions.append(
+                f"{split} accuracy dropped from {previous['accuracy']:.4f} to {current['accuracy']:.4f}"
+            )
+    
+    for mode, current in report['speed'].items():
+        previous = baseline.get('speed', {}).get(mode)
+        if not previous:
+            continue
+        if current['parses_per_sec'] < previous['parses_per_sec'] * (1 - tolerance):
+            regressions.append(
+                f"{mode} throughput dropped from {previous['parses_per_sec']} to {current['parses_per_sec']} parses/s"
+            )
+        if current['p99_us'] > previous['p99_us'] * (1 + tolerance):
+            regressions.append(f"{mode} p99 latency rose from {previous['p99_us']} to {current['p99_us']} us")
+    
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Command-line entry point.
+    
+    Returns:
+        Exit code: 0 on success, 1 if regressions were found
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.nlu", description="Benchmark the NLU engine")
+    parser.add_argument('--per-pattern', type=int, default=30, help='Samples drawn per regex pattern')
+    parser.add_argument('--noisy-variants', type=int, default=3, help='Noisy copies of each clean utterance')
+    parser.add_argument('--rounds', type=int, default=3, help='Timing passes over the corpus')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed')
+    parser.add_argument('--output', type=Path, help='Also write the report to this file')
+    parser.add_argument('--baseline', type=Path, help='Fail if the report regresses against this one')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative slowdown')
+    args = parser.parse_args(argv)
+    
+    # Per-parse log lines would dominate the timings
+    logging.basicConfig(level=logging.ERROR)
+    
+    report = run(args.per_pattern, args.noisy_variants, args.rounds, args.seed)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
@@ -0,0 +1,9 @@
+"""
+Wake-Word Benchmark - Detection rate, false alarms and cost of the detector.
+
+Usage:
+    python -m benchmarks.wakeword                          # Synthesized fixtures
+    python -m benchmarks.wakeword --write-fixtures DIR     # Save them as WAV files
+    python -m benchmarks.wakeword --fixtures DIR           # Run on recorded fixtures
+    python -m benchmarks.wakeword --baseline base.json     # Fail on regressions
+"""
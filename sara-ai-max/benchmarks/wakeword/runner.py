@@ -0,0 +1,392 @@
+"""
+Runner - Builds wake-word fixtures, runs the detector over them, reports JSON.
+
+A fixture set is a directory of 16 kHz WAV files plus ``labels.json``:
+``enroll`` lists the recordings templates are enrolled from, and ``scenes``
+maps every other file to the (start, end) seconds where the wake word is
+spoken in it (an empty list for scenes that must not wake Sara). The set is
+synthesized by default, or read from a directory of real recordings.
+
+The report has the detection rate, false alarms per hour of audio, how long
+after the end of the wake word it is reported, and the processing cost. With
+``--gated`` the scenes go through the audio capture and wait_for_wake_word,
+as in the voice engine, so only frames the voice-activity detector passes
+are fed to the detector; the report counts the frames fed either way.
+"""
+
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sara_core.audio import AudioCapture, AudioSource
+from sara_core.wakeword import WakeWordDetector, wait_for_wake_word
+
+from . import synth
+
+DEFAULT_SEED = 7
+
+# Scene name -> (audio, wake-word spans)
+Scenes = Dict[str, Tuple[np.ndarray, List[Tuple[float, float]]]]
+
+
+def build_fixtures(
+    positives: int = 30,
+    negatives: int = 3,
+    babble_minutes: float = 3.0,
+    seed: int = DEFAULT_SEED
+) -> Tuple[List[np.ndarray], Scenes]:
+    """
+    Synthesize a fixture set for one enrolled user.
+    
+    Args:
+        positives: Takes of the wake word by the user
+        negatives: Takes of each distractor phrase
+        babble_minutes: Minutes of continuous non-wake speech
+        seed: Random seed
+    
+    Returns:
+        Enrollment recordings and the scenes
+    """
+    rng = random.Random(seed)
+    user = synth.Speaker.random(rng)
+    
+    def take(phonemes, index, noise_level=60.0):
+        speaker = synth.Speaker(
+            pitch=user.pitch * rng.uniform(0.9, 1.1),
+            rate=user.rate * rng.uniform(0.85, 1.15),
+            tract=user.tract * rng.uniform(0.98, 1.02),
+            loudness=rng.uniform(2500, 9000),
+        )
+        return synth.synthesize(phonemes, speaker, seed=seed * 1000 + index)
+    
+    enroll = [
+        synth.scene([take(synth.WAKE_WORD, i)], gap_seconds=(0.3, 0.5), seed=seed + i)[0]
+        for i in range(3)
+    ]
+    
+    scenes: Scenes = {}
+    for index, noise_level in enumerate((30.0, 90.0, 250.0)):
+        utterances = [take(synth.WAKE_WORD, 100 + index * positives + i) for i in range(positives // 3)]
+        scenes[f'wake_noise{int(noise_level)}'] = synth.scene(utterances, noise_level=noise_level, seed=seed + 10 + index)
+    
+    others = [synth.synthesize(synth.WAKE_WORD, synth.Speaker.random(rng), seed=seed * 1000 + 500 + i) for i in range(10)]
+    scenes['wake_other_speakers'] = synth.scene(others, seed=seed + 20)
+    
+    distractors = [
+        take(phonemes, 600 + i)
+        for i, phonemes in enumerate(list(synth.DISTRACTORS.values()) * negatives)
+    ]
+    audio, _ = synth.scene(distractors, seed=seed + 30)
+    scenes['distractors'] = (audio, [])
+    
+    # Continuous speech made of random words
+    inventory = [name for name in synth.PHONEMES]
+    words, seconds, index = [], 0.0, 0
+    while seconds < babble_minutes * 60:
+        phonemes = [rng.choice(inventory) for _ in range(rng.randint(2, 7))]
+        words.append(take(phonemes, 900 + index))
+        seconds += len(words[-1]) / synth.SAMPLE_RATE + 0.45
+        index += 1
+    audio, _ = synth.scene(words, gap_seconds=(0.1, 0.8), seed=seed + 40)
+    scenes['babble'] = (audio, [])
+    return enroll, scenes
+
+
+def write_fixtures(directory: Path, enroll: Sequence[np.ndarray], scenes: Scenes):
+    """Save a fixture set as WAV files and labels.json."""
+    directory.mkdir(parents=True, exist_ok=True)
+    labels: Dict[str, Any] = {'enroll': [], 'scenes': {}}
+    for i, recording in enumerate(enroll):
+        name = f'enroll_{i}.wav'
+        _write_wav(directory / name, recording)
+        labels['enroll'].append(name)
+    for name, (audio, spans) in scenes.items():
+        _write_wav(directory / f'{name}.wav', audio)
+        labels['scenes'][f'{name}.wav'] = [list(span) for span in spans]
+    (directory / 'labels.json').write_text(json.dumps(labels, indent=2) + "\n")
+
+
+def read_fixtures(directory: Path) -> Tuple[List[np.ndarray], Scenes]:
+    """Load a fixture set written by write_fixtures (or recorded by hand)."""
+    labels = json.loads((directory / 'labels.json').read_text())
+    enroll = [_read_wav(directory / name) for name in labels['enroll']]
+    scenes = {
+        Path(name).stem: (_read_wav(directory / name), [tuple(span) for span in spans])
+        for name, spans in labels['scenes'].items()
+    }
+    return enroll, scenes
+
+
+def _write_wav(path: Path, samples: np.ndarray):
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(synth.SAMPLE_RATE)
+        wav.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+def _read_wav(path: Path) -> np.ndarray:
+    with wave.open(str(path), 'rb') as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1 or wav.getframerate() != synth.SAMPLE_RATE:
+            raise ValueError(f"{path} must be 16 kHz 16-bit mono")
+        return np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+
+
+class _ArraySource(AudioSource):
+    """Samples already in memory, read as if from a microphone."""
+    
+    def __init__(self, samples: np.ndarray):
+        self._samples = samples
+        self._position = 0
+    
+    def read(self, samples: int) -> Optional[np.ndarray]:
+        frame = self._samples[self._position:self._position + samples]
+        self._position += samples
+        if not len(frame):
+            return None
+        if len(frame) < samples:
+            frame = np.concatenate((frame, np.zeros(samples - len(frame), dtype=np.int16)))
+        return frame
+
+
+def _detect_gated(detector: WakeWordDetector, audio: np.ndarray, frame_ms: int) -> List[float]:
+    """
+    Listen to a scene the way the voice engine does: captured, classified by
+    the voice-activity detector, and fed through wait_for_wake_word.
+    
+    Returns:
+        Seconds into the scene at which each detection was returned
+    """
+    capture = AudioCapture(_ArraySource(audio), frame_ms=frame_ms, buffer_seconds=len(audio) / synth.SAMPLE_RATE + 1)
+    reader = capture.reader(from_start=True)
+    capture.start()
+    times = []
+    try:
+        while wait_for_wake_word(detector, reader) is not None:
+            times.append(reader.position * frame_ms / 1000)
+    finally:
+        capture.stop()
+    return times
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    return float(np.percentile(values, q)) if len(values) else 0.0
+
+
+def evaluate(detector: WakeWordDetector, scenes: Scenes, frame_ms: int = 20, gated: bool = False) -> Dict[str, Any]:
+    """
+    Run the detector over every scene.
+    
+    A detection counts as a hit if it ends within a second of a labelled
+    span; any other detection is a false alarm. Latency runs from the end of
+    the span to the end of the frame the detection was returned for.
+    
+    Args:
+        detector: Enrolled detector
+        scenes: Scenes to run
+        frame_ms: Frame size fed per step, as the capture thread would
+        gated: Feed only the frames voice-activity detection passes; the
+            cost per frame is then a mean, without a p99
+    
+    Returns:
+        Per-scene and overall results
+    """
+    frame = synth.SAMPLE_RATE * frame_ms // 1000
+    per_scene = {}
+    hits = expected = false_alarms = 0
+    delays: List[float] = []
+    frame_times: List[float] = []
+    audio_seconds = 0.0
+    processing = 0.0
+    frames_total = 0
+    frames_before = detector.frames
+    
+    for name, (audio, spans) in scenes.items():
+        detector.reset()
+        found = [False] * len(spans)
+        scene_alarms = 0
+        scene_frames = detector.frames
+        frames_total += -(-len(audio) // frame)
+        if gated:
+            began = detector.processing_seconds
+            times = _detect_gated(detector, audio, frame_ms)
+            processing += detector.processing_seconds - began
+        else:
+            times = []
+            clock = time.perf_counter
+            for start in range(0, len(audio), frame):
+                began = clock()
+                detection = detector.process(audio[start:start + frame])
+                elapsed = clock() - began
+                frame_times.append(elapsed * 1000)
+                processing += elapsed
+                if detection is not None:
+                    times.append((start + frame) / synth.SAMPLE_RATE)
+        
+        for at in times:
+            for i, (begin, end) in enumerate(spans):
+                if begin <= at <= end + 1.0 and not found[i]:
+                    found[i] = True
+                    delays.append((at - end) * 1000)
+                    break
+            else:
+                scene_alarms += 1
+        
+        seconds = len(audio) / synth.SAMPLE_RATE
+        audio_seconds += seconds
+        hits += sum(found)
+        expected += len(spans)
+        false_alarms += scene_alarms
+        per_scene[name] = {
+            'seconds': round(seconds, 1),
+            'wake_words': len(spans),
+            'detected': sum(found),
+            'false_alarms': scene_alarms,
+            'frames_fed': detector.frames - scene_frames,
+        }
+    
+    frames_fed = detector.frames - frames_before
+    return {
+        'scenes': per_scene,
+        'detection_rate': round(hits / expected, 4) if expected else 0.0,
+        'false_alarms_per_hour': round(false_alarms / audio_seconds * 3600, 2) if audio_seconds else 0.0,
+        'latency_after_word_ms': {
+            'p50': round(_percentile(delays, 50), 1),
+            'p95': round(_percentile(delays, 95), 1),
+        },
+        'processing': {
+            'frame_ms': frame_ms,
+            'frames_in_audio': frames_total,
+            'frames_fed': frames_fed,
+            'mean_ms_per_frame': round(processing / frames_fed * 1000, 4) if frames_fed else 0.0,
+            'p99_ms_per_frame': None if gated else round(_percentile(frame_times, 99), 4),
+            'cpu_percent_of_one_core': round(processing / audio_seconds * 100, 2) if audio_seconds else 0.0,
+        },
+    }
+
+
+def run(
+    fixtures: Optional[Path] = None,
+    seed: int = DEFAULT_SEED,
+    babble_minutes: float = 3.0,
+    gated: bool = False
+) -> Dict[str, Any]:
+    """
+    Run the whole benchmark.
+    
+    Args:
+        fixtures: Directory of recorded fixtures (None to synthesize them)
+        seed: Random seed for synthesized fixtures
+        babble_minutes: Minutes of non-wake speech synthesized
+        gated: Feed the detector through voice-activity detection
+    
+    Returns:
+        JSON-serializable report
+    """
+    if fixtures is not None:
+        enroll, scenes = read_fixtures(fixtures)
+    else:
+        enroll, scenes = build_fixtures(seed=seed, babble_minutes=babble_minutes)
+    
+    detector = WakeWordDetector.enroll(enroll)
+    # Speakers other than the enrolled user are reported, not scored
+    own = {name: scene for name, scene in scenes.items() if name != 'wake_other_speakers'}
+    report = {
+        'benchmark': 'wakeword',
+        'version': 1,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'config': {
+            'fixtures': str(fixtures) if fixtures else 'synthesized',
+            'seed': seed,
+            'templates': len(detector.templates),
+            'threshold': round(detector.threshold, 4),
+            'gated': gated,
+        },
+        'enrolled_user': evaluate(detector, own, gated=gated),
+    }
+    if 'wake_other_speakers' in scenes:
+        other = evaluate(detector, {'wake_other_speakers': scenes['wake_other_speakers']}, gated=gated)
+        report['other_speakers_detection_rate'] = other['detection_rate']
+    return report
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float = 0.5) -> List[str]:
+    """
+    Compare a report against a baseline report.
+    
+    Processing cost may grow by ``tolerance`` (relative); the detection
+    rate may not drop by more than two percentage points, and false alarms
+    may not rise.
+    
+    Returns:
+        Descriptions of the regressions found (empty if none)
+    """
+    regressions = []
+    if report['config'].get('gated', False) != baseline.get('config', {}).get('gated', False):
+        regressions.append("baseline was run with a different --gated setting")
+        return regressions
+    current, previous = report['enrolled_user'], baseline.get('enrolled_user', {})
+    if previous:
+        if current['detection_rate'] < previous['detection_rate'] - 0.02:
+            regressions.append(
+                f"detection rate dropped from {previous['detection_rate']} to {current['detection_rate']}"
+            )
+        if current['false_alarms_per_hour'] > previous['false_alarms_per_hour']:
+            regressions.append(
+                f"false alarms rose from {previous['false_alarms_per_hour']} to {current['false_alarms_per_hour']} per hour"
+            )
+        cost, old_cost = current['processing']['mean_ms_per_frame'], previous['processing']['mean_ms_per_frame']
+        if cost > old_cost * (1 + tolerance):
+            regressions.append(f"processing rose from {old_cost} to {cost} ms per frame")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """
+    Command-line entry point.
+    
+    Returns:
+        Exit code: 0 on success, 1 if regressions were found
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.wakeword", description="Benchmark the wake-word detector")
+    parser.add_argument('--fixtures', type=Path, help='Directory of recorded fixtures (default: synthesize)')
+    parser.add_argument('--write-fixtures', type=Path, help='Write the synthesized fixtures to this directory and exit')
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help='Random seed for synthesized fixtures')
+    parser.add_argument('--babble-minutes', type=float, default=3.0, help='Minutes of non-wake speech synthesized')
+    parser.add_argument('--gated', action='store_true',
+                        help='Feed the detector only the frames voice-activity detection passes')
+    parser.add_argument('--output', type=Path, help='Also write the report to this file')
+    parser.add_argument('--baseline', type=Path, help='Fail if the report regresses against this one')
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Allowed relative slowdown')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.ERROR)
+    
+    if args.write_fixtures:
+        write_fixtures(args.write_fixtures, *build_fixtures(seed=args.seed, babble_minutes=args.babble_minutes))
+        print(f"Fixtures written to {args.write_fixtures}")
+        return 0
+    
+    report = run(args.fixtures, args.seed, args.babble_minutes, args.gated)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        args.output.write_text(text + "\n")
+    
+    if args.baseline:
+        regressions = compare(report, json.loads(args.baseline.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
@@ -0,0 +1,251 @@
+"""
+Synth - Formant-synthesized utterances for wake-word fixtures.
+
+The benchmark needs many takes of the wake word and of words that sound
+close to it, from varied speakers, in varied noise. Recording them by hand
+does not scale, so utterances are synthesized: a harmonic source whose
+spectral envelope follows the formants of each phoneme, plus shaped noise
+for fricatives and bursts. Speakers differ in pitch, speaking rate and
+vocal-tract length.
+"""
+
+import random
+from dataclasses import dataclass
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Phoneme -> (kind, (F1, F2, F3) in Hz, duration in ms). Kinds: vowel,
+# approximant (voiced, quieter), fricative (high noise), aspirate (broad
+# noise shaped like the next vowel), stop (silence then a short burst)
+PHONEMES: Dict[str, Tuple[str, Tuple[float, float, float], float]] = {
+    'a': ('vowel', (730, 1090, 2440), 150),
+    'aa': ('vowel', (750, 1150, 2500), 160),
+    'e': ('vowel', (530, 1840, 2480), 110),
+    'ey': ('vowel', (420, 2150, 2750), 140),
+    'i': ('vowel', (270, 2290, 3010), 130),
+    'ih': ('vowel', (390, 1990, 2550), 100),
+    'o': ('vowel', (570, 840, 2410), 150),
+    'u': ('vowel', (300, 870, 2240), 130),
+    'uh': ('vowel', (520, 1190, 2390), 100),
+    'er': ('vowel', (490, 1350, 1690), 140),
+    'r': ('approximant', (310, 1060, 1380), 70),
+    'l': ('approximant', (360, 1300, 2700), 70),
+    'w': ('approximant', (300, 610, 2200), 70),
+    'm': ('approximant', (250, 1100, 2200), 80),
+    'n': ('approximant', (250, 1700, 2600), 70),
+    's': ('fricative', (5500, 7000, 0), 110),
+    'sh': ('fricative', (2800, 4500, 0), 110),
+    'f': ('fricative', (4000, 7500, 0), 90),
+    'h': ('aspirate', (0, 0, 0), 70),
+    't': ('stop', (4000, 6500, 0), 60),
+    'k': ('stop', (1800, 3500, 0), 70),
+    'g': ('stop', (1500, 3000, 0), 60),
+    'd': ('stop', (3000, 5000, 0), 50),
+}
+
+WAKE_WORD = ['h', 'ey', 's', 'a', 'r', 'a']  # "hey sara"
+
+# Words that should not wake Sara; the first few are deliberately close
+DISTRACTORS: Dict[str, List[str]] = {
+    'hey siri': ['h', 'ey', 's', 'i', 'r', 'i'],
+    'sorry': ['s', 'aa', 'r', 'i'],
+    'hey there': ['h', 'ey', 'sh', 'e', 'r'],
+    'sarah': ['s', 'e', 'r', 'a'],
+    'okay': ['o', 'k', 'ey'],
+    'hello': ['h', 'e', 'l', 'o'],
+    'what time': ['w', 'uh', 't', 't', 'a', 'ih', 'm'],
+    'open music': ['o', 'u', 'n', 'm', 'u', 's', 'ih', 'k'],
+    'lock the screen': ['l', 'aa', 'k', 'd', 'uh', 's', 'k', 'r', 'i', 'n'],
+    'good morning': ['g', 'u', 'd', 'm', 'o', 'r', 'n', 'ih', 'n'],
+    'it is warm': ['ih', 't', 'ih', 's', 'w', 'o', 'r', 'm'],
+    'hurry': ['h', 'er', 'r', 'i'],
+}
+
+
+@dataclass
+class Speaker:
+    """Voice parameters of one synthetic speaker."""
+    
+    pitch: float = 140.0  # Mean f0 in Hz
+    rate: float = 1.0  # Speaking rate (2.0 speaks twice as fast)
+    tract: float = 1.0  # Formant scale (shorter vocal tracts have higher formants)
+    loudness: float = 6000.0  # Peak amplitude
+    
+    @classmethod
+    def random(cls, rng: random.Random) -> "Speaker":
+        """Draw a plausible speaker."""
+        return cls(
+            pitch=rng.uniform(95, 230),
+            rate=rng.uniform(0.8, 1.25),
+            tract=rng.uniform(0.92, 1.12),
+            loudness=rng.uniform(2500, 9000),
+        )
+
+
+def _smooth(values: np.ndarray, width: int) -> np.ndarray:
+    """Moving average along the first axis, for coarticulation between phonemes."""
+    if width <= 1:
+        return values
+    kernel = np.ones(width) / width
+    padded = np.pad(values, [(width // 2, width - width // 2 - 1)] + [(0, 0)] * (values.ndim - 1), mode='edge')
+    if values.ndim == 1:
+        return np.convolve(padded, kernel, mode='valid')
+    return np.stack([np.convolve(padded[:, i], kernel, mode='valid') for i in range(values.shape[1])], axis=1)
+
+
+def _band_noise(count: int, low: float, high: float, rng: np.random.Generator) -> np.ndarray:
+    """White noise band-limited in the frequency domain."""
+    spectrum = np.fft.rfft(rng.standard_normal(count))
+    freqs = np.fft.rfftfreq(count, 1.0 / SAMPLE_RATE)
+    spectrum[(freqs < low) | (freqs > high)] = 0
+    noise = np.fft.irfft(spectrum, n=count)
+    return noise / (np.abs(noise).max() + 1e-9)
+
+
+def synthesize(phonemes: Sequence[str], speaker: Speaker, seed: int = 0) -> np.ndarray:
+    """
+    Synthesize an utterance.
+    
+    Args:
+        phonemes: Keys of PHONEMES
+        speaker: Voice parameters
+        seed: Seed for the noise sources and small timing jitter
+    
+    Returns:
+        float64 PCM samples at SAMPLE_RATE
+    """
+    rng = np.random.default_rng(seed)
+    control = SAMPLE_RATE // 200  # 5 ms control frames
+    
+    # Per control frame: formants, voicing, fricative and aspiration levels
+    formants, voicing, frication, aspiration, bands = [], [], [], [], []
+    for index, name in enumerate(phonemes):
+        kind, targets, duration = PHONEMES[name]
+        frames = max(2, int(duration / speaker.rate * rng.uniform(0.9, 1.1) / 5))
+        if kind in ('vowel', 'approximant'):
+            shape = np.array(targets) * speaker.tract
+            level = 1.0 if kind == 'vowel' else 0.45
+            formants += [shape] * frames
+            voicing += [level] * frames
+            frication += [0.0] * frames
+            aspiration += [0.0] * frames
+            bands += [(0, 0)] * frames
+        else:
+            # Formants glide toward the next voiced phoneme
+            following = next(
+                (PHONEMES[n][1] for n in phonemes[index + 1:] if PHONEMES[n][0] in ('vowel', 'approximant')),
+                PHONEMES['uh'][1]
+            )
+            formants += [np.array(following) * speaker.tract] * frames
+            voicing += [0.0] * frames
+            if kind == 'aspirate':
+                frication += [0.0] * frames
+                aspiration += [0.35] * frames
+                bands += [(0, 0)] * frames
+            elif kind == 'fricative':
+                frication += [0.5] * frames
+                aspiration += [0.0] * frames
+                bands += [targets[:2]] * frames
+            else:
+                closure = frames * 2 // 3
+                frication += [0.0] * closure + [0.6] * (frames - closure)
+                aspiration += [0.0] * frames
+                bands += [targets[:2]] * frames
+    
+    formants = _smooth(np.array(formants, dtype=float), 5)
+    voicing = _smooth(np.array(voicing), 3)
+    frication = _smooth(np.array(frication), 2)
+    aspiration = _smooth(np.array(aspiration), 2)
+    frame_count = len(formants)
+    count = frame_count * control
+    
+    # Pitch contour: gentle declination with a little vibrato
+    position = np.linspace(0, 1, frame_count)
+    f0 = speaker.pitch * (1.1 - 0.2 * position) * (1 + 0.02 * np.sin(2 * np.pi * 5 * position))
+    
+    def per_sample(values: np.ndarray) -> np.ndarray:
+        return np.interp(np.arange(count) / control, np.arange(frame_count), values)
+    
+    # Harmonic source shaped by formant resonances and a falling tilt
+    f0_samples = per_sample(f0)
+    phase = 2 * np.pi * np.cumsum(f0_samples) / SAMPLE_RATE
+    harmonics = np.arange(1, int(4500 / speaker.pitch * 1.1) + 1)
+    frequencies = harmonics[:, None] * f0[None, :]  # harmonics x frames
+    envelope = np.zeros_like(frequencies)
+    for formant, bandwidth, gain in zip(formants.T, (90.0, 110.0, 160.0), (1.0, 0.6, 0.3)):
+        envelope += gain * np.exp(-0.5 * ((frequencies - formant[None, :]) / bandwidth) ** 2)
+    envelope *= 1.0 / (1.0 + frequencies / 600.0)
+    envelope[frequencies > SAMPLE_RATE / 2 - 200] = 0
+    envelope *= voicing[None, :]
+    
+    voiced = np.zeros(count)
+    for k, amplitude in zip(harmonics, envelope):
+        voiced += per_sample(amplitude) * np.sin(k * phase)
+    
+    noise = np.zeros(count)
+    band_array = np.array(bands, dtype=float)
+    for low, high in {tuple(band) for band in band_array if band[1] > 0}:
+        mask = (band_array[:, 0] == low) & (band_array[:, 1] == high)
+        noise += _band_noise(count, low, high, rng) * per_sample(frication * mask)
+    breath = _band_noise(count, 300, 3500, rng) * per_sample(aspiration)
+    
+    signal = voiced / (np.abs(voiced).max() + 1e-9) + 0.6 * noise + 0.5 * breath
+    return signal / (np.abs(signal).max() + 1e-9) * speaker.loudness
+
+
+def background(seconds: float, level: float, seed: int = 0) -> np.ndarray:
+    """
+    Room noise: pink-ish hiss with a low hum.
+    
+    Args:
+        seconds: Duration
+        level: RMS level
+        seed: Random seed
+    
+    Returns:
+        PCM samples
+    """
+    rng = np.random.default_rng(seed)
+    count = int(seconds * SAMPLE_RATE)
+    spectrum = np.fft.rfft(rng.standard_normal(count))
+    freqs = np.fft.rfftfreq(count, 1.0 / SAMPLE_RATE)
+    spectrum /= np.sqrt(np.maximum(freqs, 50.0))
+    hiss = np.fft.irfft(spectrum, n=count)
+    hum = np.sin(2 * np.pi * 60 * np.arange(count) / SAMPLE_RATE)
+    noise = hiss / (hiss.std() + 1e-9) + 0.3 * hum
+    return noise / (noise.std() + 1e-9) * level
+
+
+def scene(
+    utterances: Sequence[np.ndarray],
+    gap_seconds: Tuple[float, float] = (0.8, 2.0),
+    noise_level: float = 60.0,
+    seed: int = 0
+) -> Tuple[np.ndarray, List[Tuple[float, float]]]:
+    """
+    Place utterances in a stretch of background noise.
+    
+    Args:
+        utterances: PCM utterances, in order
+        gap_seconds: Range of silence between them
+        noise_level: Background RMS
+        seed: Random seed
+    
+    Returns:
+        int16 samples and the (start, end) seconds of each utterance
+    """
+    rng = random.Random(seed)
+    pieces, spans, cursor = [], [], 0
+    for utterance in utterances:
+        gap = int(rng.uniform(*gap_seconds) * SAMPLE_RATE)
+        pieces += [np.zeros(gap), utterance]
+        spans.append(((cursor + gap) / SAMPLE_RATE, (cursor + gap + len(utterance)) / SAMPLE_RATE))
+        cursor += gap + len(utterance)
+    tail = int(gap_seconds[1] * SAMPLE_RATE)
+    pieces.append(np.zeros(tail))
+    audio = np.concatenate(pieces)
+    audio = audio + background(len(audio) / SAMPLE_RATE, noise_level, seed)
+    return np.clip(audio, -32768, 32767).astype(np.int16), spans
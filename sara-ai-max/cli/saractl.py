@@ -7,14 +7,20 @@ Usage:
     saractl stop                     # Stop Sara AI Max
     saractl status                   # Check status
     saractl logs [--tail N]          # View logs
+    saractl audit [--tail N] [--since T] [--until T] [--level L] [--approved|--denied]
+                                     # Query the audit log
     saractl config [--show|--edit]   # Manage configuration
+    saractl enroll-wake-word [--takes N] [--model PATH]
+                                     # Record the wake word for on-device detection
     saractl plugins [list|load|unload] [name]  # Manage plugins
     saractl test                     # Run tests
 """
 
 import sys
 import argparse
+import json
 import logging
+from datetime import datetime
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -63,6 +69,46 @@ class SaraCtl:
         for line in lines:
             print(line.strip())
     
+    def audit(self, args):
+        """Query the audit log."""
+        from sara_core.audit import AuditLog
+        
+        audit_path = Path(args.path) if args.path else self.base_dir / "sara_audit.json"
+        if not audit_path.exists():
+            print("No audit log found.")
+            return
+        
+        # Read-only, so a running Sara keeps sole charge of the segments
+        log = AuditLog(str(audit_path), read_only=True)
+        try:
+            if args.since or args.until or args.level or args.approved is not None:
+                entries = log.query(
+                    since=args.since,
+                    until=args.until,
+                    permission_level=args.level,
+                    approved=args.approved,
+                    limit=args.tail,
+                    newest=True
+                )
+            else:
+                entries = log.tail(args.tail)
+        finally:
+            log.close()
+        
+        if args.json:
+            for entry in entries:
+                print(json.dumps(entry))
+            return
+        
+        for entry in entries:
+            status = "approved" if entry.get('approved') else "denied"
+            print(
+                f"{entry.get('timestamp', '')[:19]}  {entry.get('permission_level', ''):<8} "
+                f"{status:<8}  {entry.get('action', '')}"
+                + (f" -> {entry['result']}" if entry.get('result') else "")
+            )
+        print(f"({len(entries)} entries)")
+    
     def config(self, args):
         """Manage configuration."""
         config_file = self.base_dir / "config.example.json"
@@ -79,6 +125,27 @@ class SaraCtl:
         else:
             print("Config file location:", config_file)
     
+    def enroll_wake_word(self, args):
+        """Record the wake word and save the on-device wake-word model."""
+        import asyncio
+        from sara_core.config import load_config
+        from sara_core.voice_engine import VoiceEngine
+        
+        # Saved where Sara loads it from unless told otherwise
+        voice_config = load_config().get('voice', {})
+        model = args.model or voice_config.get('wake_word_model', 'sara_wakeword.npz')
+        voice = VoiceEngine.from_config(voice_config, wake_word_model=model)
+        try:
+            enrolled = asyncio.run(voice.enroll_wake_word(takes=args.takes))
+        finally:
+            voice.cleanup()
+        
+        if enrolled:
+            print(f"Wake word enrolled and saved to {model}.")
+            print("Restart Sara AI Max to use it.")
+        else:
+            print("Enrollment failed, nothing was saved.")
+    
     def plugins(self, args):
         """Manage plugins."""
         from plugins.plugin_manager import PluginManager
@@ -140,11 +207,31 @@ class SaraCtl:
         logs_parser = subparsers.add_parser('logs', help='View logs')
         logs_parser.add_argument('--tail', type=int, help='Show last N lines')
         
+        # Audit command
+        audit_parser = subparsers.add_parser('audit', help='Query the audit log')
+        audit_parser.add_argument('--tail', type=int, default=20, help='Show the newest N matching entries')
+        audit_parser.add_argument('--since', type=datetime.fromisoformat,
+                                  help='Earliest time, ISO format (e.g. 2026-01-22T09:00)')
+        audit_parser.add_argument('--until', type=datetime.fromisoformat,
+                                  help='Latest time, ISO format (exclusive)')
+        audit_parser.add_argument('--level', choices=['observe', 'low', 'medium', 'high'], help='Permission level')
+        approval = audit_parser.add_mutually_exclusive_group()
+        approval.add_argument('--approved', dest='approved', action='store_const', const=True, help='Only approved actions')
+        approval.add_argument('--denied', dest='approved', action='store_const', const=False, help='Only denied actions')
+        audit_parser.add_argument('--json', action='store_true', help='Print entries as JSON lines')
+        audit_parser.add_argument('--path', help='Audit log path (default: sara_audit.json)')
+        
         # Config command
         config_parser = subparsers.add_parser('config', help='Manage configuration')
         config_parser.add_argument('--show', action='store_true', help='Show config')
         config_parser.add_argument('--edit', action='store_true', help='Edit config')
         
+        # Wake-word enrollment command
+        enroll_parser = subparsers.add_parser('enroll-wake-word', help='Record the wake word for on-device detection')
+        enroll_parser.add_argument('--takes', type=int, default=3, help='Times to say the wake word (default: 3)')
+        enroll_parser.add_argument('--model',
+                                   help="Where to save the model (default: the config's voice.wake_word_model)")
+        
         # Plugins command
         plugins_parser = subparsers.add_parser('plugins', help='Manage plugins')
         plugins_parser.add_argument('command', choices=['list', 'load', 'unload'])
@@ -160,7 +247,7 @@ class SaraCtl:
             return
         
         # Route to appropriate handler
-        handler = getattr(self, args.command, None)
+        handler = getattr(self, args.command.replace('-', '_'), None)
         if handler:
             handler(args)
         else:
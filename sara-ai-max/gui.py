@@ -15,8 +15,10 @@ from sara_core.voice_engine import VoiceEngine
 from sara_core.nlu import NLUEngine
 from sara_core.planner import Planner
 from sara_core.executor import Executor
+from sara_core.config import load_config
 from sara_core.security import SecurityManager
 from sara_core.context import ContextManager
+from automation import metrics
 
 
 class SaraGUI:
@@ -30,16 +32,19 @@ class SaraGUI:
         self.root.configure(bg='#1e1e1e')
         
         # Initialize Sara components
-        self.context = ContextManager()
-        self.security = SecurityManager()
-        self.voice = VoiceEngine()
-        self.nlu = NLUEngine()
+        self.config = load_config()
+        self.context = ContextManager(max_history=self.config.get('context', {}).get('max_history', 50))
+        self.security = SecurityManager.from_config(self.config.get('security', {}))
+        self.voice = VoiceEngine.from_config(self.config.get('voice', {}))
+        self.nlu = NLUEngine.from_config(self.config.get('nlu', {}), watch_patterns=True)
         self.planner = Planner(self.security)
-        self.executor = Executor(self.security, self.context)
+        self.executor = Executor.from_config(self.security, self.context, self.config.get('executor', {}))
+        metrics.start_sampler_from_config(self.config.get('automation', {}))
         
         # GUI state
         self.voice_mode = False
         self.is_listening = False
+        self.pending_plan = None  # Plan waiting for the user to confirm it
         
         # Create UI
         self.create_widgets()
@@ -317,11 +322,27 @@ class SaraGUI:
             asyncio.set_event_loop(loop)
             
             try:
-                # Parse intent
-                intent = self.nlu.parse(command)
-                
-                # Create plan
-                plan = self.planner.create_plan(intent)
+                # A plan waiting for confirmation runs on "yes" and is dropped otherwise
+                plan, self.pending_plan = self.pending_plan, None
+                if plan is not None:
+                    if 'yes' not in command.lower():
+                        self.root.after(0, lambda: self.append_message("sara", "Action cancelled."))
+                        return
+                    plan = plan.model_copy(update={'confirmed': True})
+                else:
+                    # Parse intent
+                    intent = self.nlu.parse(command)
+                    
+                    # Create plan
+                    plan = self.planner.create_plan(intent)
+                    
+                    if plan.requires_confirmation:
+                        self.pending_plan = plan
+                        question = f"This will {plan.description}. Confirm? (yes/no)"
+                        self.root.after(0, lambda: self.append_message("sara", question))
+                        if self.voice_mode:
+                            self.voice.speak(question)
+                        return
                 
                 # Execute
                 result = loop.run_until_complete(self.executor.execute(plan))
@@ -386,7 +407,11 @@ class SaraGUI:
     
     def run(self):
         """Run the GUI."""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # Write out audit entries still queued
+            self.security.close()
 
 
 def main():
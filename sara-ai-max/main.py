@@ -6,15 +6,19 @@ A modular, secure, offline-first, voice-controlled desktop automation system.
 
 import asyncio
 import logging
+import signal
+import threading
 from pathlib import Path
 from typing import Optional
 
 from sara_core.voice_engine import VoiceEngine
-from sara_core.nlu import NLUEngine
+from sara_core.nlu import NLUEngine, IntentType
 from sara_core.planner import Planner
 from sara_core.executor import Executor
+from sara_core.config import load_config
 from sara_core.security import SecurityManager
 from sara_core.context import ContextManager
+from automation import metrics
 
 
 # Configure logging
@@ -38,12 +42,14 @@ class SaraMax:
         logger.info("Initializing Sara AI Max...")
         
         # Initialize core components
-        self.context = ContextManager()
-        self.security = SecurityManager()
-        self.voice = VoiceEngine()
-        self.nlu = NLUEngine()
+        self.config = load_config()
+        self.context = ContextManager(max_history=self.config.get('context', {}).get('max_history', 50))
+        self.security = SecurityManager.from_config(self.config.get('security', {}))
+        self.voice = VoiceEngine.from_config(self.config.get('voice', {}))
+        self.nlu = NLUEngine.from_config(self.config.get('nlu', {}), watch_patterns=True)
         self.planner = Planner(self.security)
-        self.executor = Executor(self.security, self.context)
+        self.executor = Executor.from_config(self.security, self.context, self.config.get('executor', {}))
+        metrics.start_sampler_from_config(self.config.get('automation', {}))
         
         self.running = False
         
@@ -52,6 +58,8 @@ class SaraMax:
     async def start(self):
         """Start Sara AI Max main loop."""
         self.running = True
+        if hasattr(signal, 'SIGHUP'):
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, self.reload_config)
         logger.info("Sara AI Max is now running. Say 'Hey Sara' to activate.")
         
         # Speak welcome message
@@ -89,12 +97,12 @@ class SaraMax:
         logger.info(f"Processing command: {command_text}")
         
         try:
-            # Step 1: Natural Language Understanding
-            intent = self.nlu.parse(command_text)
-            logger.info(f"Parsed intent: {intent.intent_type}")
+            # Step 1: Natural Language Understanding (one intent per clause)
+            intents = self.nlu.parse_multi(command_text)
+            logger.info(f"Parsed intents: {[intent.intent_type for intent in intents]}")
             
-            # Step 2: Create execution plan
-            plan = self.planner.create_plan(intent)
+            # Step 2: Create one execution plan covering every clause
+            plan = self.planner.create_plans(intents)
             logger.info(f"Created plan with {len(plan.actions)} actions")
             
             # Step 3: Check permissions and get confirmation if needed
@@ -106,10 +114,11 @@ class SaraMax:
                     self.voice.speak("Action cancelled.")
                     logger.info("User cancelled action")
                     return
+                plan = plan.model_copy(update={'confirmed': True})
             
-            # Step 4: Execute the plan
+            # Step 4: Execute the plan, listening for "cancel" meanwhile
             self.voice.speak(plan.before_message or "Executing...")
-            result = await self.executor.execute(plan)
+            result = await self.execute_interruptible(plan)
             
             # Step 5: Provide feedback
             if result.success:
@@ -124,9 +133,54 @@ class SaraMax:
             logger.error(error_msg, exc_info=True)
             self.voice.speak("Sorry, something went wrong.")
     
+    async def execute_interruptible(self, plan):
+        """
+        Execute a plan while listening for a spoken "cancel".
+        
+        Args:
+            plan: The plan to execute
+        
+        Returns:
+            ExecutionResult of the plan (cancelled if the user said so)
+        """
+        running = asyncio.create_task(self.executor.execute(plan))
+        stop = threading.Event()
+        
+        async def listen():
+            try:
+                while not stop.is_set():
+                    text = await self.voice.listen_while(stop)
+                    if text and not stop.is_set() and self.nlu.parse(text).intent_type == IntentType.CANCEL:
+                        logger.info("Cancel heard while executing")
+                        self.executor.cancel()
+                        return
+            except Exception as e:
+                logger.error(f"Error listening for cancel: {e}")
+        
+        # The listener is not awaited: once stopped it finishes the phrase
+        # it is on and ends by itself
+        self._cancel_listener = asyncio.create_task(listen())
+        try:
+            return await running
+        finally:
+            stop.set()
+    
+    def reload_config(self):
+        """Re-read the settings file and apply its permission policy (on SIGHUP)."""
+        try:
+            self.config = load_config()
+            self.security.reload_policy(self.config.get('security', {}))
+            logger.info("Permission policy reloaded")
+        except ValueError as e:
+            logger.error(f"Policy not reloaded, keeping the old one: {e}")
+    
     async def shutdown(self):
         """Clean shutdown of Sara AI Max."""
         self.running = False
+        self.nlu.stop_watching()
+        self.executor.shutdown()
+        metrics.stop_sampler()
+        self.security.close()
         self.voice.cleanup()
         logger.info("Sara AI Max shut down successfully")
 
@@ -28,6 +28,7 @@ from sara_core.voice_engine import VoiceEngine
 from sara_core.nlu import NLUEngine, IntentType
 from sara_core.planner import Planner
 from sara_core.executor import Executor
+from sara_core.config import load_config
 from sara_core.security import SecurityManager
 from sara_core.context import ContextManager
 
@@ -55,16 +56,17 @@ class SaraAIMax:
         
         # Initialize core components
         logger.info("📦 Loading core modules...")
-        self.context = ContextManager()
-        self.security = SecurityManager()
-        self.nlu = NLUEngine()
+        self.config = load_config()
+        self.context = ContextManager(max_history=self.config.get('context', {}).get('max_history', 50))
+        self.security = SecurityManager.from_config(self.config.get('security', {}))
+        self.nlu = NLUEngine.from_config(self.config.get('nlu', {}))
         self.planner = Planner(self.security)
-        self.executor = Executor(self.security, self.context)
+        self.executor = Executor.from_config(self.security, self.context, self.config.get('executor', {}))
         
         # Initialize voice engine
         logger.info("🎤 Loading voice engine...")
         try:
-            self.voice = VoiceEngine() if not text_mode else None
+            self.voice = VoiceEngine.from_config(self.config.get('voice', {})) if not text_mode else None
             if self.voice:
                 logger.info("✅ Voice engine ready")
         except Exception as e:
@@ -179,6 +181,7 @@ class SaraAIMax:
                         if self.voice:
                             self.voice.speak(response)
                         return response
+                    plan = plan.model_copy(update={'confirmed': True})
                 else:
                     # Text mode confirmation
                     print(f"⚠️ This will {plan.description}. Continue? (yes/no)")
@@ -0,0 +1,380 @@
+"""
+Audio - Long-lived audio capture into a ring buffer of frames.
+
+One capture thread reads fixed-size PCM frames from a source (the microphone,
+or a WAV file for testing) into a NumPy ring buffer and keeps a running
+estimate of the background noise level. Listeners read frames from the
+buffer through their own cursor, so the device is opened once and never
+recalibrated between wake-word and command listening. Each frame is also
+marked as speech or not by voice-activity detection, so listeners can skip
+silence and phrases end when the speaker stops.
+"""
+
+import logging
+import threading
+import time
+import wave
+from collections import deque
+from typing import Optional
+
+from .vad import VoiceActivityDetector
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available, audio capture disabled. Install with: pip install numpy")
+
+# Sample rate used throughout: enough for speech, and what STT services expect
+SAMPLE_RATE = 16000
+
+
+class AudioSource:
+    """A source of 16-bit mono PCM audio."""
+    
+    sample_rate: int = SAMPLE_RATE
+    
+    def read(self, samples: int) -> Optional["np.ndarray"]:
+        """
+        Read the next samples, blocking until they are available.
+        
+        Args:
+            samples: Number of samples to read
+        
+        Returns:
+            int16 array of that length, or None once the source has ended
+        """
+        raise NotImplementedError
+    
+    def close(self):
+        """Release the device or file."""
+
+
+class MicrophoneSource(AudioSource):
+    """The default microphone, opened once through SpeechRecognition/PyAudio."""
+    
+    def __init__(self, sample_rate: int = SAMPLE_RATE, device_index: Optional[int] = None):
+        """
+        Open the microphone.
+        
+        Args:
+            sample_rate: Samples per second
+            device_index: PyAudio device (None for the default input)
+        """
+        import speech_recognition as sr
+        
+        self.sample_rate = sample_rate
+        self._microphone = sr.Microphone(device_index=device_index, sample_rate=sample_rate)
+        self._microphone.__enter__()
+    
+    def read(self, samples: int) -> Optional["np.ndarray"]:
+        """Read the next samples from the device."""
+        data = self._microphone.stream.read(samples)
+        return np.frombuffer(data, dtype=np.int16)
+    
+    def close(self):
+        """Close the device."""
+        self._microphone.__exit__(None, None, None)
+
+
+class WavSource(AudioSource):
+    """A 16-bit WAV file played as if it were a microphone."""
+    
+    def __init__(self, path: str, realtime: bool = False, loop: bool = False):
+        """
+        Open a WAV file.
+        
+        Args:
+            path: 16-bit PCM WAV file (multi-channel files are mixed down)
+            realtime: Deliver samples no faster than they would be spoken
+            loop: Start over at the end instead of ending
+        
+        Raises:
+            ValueError: If the file is not 16-bit PCM
+        """
+        self.path = path
+        self.realtime = realtime
+        self.loop = loop
+        self._wav = wave.open(str(path), 'rb')
+        if self._wav.getsampwidth() != 2:
+            self._wav.close()
+            raise ValueError(f"{path} is not 16-bit PCM")
+        self.sample_rate = self._wav.getframerate()
+        self._channels = self._wav.getnchannels()
+        self._started: Optional[float] = None
+        self._delivered = 0
+    
+    def read(self, samples: int) -> Optional["np.ndarray"]:
+        """Read the next samples from the file, zero-padding the last frame."""
+        data = self._wav.readframes(samples)
+        if not data:
+            if not self.loop:
+                return None
+            self._wav.rewind()
+            data = self._wav.readframes(samples)
+        
+        frame = np.frombuffer(data, dtype=np.int16)
+        if self._channels > 1:
+            frame = frame.reshape(-1, self._channels).mean(axis=1).astype(np.int16)
+        if len(frame) < samples:
+            frame = np.concatenate((frame, np.zeros(samples - len(frame), dtype=np.int16)))
+        
+        if self.realtime:
+            if self._started is None:
+                self._started = time.monotonic()
+            self._delivered += samples
+            delay = self._started + self._delivered / self.sample_rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        return frame
+    
+    def close(self):
+        """Close the file."""
+        self._wav.close()
+
+
+class AudioCapture:
+    """Reads frames from a source in a background thread into a ring buffer."""
+    
+    def __init__(
+        self,
+        source: AudioSource,
+        frame_ms: int = 20,
+        buffer_seconds: float = 10.0,
+        noise_fall: float = 0.2,
+        noise_rise: float = 0.005,
+        vad: Optional[VoiceActivityDetector] = None
+    ):
+        """
+        Initialize capture.
+        
+        Args:
+            source: Where audio comes from
+            frame_ms: Frame length in milliseconds
+            buffer_seconds: Audio kept for listeners that fall behind
+            noise_fall: How fast the noise floor follows quieter frames (0-1)
+            noise_rise: How fast it follows louder ones; small, so speech
+                barely lifts it while a steadily louder room does
+            vad: Voice-activity detector (default: one for this frame size)
+        
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for audio capture. Install with: pip install numpy")
+        self.source = source
+        self.sample_rate = source.sample_rate
+        self.frame_ms = frame_ms
+        self.frame_samples = self.sample_rate * frame_ms // 1000
+        self.capacity = max(1, int(buffer_seconds * 1000 / frame_ms))
+        self.noise_fall = noise_fall
+        self.noise_rise = noise_rise
+        self.vad = vad or VoiceActivityDetector(self.sample_rate, frame_ms)
+        
+        self._frames = np.zeros((self.capacity, self.frame_samples), dtype=np.int16)
+        self._energy = np.zeros(self.capacity, dtype=np.float32)  # RMS per frame
+        self._speech = np.zeros(self.capacity, dtype=bool)  # VAD decision per frame
+        self._count = 0  # Frames captured; frame n is at n % capacity
+        self._condition = threading.Condition()
+        self.noise_floor: Optional[float] = None  # RMS of the background
+        
+        self.ended = False
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+    
+    @property
+    def running(self) -> bool:
+        """Whether the capture thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+    
+    @property
+    def frames_captured(self) -> int:
+        """Frames captured since the start."""
+        return self._count
+    
+    def start(self):
+        """Start capturing in a daemon thread (no-op if already running)."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="sara-audio", daemon=True)
+        self._thread.start()
+        logger.info(f"Audio capture started ({self.frame_ms} ms frames, {self.capacity} kept)")
+    
+    def stop(self):
+        """Stop capturing and close the source."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+        self.source.close()
+        with self._condition:
+            self.ended = True
+            self._condition.notify_all()
+    
+    def _run(self):
+        """Capture thread: read frames until stopped or the source ends."""
+        try:
+            while not self._stop.is_set():
+                frame = self.source.read(self.frame_samples)
+                if frame is None:
+                    break
+                self._store(frame)
+        except Exception as e:
+            logger.error(f"Audio capture error: {e}")
+        with self._condition:
+            self.ended = True
+            self._condition.notify_all()
+    
+    def _store(self, frame: "np.ndarray"):
+        """Put a frame in the ring buffer, update the noise floor and classify it."""
+        energy = float(np.sqrt(np.mean(np.square(frame, dtype=np.float32))))
+        
+        # Minimum tracking: drop quickly to quieter frames, creep up otherwise
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        elif energy < self.noise_floor:
+            self.noise_floor += self.noise_fall * (energy - self.noise_floor)
+        else:
+            self.noise_floor += self.noise_rise * (energy - self.noise_floor)
+        speech = bool(self.vad.classify(frame[None, :], self.noise_floor)[0])
+        
+        with self._condition:
+            slot = self._count % self.capacity
+            self._frames[slot] = frame
+            self._energy[slot] = energy
+            self._speech[slot] = speech
+            self._count += 1
+            self._condition.notify_all()
+    
+    def reader(self, from_start: bool = False) -> "FrameReader":
+        """
+        Get a cursor over the captured frames.
+        
+        Args:
+            from_start: Begin at the oldest frame still buffered instead of
+                the next one captured
+        
+        Returns:
+            Frame reader
+        """
+        with self._condition:
+            position = max(0, self._count - self.capacity) if from_start else self._count
+        return FrameReader(self, position)
+    
+    def record_phrase(
+        self,
+        reader: "FrameReader",
+        timeout: Optional[float] = None,
+        phrase_time_limit: Optional[float] = None,
+        pause_seconds: float = 0.5,
+        pre_roll_seconds: float = 0.3
+    ) -> Optional["np.ndarray"]:
+        """
+        Wait for speech and record it until the speaker stops.
+        
+        Pauses shorter than pause_seconds stay in the phrase, so words keep
+        their spacing; only the silence before the pre-roll and after the
+        last speech frame (with the VAD hangover) is left out.
+        
+        Args:
+            reader: Cursor to read frames from
+            timeout: Seconds to wait for the phrase to start (None: forever)
+            phrase_time_limit: Longest phrase in seconds (None: no limit)
+            pause_seconds: Silence that ends the phrase
+            pre_roll_seconds: Audio kept from before the phrase started
+        
+        Returns:
+            The phrase as int16 samples, or None if nothing was heard in time
+        """
+        frame_seconds = self.frame_ms / 1000
+        pre_roll: deque = deque(maxlen=max(1, int(pre_roll_seconds / frame_seconds)))
+        endpointer = self.vad.endpointer(pause_seconds)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        
+        # Wait for the start of the phrase
+        while not endpointer.started:
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                return None
+            frame = reader.read(remaining)
+            if frame is None:
+                return None
+            pre_roll.append(frame)
+            endpointer.update(reader.speech)
+        
+        frames = list(pre_roll)
+        end = len(frames)  # Frames up to the last speech frame and its hangover
+        max_frames = int(phrase_time_limit / frame_seconds) if phrase_time_limit else None
+        while not endpointer.ended and (max_frames is None or len(frames) < max_frames):
+            frame = reader.read(pause_seconds)
+            if frame is None:
+                break
+            frames.append(frame)
+            if endpointer.update(reader.speech):
+                end = len(frames)
+        return np.concatenate(frames[:end])
+
+
+class FrameReader:
+    """A listener's position in the capture ring buffer."""
+    
+    def __init__(self, capture: AudioCapture, position: int):
+        self.capture = capture
+        self.position = position  # Next frame to read
+        self.energy = 0.0  # RMS of the last frame read
+        self.speech = False  # Whether the last frame read was speech
+        self.overruns = 0  # Frames lost because this reader fell behind
+    
+    def read(self, timeout: Optional[float] = None) -> Optional["np.ndarray"]:
+        """
+        Read the next frame, waiting for it to be captured.
+        
+        Args:
+            timeout: Seconds to wait (None: until capture ends)
+        
+        Returns:
+            int16 frame (a copy), or None on timeout or once capture has ended
+        """
+        capture = self.capture
+        with capture._condition:
+            if not capture._condition.wait_for(
+                lambda: self.position < capture._count or capture.ended, timeout
+            ):
+                return None
+            if self.position >= capture._count:
+                return None
+            if capture._count - self.position > capture.capacity:
+                # Overwritten already: skip to the oldest frame still held
+                skipped = capture._count - capture.capacity - self.position
+                self.overruns += skipped
+                self.position += skipped
+            slot = self.position % capture.capacity
+            frame = capture._frames[slot].copy()
+            self.energy = float(capture._energy[slot])
+            self.speech = bool(capture._speech[slot])
+            self.position += 1
+        return frame
+    
+    def skip_to_now(self):
+        """Drop frames not read yet, e.g. after speaking, so Sara does not hear herself."""
+        with self.capture._condition:
+            self.position = self.capture._count
+
+
+def to_audio_data(samples: "np.ndarray", sample_rate: int = SAMPLE_RATE):
+    """
+    Wrap samples for SpeechRecognition's recognizers.
+    
+    Args:
+        samples: int16 samples
+        sample_rate: Samples per second
+    
+    Returns:
+        speech_recognition.AudioData
+    """
+    import speech_recognition as sr
+    return sr.AudioData(samples.astype(np.int16).tobytes(), sample_rate, 2)
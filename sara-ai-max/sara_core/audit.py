@@ -0,0 +1,918 @@
+"""
+Audit Log - Append-only, segmented JSON-lines audit store.
+
+Each entry is appended as one JSON line to the active segment, so writing an
+entry costs the same however long the log has grown. The active segment is
+rotated into a numbered, closed segment once it is too big or too old, and
+closed segments are gzip-compressed in the background. A line cut short by
+a crash is dropped when the log is next opened.
+
+A SQLite sidecar index records where each entry starts along with its time,
+permission level and approval, so queries read only the matching entries.
+The index is rebuilt from the segments if it is missing or behind.
+
+Layout, for an audit log at ``sara_audit.json``::
+
+    sara_audit.json              Active segment
+    sara_audit.json.000001.gz    Closed segments, oldest first
+    sara_audit.json.000002
+    sara_audit.json.index.db     Index
+"""
+
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Bytes read at a time when scanning a segment backwards
+_CHUNK_SIZE = 64 * 1024
+
+# Where an entry is stored: (segment sequence number, byte offset, byte length)
+Position = Tuple[int, int, int]
+
+
+def _as_timestamp(value: Union[datetime, str]) -> str:
+    """Turn a datetime or ISO string into a comparable timestamp string."""
+    return value.isoformat() if isinstance(value, datetime) else datetime.fromisoformat(value).isoformat()
+
+
+class AuditIndex:
+    """SQLite sidecar index of where each audit entry is stored."""
+    
+    def __init__(self, path: Path, read_only: bool = False):
+        """
+        Open (or create) an index.
+        
+        Args:
+            path: SQLite database file
+            read_only: Open an existing index without writing to it
+        """
+        self.path = path
+        if read_only:
+            # Without a write-ahead log no writer has the index open, and
+            # immutable keeps SQLite from creating one just to read
+            mode = "mode=ro" if path.with_name(path.name + "-wal").exists() else "immutable=1"
+            self._db = sqlite3.connect(f"{path.resolve().as_uri()}?{mode}", uri=True, check_same_thread=False)
+            return
+        
+        # Autocommit, so no write transaction is left open for another
+        # process (saractl) to wait on; in WAL mode a commit does not fsync
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                segment INTEGER NOT NULL,
+                offset INTEGER NOT NULL,
+                length INTEGER NOT NULL,
+                timestamp TEXT,
+                permission_level TEXT,
+                approved INTEGER,
+                PRIMARY KEY (segment, offset)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS entries_by_time ON entries (timestamp);
+            CREATE INDEX IF NOT EXISTS entries_by_level ON entries (permission_level, timestamp);
+            CREATE INDEX IF NOT EXISTS entries_by_approval ON entries (approved, timestamp);
+        """)
+    
+    def add(self, segment: int, offset: int, length: int, entry: Dict[str, Any]):
+        """Record an entry's position and the fields it can be queried by."""
+        approved = entry.get('approved')
+        self._db.execute(
+            "INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            (segment, offset, length, entry.get('timestamp'), entry.get('permission_level'),
+             None if approved is None else int(bool(approved)))
+        )
+    
+    def begin(self):
+        """Start a transaction, for adding many entries at once."""
+        self._db.execute("BEGIN")
+    
+    def commit(self):
+        """Commit the transaction started with begin()."""
+        self._db.execute("COMMIT")
+    
+    def indexed_ends(self) -> Dict[int, int]:
+        """
+        Get how far each segment has been indexed.
+        
+        Returns:
+            Segment sequence number -> byte offset just past its last indexed entry
+        """
+        return dict(self._db.execute("SELECT segment, MAX(offset + length) FROM entries GROUP BY segment"))
+    
+    def discard_from(self, segment: int, offset: int):
+        """Forget entries at or past a position (after the log was truncated)."""
+        self._db.execute(
+            "DELETE FROM entries WHERE segment > ? OR (segment = ? AND offset >= ?)",
+            (segment, segment, offset)
+        )
+    
+    def query(
+        self,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        permission_level: Optional[str] = None,
+        approved: Optional[bool] = None,
+        limit: Optional[int] = None,
+        newest: bool = False
+    ) -> List[Position]:
+        """
+        Find the positions of matching entries.
+        
+        Args:
+            since: Earliest timestamp (inclusive)
+            until: Latest timestamp (exclusive)
+            permission_level: Permission level value
+            approved: Approval
+            limit: Maximum number of positions
+            newest: Keep the newest matches when limited, not the oldest
+        
+        Returns:
+            Positions in log order
+        """
+        conditions = []
+        parameters: List[Any] = []
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            parameters.append(until)
+        if permission_level is not None:
+            conditions.append("permission_level = ?")
+            parameters.append(permission_level)
+        if approved is not None:
+            conditions.append("approved = ?")
+            parameters.append(int(approved))
+        
+        sql = "SELECT segment, offset, length FROM entries"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY segment DESC, offset DESC" if newest else " ORDER BY segment, offset"
+        if limit is not None:
+            sql += " LIMIT ?"
+            parameters.append(limit)
+        
+        positions = self._db.execute(sql, parameters).fetchall()
+        return positions[::-1] if newest else positions
+    
+    def close(self):
+        """Close the index."""
+        self._db.close()
+
+
+class AuditLog:
+    """Append-only JSON-lines log split into rotating segments."""
+    
+    def __init__(
+        self,
+        path: str,
+        max_segment_bytes: int = 5 * 1024 * 1024,
+        max_segment_age: Optional[float] = 24 * 3600,
+        compress: bool = True,
+        fsync_interval: float = 1.0,
+        fsync_every: int = 64,
+        index: bool = True,
+        read_only: bool = False
+    ):
+        """
+        Open (or create) an audit log.
+        
+        Args:
+            path: Path of the active segment
+            max_segment_bytes: Size at which the active segment is rotated
+            max_segment_age: Seconds after which it is rotated (None: never)
+            compress: Gzip closed segments
+            fsync_interval: Seconds between forced syncs to disk
+            fsync_every: Entries between forced syncs to disk
+            index: Keep the SQLite sidecar index for query()
+            read_only: Only read, leaving the segments to the process writing
+                them (for inspecting a running assistant's log)
+        """
+        self.path = Path(path)
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.compress = compress
+        self.fsync_interval = fsync_interval
+        self.fsync_every = max(1, fsync_every)
+        
+        self._segment_pattern = re.compile(re.escape(self.path.name) + r"\.(\d{6})(\.gz)?$")
+        self._lock = threading.Lock()
+        self._compressors: List[threading.Thread] = []
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        
+        self.read_only = read_only
+        self.index: Optional[AuditIndex] = None
+        
+        migrated = False
+        self._file = None
+        if read_only:
+            self._size = os.path.getsize(self.path) if self.path.exists() else 0
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if self.path.exists():
+                migrated = self._migrate_legacy()
+                self._recover_tail()
+            self._file = open(self.path, 'ab')
+            self._size = os.path.getsize(self.path)
+            self._started = self._segment_start()
+        
+        closed = self.closed_segments()
+        # Sequence number of the newest closed segment; the active one is next
+        self._sequence = int(self._segment_pattern.match(closed[-1].name).group(1)) if closed else 0
+        
+        index_path = self.path.with_name(self.path.name + ".index.db")
+        if index and read_only:
+            self.index = self._open_index_read_only(index_path, closed)
+        elif index and self.path.parent.exists():
+            self.index = AuditIndex(index_path)
+            self.index.discard_from(self._sequence + 1, 0 if migrated else self._size)
+            self._catch_up_index()
+        
+        if self.compress and not read_only:
+            # Finish compressing segments a crash left uncompressed
+            for segment in closed:
+                if segment.suffix != '.gz':
+                    self._compress_in_background(segment)
+    
+    def append(self, entry: Dict[str, Any], sync: bool = False):
+        """
+        Append an entry.
+        
+        The line is handed to the OS at once, so it survives the process
+        crashing; it is synced to disk every fsync_every entries or
+        fsync_interval seconds, whichever comes first.
+        
+        Args:
+            entry: JSON-serializable entry
+            sync: Sync to disk before returning
+        """
+        self.append_many([entry], sync)
+    
+    def append_many(self, entries: List[Dict[str, Any]], sync: bool = False):
+        """
+        Append several entries with one write and one index transaction.
+        
+        Args:
+            entries: JSON-serializable entries
+            sync: Sync to disk before returning
+        """
+        if self.read_only:
+            raise ValueError("Audit log was opened read-only")
+        lines = [(json.dumps(entry, separators=(',', ':')) + "\n").encode('utf-8') for entry in entries]
+        
+        with self._lock:
+            if self.index is not None and len(lines) > 1:
+                self.index.begin()
+            try:
+                for line, entry in zip(lines, entries):
+                    if self._should_rotate(len(line)):
+                        self._rotate()
+                    
+                    self._file.write(line)
+                    if self.index is not None:
+                        self.index.add(self._sequence + 1, self._size, len(line), entry)
+                    self._size += len(line)
+                    self._unsynced += 1
+            finally:
+                self._file.flush()
+                if self.index is not None and len(lines) > 1:
+                    self.index.commit()
+            
+            if (
+                sync
+                or self._unsynced >= self.fsync_every
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+    
+    def flush(self):
+        """Sync everything appended so far to disk."""
+        with self._lock:
+            if self._unsynced:
+                self._sync()
+    
+    def close(self):
+        """Sync and close the active segment and finish any compression."""
+        with self._lock:
+            if self._file is not None and not self._file.closed:
+                self._sync()
+                self._file.close()
+            if self.index is not None:
+                self.index.close()
+                self.index = None
+        for thread in self._compressors:
+            thread.join()
+    
+    def closed_segments(self) -> List[Path]:
+        """
+        List the closed segments.
+        
+        Returns:
+            Segment paths, oldest first
+        """
+        segments = []
+        for candidate in self.path.parent.iterdir():
+            match = self._segment_pattern.match(candidate.name)
+            if match:
+                segments.append((int(match.group(1)), candidate))
+        
+        # A segment caught mid-compression exists in both forms; prefer the plain one
+        by_sequence: Dict[int, Path] = {}
+        for sequence, segment in sorted(segments, key=lambda s: (s[0], s[1].suffix != '.gz')):
+            by_sequence[sequence] = segment
+        return [by_sequence[sequence] for sequence in sorted(by_sequence)]
+    
+    def segments(self) -> List[Path]:
+        """
+        List every segment.
+        
+        Returns:
+            Closed segments, oldest first, then the active segment
+        """
+        return self.closed_segments() + [self.path]
+    
+    def read(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every entry, oldest first.
+        
+        Yields:
+            Entries
+        """
+        for segment in self.segments():
+            yield from self._read_segment(segment)
+    
+    def tail(self, count: int) -> List[Dict[str, Any]]:
+        """
+        Get the newest entries without reading the whole log.
+        
+        Args:
+            count: Number of entries
+        
+        Returns:
+            Up to count entries, oldest first
+        """
+        if count <= 0:
+            return []
+        
+        entries: deque = deque()
+        for segment in reversed(self.segments()):
+            needed = count - len(entries)
+            if segment.suffix == '.gz':
+                found = list(deque(self._read_segment(segment), maxlen=needed))
+            else:
+                found = self._read_plain_tail(segment, needed)
+            entries.extendleft(reversed(found))
+            if len(entries) >= count:
+                break
+        return list(entries)
+    
+    def query(
+        self,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        permission_level: Optional[str] = None,
+        approved: Optional[bool] = None,
+        limit: Optional[int] = None,
+        newest: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        Find entries by time range, permission level and approval.
+        
+        Matches are looked up in the index and only they are read from
+        the segments.
+        
+        Args:
+            since: Earliest time (inclusive)
+            until: Latest time (exclusive)
+            permission_level: Permission level value, e.g. "high"
+            approved: Only approved (True) or denied (False) entries
+            limit: Maximum number of entries
+            newest: Keep the newest matches when limited, not the oldest
+        
+        Returns:
+            Matching entries, oldest first
+        """
+        since = _as_timestamp(since) if since is not None else None
+        until = _as_timestamp(until) if until is not None else None
+        permission_level = getattr(permission_level, 'value', permission_level)
+        
+        if self.index is None:
+            matches = [
+                entry for entry in self.read()
+                if (since is None or entry.get('timestamp', '') >= since)
+                and (until is None or entry.get('timestamp', '') < until)
+                and (permission_level is None or entry.get('permission_level') == permission_level)
+                and (approved is None or entry.get('approved') == approved)
+            ]
+            if limit is not None:
+                matches = matches[-limit:] if newest else matches[:limit]
+            return matches
+        
+        with self._lock:
+            positions = self.index.query(since, until, permission_level, approved, limit, newest)
+        return self._fetch(positions)
+    
+    def _sequence_of(self, segment: Path) -> int:
+        """Sequence number of a segment; the active one gets the next number."""
+        if segment == self.path:
+            return self._sequence + 1
+        return int(self._segment_pattern.match(segment.name).group(1))
+    
+    def _segment_path(self, sequence: int) -> Path:
+        """Path of the segment with a sequence number."""
+        if sequence == self._sequence + 1:
+            return self.path
+        plain = self.path.with_name(f"{self.path.name}.{sequence:06d}")
+        return plain if plain.exists() else plain.with_name(plain.name + ".gz")
+    
+    def _open_index_read_only(self, path: Path, closed: List[Path]) -> Optional[AuditIndex]:
+        """
+        Open the writer's index without touching it.
+        
+        The index is only used if it covers every segment; otherwise
+        queries scan the segments, as bringing it up to date is the
+        writer's job.
+        
+        Args:
+            path: Index database file
+            closed: Closed segments
+        
+        Returns:
+            The index, or None to scan instead
+        """
+        if not path.exists():
+            return None
+        try:
+            index = AuditIndex(path, read_only=True)
+            ends = index.indexed_ends()
+        except sqlite3.Error as e:
+            logger.debug(f"Audit index unavailable, scanning instead: {e}")
+            return None
+        
+        complete = all(self._sequence_of(segment) in ends for segment in closed)
+        if self._size and ends.get(self._sequence + 1, 0) < self._size:
+            complete = False
+        if not complete:
+            logger.debug("Audit index is behind the log, scanning instead")
+            index.close()
+            return None
+        return index
+    
+    def _catch_up_index(self):
+        """Index entries written since the index was last committed."""
+        ends = self.index.indexed_ends()
+        newest = max(ends, default=0)
+        added = 0
+        self.index.begin()
+        try:
+            for segment in self.segments():
+                sequence = self._sequence_of(segment)
+                # Closed segments never change, so one indexed before a newer one is complete
+                if sequence in ends and sequence < newest:
+                    continue
+                added += self._index_segment(segment, sequence, ends.get(sequence, 0))
+        finally:
+            self.index.commit()
+        if added:
+            logger.info(f"Indexed {added} audit entries")
+    
+    def _index_segment(self, segment: Path, sequence: int, start: int) -> int:
+        """Index the entries of a segment from a byte offset on."""
+        opener = gzip.open if segment.suffix == '.gz' else open
+        added = 0
+        try:
+            with opener(segment, 'rb') as f:
+                f.seek(start)
+                offset = start
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        self.index.add(sequence, offset, len(line), json.loads(line))
+                        added += 1
+                    except ValueError:
+                        pass
+                    offset += len(line)
+        except FileNotFoundError:
+            pass
+        return added
+    
+    def _fetch(self, positions: List[Position]) -> List[Dict[str, Any]]:
+        """Read the entries at the given positions, keeping their order."""
+        by_segment: Dict[int, List[Position]] = {}
+        for position in positions:
+            by_segment.setdefault(position[0], []).append(position)
+        
+        found: Dict[Position, Dict[str, Any]] = {}
+        for sequence, wanted in by_segment.items():
+            segment = self._segment_path(sequence)
+            opener = gzip.open if segment.suffix == '.gz' else open
+            try:
+                with opener(segment, 'rb') as f:
+                    # Ascending offsets, so a compressed segment only ever seeks forward
+                    for position in sorted(wanted, key=lambda p: p[1]):
+                        f.seek(position[1])
+                        found[position] = json.loads(f.read(position[2]))
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading audit segment {segment.name}: {e}")
+        return [found[position] for position in positions if position in found]
+    
+    def _should_rotate(self, incoming: int) -> bool:
+        """Check whether the active segment must be closed before a write."""
+        if not self._size:
+            return False
+        if self._size + incoming > self.max_segment_bytes:
+            return True
+        return self.max_segment_age is not None and time.time() - self._started >= self.max_segment_age
+    
+    def _rotate(self):
+        """Close the active segment and start a new one (lock held)."""
+        self._sync()
+        self._file.close()
+        
+        self._sequence += 1
+        closed = self.path.with_name(f"{self.path.name}.{self._sequence:06d}")
+        os.replace(self.path, closed)
+        
+        self._file = open(self.path, 'ab')
+        self._size = 0
+        self._started = time.time()
+        logger.info(f"Rotated audit log segment to {closed.name}")
+        
+        if self.compress:
+            self._compress_in_background(closed)
+    
+    def _sync(self):
+        """Force appended entries to disk (lock held)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def _segment_start(self) -> float:
+        """Wall-clock time the active segment was started."""
+        with open(self.path, 'rb') as f:
+            first = f.readline()
+        try:
+            return datetime.fromisoformat(json.loads(first)['timestamp']).timestamp()
+        except (ValueError, KeyError, TypeError):
+            return time.time()
+    
+    def _compress_in_background(self, segment: Path):
+        """Gzip a closed segment in a worker thread, keeping writes fast."""
+        thread = threading.Thread(target=self._compress, args=(segment,), name="sara-audit-gzip", daemon=True)
+        self._compressors = [t for t in self._compressors if t.is_alive()] + [thread]
+        thread.start()
+    
+    @staticmethod
+    def _compress(segment: Path):
+        """Gzip a closed segment, replacing it only once complete."""
+        target = segment.with_name(segment.name + ".gz")
+        partial = segment.with_name(segment.name + ".gz.tmp")
+        try:
+            with open(segment, 'rb') as source, gzip.open(partial, 'wb') as destination:
+                shutil.copyfileobj(source, destination)
+            os.replace(partial, target)
+            os.remove(segment)
+        except OSError as e:
+            logger.error(f"Error compressing audit segment {segment.name}: {e}")
+    
+    def _migrate_legacy(self) -> bool:
+        """Convert an audit log written as one JSON array to JSON lines."""
+        with open(self.path, 'rb') as f:
+            head = f.read(_CHUNK_SIZE).lstrip()
+        if not head.startswith(b"["):
+            return False
+        
+        try:
+            with open(self.path, 'r') as f:
+                entries = json.load(f)
+        except ValueError as e:
+            logger.error(f"Cannot migrate unreadable audit log {self.path}: {e}")
+            return False
+        
+        converted = self.path.with_name(self.path.name + ".tmp")
+        with open(converted, 'wb') as f:
+            for entry in entries:
+                f.write((json.dumps(entry, separators=(',', ':')) + "\n").encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(converted, self.path)
+        logger.info(f"Migrated {len(entries)} audit entries to JSON lines")
+        return True
+    
+    def _recover_tail(self):
+        """Drop a last line left incomplete by a crash mid-write."""
+        with open(self.path, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+            
+            keep = 0
+            end = size
+            while end > 0:
+                start = max(0, end - _CHUNK_SIZE)
+                f.seek(start)
+                newline = f.read(end - start).rfind(b"\n")
+                if newline >= 0:
+                    keep = start + newline + 1
+                    break
+                end = start
+            
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+        logger.warning(f"Dropped {size - keep} bytes of an incomplete audit entry")
+    
+    @staticmethod
+    def _parse_lines(lines, segment: Path) -> Iterator[Dict[str, Any]]:
+        """Parse complete JSON lines, skipping damaged ones."""
+        for line in lines:
+            if not line.endswith(b"\n"):
+                # Being written right now
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping damaged audit entry in {segment.name}")
+    
+    def _read_segment(self, segment: Path) -> Iterator[Dict[str, Any]]:
+        """Iterate over the entries of one segment."""
+        opener = gzip.open if segment.suffix == '.gz' else open
+        try:
+            with opener(segment, 'rb') as f:
+                yield from self._parse_lines(f, segment)
+        except FileNotFoundError:
+            # Replaced by its compressed form while we were listing
+            compressed = segment.with_name(segment.name + ".gz")
+            if compressed.exists():
+                yield from self._read_segment(compressed)
+    
+    def _read_plain_tail(self, segment: Path, count: int) -> List[Dict[str, Any]]:
+        """Read the last entries of an uncompressed segment backwards."""
+        try:
+            f = open(segment, 'rb')
+        except FileNotFoundError:
+            return list(deque(self._read_segment(segment), maxlen=count))
+        
+        with f:
+            end = f.seek(0, os.SEEK_END)
+            data = b""
+            while end > 0 and data.count(b"\n") <= count:
+                start = max(0, end - _CHUNK_SIZE)
+                f.seek(start)
+                data = f.read(end - start) + data
+                end = start
+        
+        lines = data.splitlines(keepends=True)
+        if end > 0:
+            # The first line is probably cut off
+            lines = lines[1:]
+        return list(self._parse_lines(lines, segment))[-count:]
+
+
+class _Pending:
+    """An entry waiting for the writer thread."""
+    
+    __slots__ = ('entry', 'sync', 'done', 'error')
+    
+    def __init__(self, entry: Dict[str, Any], sync: bool):
+        self.entry = entry
+        self.sync = sync
+        # Only sync entries are waited on
+        self.done = threading.Event() if sync else None
+        self.error: Optional[Exception] = None
+
+
+class _Flush:
+    """Queue marker: write what has been collected, then report back."""
+    
+    __slots__ = ('done',)
+    
+    def __init__(self):
+        self.done = threading.Event()
+
+
+# Queue marker: write what is queued, then stop
+_STOP = object()
+
+
+class AuditWriter:
+    """Writes audit entries to an audit log in batches from a background thread."""
+    
+    def __init__(
+        self,
+        open_log: Callable[[], AuditLog],
+        queue_size: int = 1024,
+        batch_size: int = 64,
+        flush_interval: float = 0.5,
+        put_timeout: float = 0.05
+    ):
+        """
+        Initialize writer; its thread starts with the first entry.
+        
+        Args:
+            open_log: Returns the audit log to write to (called on first write)
+            queue_size: Entries that may wait for the writer before callers block
+            batch_size: Entries written together at most
+            flush_interval: Seconds an entry may wait for a batch to fill
+            put_timeout: Seconds a caller blocks on a full queue before the
+                entry is dropped
+        """
+        self._open_log = open_log
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        
+        self.written = 0
+        self.batches = 0
+        self.sync_writes = 0
+        self.backpressure = 0
+        self.dropped = 0
+        self.errors = 0
+        self.peak_depth = 0
+    
+    def submit(self, entry: Dict[str, Any], sync: bool = False) -> bool:
+        """
+        Queue an entry for writing.
+        
+        Batched entries return at once unless the queue is full, in which
+        case the caller waits up to put_timeout and then drops the entry.
+        Sync entries are never dropped and return once on disk.
+        
+        Args:
+            entry: JSON-serializable entry
+            sync: Wait until the entry is written and synced to disk
+        
+        Returns:
+            False if the entry was dropped
+        
+        Raises:
+            Exception: Whatever writing a sync entry raised
+        """
+        if self._closed:
+            raise ValueError("Audit writer is closed")
+        self._ensure_started()
+        
+        pending = _Pending(entry, sync)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            self.backpressure += 1
+            try:
+                # Sync entries must be kept, however long that takes
+                self._queue.put(pending, timeout=None if sync else self.put_timeout)
+            except queue.Full:
+                self.dropped += 1
+                logger.warning(f"Audit queue full, dropped entry: {entry.get('action')}")
+                return False
+        self.peak_depth = max(self.peak_depth, self._queue.qsize())
+        
+        if sync:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+        return True
+    
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until the entries queued before this call are written.
+        
+        Entries submitted while waiting are not waited for, so a busy log
+        cannot hold the caller forever.
+        
+        Args:
+            timeout: Seconds to wait at most (None: no limit)
+        
+        Returns:
+            False if the entries were not all written in time
+        """
+        if self._thread is None:
+            return True
+        marker = _Flush()
+        try:
+            self._queue.put(marker, timeout=timeout)
+        except queue.Full:
+            return False
+        return marker.done.wait(timeout)
+    
+    def close(self):
+        """Drain the queue, write everything and stop the thread."""
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get writer counters.
+        
+        Returns:
+            Dictionary of queue depth, entries written, batches, sync
+            writes, times callers met a full queue, dropped entries and
+            write errors
+        """
+        return {
+            'queued': self._queue.qsize(),
+            'queue_size': self._queue.maxsize,
+            'peak_depth': self.peak_depth,
+            'written': self.written,
+            'batches': self.batches,
+            'sync_writes': self.sync_writes,
+            'backpressure': self.backpressure,
+            'dropped': self.dropped,
+            'errors': self.errors,
+        }
+    
+    def _ensure_started(self):
+        """Start the writer thread if it is not running."""
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sara-audit-writer", daemon=True)
+                    self._thread.start()
+    
+    def _run(self):
+        """Writer thread: collect entries into batches and write them."""
+        stopping = False
+        while not (stopping and self._queue.empty()):
+            item = self._queue.get()
+            batch: List[_Pending] = []
+            flushes: List[_Flush] = []
+            markers = 0
+            deadline = time.monotonic() + self.flush_interval
+            
+            # Collect until the batch is full, its time is up, a sync entry
+            # needs writing or a flush or stop is requested
+            while True:
+                if item is _STOP:
+                    stopping = True
+                if isinstance(item, _Flush) or item is _STOP:
+                    markers += 1
+                    if item is not _STOP:
+                        flushes.append(item)
+                    # On stop, keep draining what was queued before it
+                    if not stopping or self._queue.empty():
+                        break
+                else:
+                    batch.append(item)
+                    if item.sync or len(batch) >= self.batch_size:
+                        break
+                
+                try:
+                    remaining = deadline - time.monotonic()
+                    item = self._queue.get(timeout=remaining) if remaining > 0 and not stopping \
+                        else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            
+            if batch:
+                self._write(batch)
+            for flush in flushes:
+                flush.done.set()
+            for _ in range(len(batch) + markers):
+                self._queue.task_done()
+    
+    def _write(self, batch: List["_Pending"]):
+        """Write one batch, syncing it if any entry asked for that."""
+        sync = any(pending.sync for pending in batch)
+        try:
+            self._open_log().append_many([pending.entry for pending in batch], sync=sync)
+            self.written += len(batch)
+            self.batches += 1
+            self.sync_writes += sync
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Error writing {len(batch)} audit entries: {e}")
+            for pending in batch:
+                pending.error = e
+        finally:
+            for pending in batch:
+                if pending.done is not None:
+                    pending.done.set()
@@ -0,0 +1,43 @@
+"""
+Config - Loads the user's settings file.
+
+The settings live in config.json next to the entry points (see
+config.example.json for every section and its defaults). A missing file
+means defaults everywhere, so a fresh checkout still starts.
+"""
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Union
+
+logger = logging.getLogger(__name__)
+
+CONFIG_PATH = "config.json"
+
+
+def load_config(path: Union[str, Path] = CONFIG_PATH) -> Dict[str, Any]:
+    """
+    Read the settings file.
+    
+    Args:
+        path: Path to the JSON settings file
+    
+    Returns:
+        The settings, or an empty dict if the file does not exist
+    
+    Raises:
+        ValueError: If the file is not a JSON object
+    """
+    path = Path(path)
+    if not path.exists():
+        logger.info(f"No {path}, using default settings")
+        return {}
+    
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} must hold a JSON object")
+    
+    logger.info(f"Loaded settings from {path}")
+    return config
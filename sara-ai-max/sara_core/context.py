@@ -5,10 +5,18 @@ This module maintains conversation history and context.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import re
+import threading
+import time
+from collections import deque
+from itertools import islice
+from typing import TYPE_CHECKING, Deque, List, Dict, Any, Optional, Union
 from datetime import datetime
 from pydantic import BaseModel
 
+if TYPE_CHECKING:
+    from .sessions import SessionStore
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,18 +29,56 @@ class ContextEntry(BaseModel):
     metadata: Dict[str, Any] = {}
 
 
+class ContextRecord:
+    """Compact history entry; converted to a ContextEntry only when handed out."""
+    
+    __slots__ = ('timestamp', 'role', 'content', 'metadata')
+    
+    def __init__(self, timestamp: float, role: str, content: str, metadata: Optional[Dict[str, Any]] = None):
+        self.timestamp = timestamp  # Seconds since the epoch
+        self.role = role
+        self.content = content
+        self.metadata = metadata
+    
+    def to_entry(self) -> ContextEntry:
+        """
+        Convert to the public model.
+        
+        Returns:
+            ContextEntry with an ISO timestamp
+        """
+        return ContextEntry(
+            timestamp=datetime.fromtimestamp(self.timestamp).isoformat(),
+            role=self.role,
+            content=self.content,
+            metadata=self.metadata or {}
+        )
+
+
 class ContextManager:
     """Manages conversation context and memory."""
     
-    def __init__(self, max_history: int = 50):
+    def __init__(
+        self,
+        max_history: int = 50,
+        session_id: Optional[str] = None,
+        store: Optional["SessionStore"] = None
+    ):
         """
         Initialize context manager.
         
         Args:
             max_history: Maximum number of entries to keep in history
+            session_id: Session this context belongs to
+            store: Session store that persists the history (see
+                SessionStore.get, which also loads what was stored)
         """
-        self.history: List[ContextEntry] = []
+        # Ring buffer: appending past max_history drops the oldest entry
+        self.history: Deque[ContextRecord] = deque(maxlen=max_history)
         self.max_history = max_history
+        self.session_id = session_id
+        self.store = store
+        self._lock = threading.Lock()
         self.session_start = datetime.now()
         self.context_variables: Dict[str, Any] = {}
         
@@ -46,16 +92,7 @@ class ContextManager:
             message: User's message
             metadata: Optional metadata about the message
         """
-        entry = ContextEntry(
-            timestamp=datetime.now().isoformat(),
-            role='user',
-            content=message,
-            metadata=metadata or {}
-        )
-        
-        self.history.append(entry)
-        self._trim_history()
-        logger.info(f"Added user message to context: {message[:50]}...")
+        self._append('user', message, metadata)
     
     def add_assistant_message(self, message: str, metadata: Optional[Dict] = None):
         """
@@ -65,16 +102,16 @@ class ContextManager:
             message: Assistant's message
             metadata: Optional metadata about the message
         """
-        entry = ContextEntry(
-            timestamp=datetime.now().isoformat(),
-            role='assistant',
-            content=message,
-            metadata=metadata or {}
-        )
-        
-        self.history.append(entry)
-        self._trim_history()
-        logger.info(f"Added assistant message to context: {message[:50]}...")
+        self._append('assistant', message, metadata)
+    
+    def _append(self, role: str, message: str, metadata: Optional[Dict]):
+        """Append a message to the history ring buffer."""
+        record = ContextRecord(time.time(), role, message, metadata)
+        with self._lock:
+            self.history.append(record)
+        if self.store is not None:
+            self.store.record(self.session_id, record)
+        logger.debug(f"Added {role} message to context: {message[:50]}...")
     
     def get_recent_context(self, count: int = 10) -> List[ContextEntry]:
         """
@@ -84,9 +121,66 @@ class ContextManager:
             count: Number of recent entries to return
             
         Returns:
-            List of recent context entries
+            List of recent context entries, oldest first
         """
-        return self.history[-count:]
+        if count <= 0:
+            return []
+        with self._lock:
+            # Walk back from the newest entry, touching only what is returned
+            records = list(islice(reversed(self.history), count))
+        records.reverse()
+        return [record.to_entry() for record in records]
+    
+    def search(
+        self,
+        query: str,
+        since: Optional[Union[datetime, float, str]] = None,
+        role: Optional[str] = None,
+        limit: int = 20
+    ) -> List[ContextEntry]:
+        """
+        Find messages in this session by the words they contain.
+        
+        With a session store the whole stored history is searched through its
+        full-text index; otherwise only the entries held in memory.
+        
+        Args:
+            query: Words to look for; all must appear, the last as a prefix
+            since: Only messages from this time on (datetime, ISO string or
+                epoch seconds)
+            role: Only messages from 'user' or 'assistant'
+            limit: Maximum number of results
+        
+        Returns:
+            Matching entries, most relevant first (newest first in memory)
+        """
+        if self.store is not None:
+            return self.store.search(query, session_id=self.session_id, since=since, role=role, limit=limit)
+        
+        words = re.findall(r"\w+", query.lower())
+        if not words:
+            return []
+        if isinstance(since, datetime):
+            since = since.timestamp()
+        elif isinstance(since, str):
+            since = datetime.fromisoformat(since).timestamp()
+        
+        with self._lock:
+            records = list(reversed(self.history))
+        matches = []
+        for record in records:
+            if role is not None and record.role != role:
+                continue
+            if since is not None and record.timestamp < since:
+                continue
+            text = record.content.lower()
+            if record.metadata:
+                text += " " + " ".join(str(value).lower() for value in record.metadata.values())
+            if all(word in text for word in words):
+                matches.append(record.to_entry())
+                if len(matches) >= limit:
+                    break
+        return matches
     
     def set_variable(self, key: str, value: Any):
         """
@@ -97,7 +191,7 @@ class ContextManager:
             value: Variable value
         """
         self.context_variables[key] = value
-        logger.info(f"Set context variable: {key}")
+        logger.debug(f"Set context variable: {key}")
     
     def get_variable(self, key: str, default: Any = None) -> Any:
         """
@@ -114,12 +208,10 @@ class ContextManager:
     
     def clear_context(self):
         """Clear all context and start fresh."""
-        self.history.clear()
+        with self._lock:
+            self.history.clear()
+        if self.store is not None:
+            self.store.delete(self.session_id)
         self.context_variables.clear()
         self.session_start = datetime.now()
         logger.info("Context cleared")
-    
-    def _trim_history(self):
-        """Trim history to max_history length."""
-        if len(self.history) > self.max_history:
-            self.history = self.history[-self.max_history:]
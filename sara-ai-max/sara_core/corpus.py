@@ -0,0 +1,147 @@
+"""
+Corpus - Synthetic labelled utterances generated from intent patterns.
+
+This module turns the NLU regex patterns back into example commands, for
+training the fallback classifier and for benchmarking the NLU.
+"""
+
+import random
+from typing import Dict, List, Sequence, Tuple
+
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+
+from .nlu import IntentType
+
+# Values substituted for captured entities such as app, file and query names
+SLOT_VALUES = [
+    "chrome",
+    "notepad",
+    "spotify",
+    "calculator",
+    "visual studio code",
+    "reports",
+    "project notes",
+    "budget 2024",
+    "notes.txt",
+    "todo.md",
+    "paris",
+    "new york",
+    "python tutorials",
+    "cheap flights",
+    "pasta recipes",
+]
+
+# Text standing in for ".*" between the literal parts of a pattern
+FILLERS = [" ", " ", " the ", " is the ", " me the ", " is it ", " my ", ""]
+
+_MAX_REPEAT = sre_parse.MAXREPEAT
+
+
+def _char_allowed(char: str, items: Sequence) -> bool:
+    """Check whether a character belongs to a parsed character class."""
+    code = ord(char)
+    negate = False
+    for op, value in items:
+        name = str(op)
+        if name == 'NEGATE':
+            negate = True
+        elif name == 'LITERAL' and value == code:
+            return not negate
+        elif name == 'RANGE' and value[0] <= code <= value[1]:
+            return not negate
+        elif name == 'CATEGORY':
+            kind = str(value)
+            if ('DIGIT' in kind and char.isdigit()) or ('SPACE' in kind and char.isspace()) \
+                    or ('WORD' in kind and (char.isalnum() or char == '_')):
+                return 'NOT' not in kind and not negate
+    return negate
+
+
+def _render(tokens, rng: random.Random, slot_values: Sequence[str]) -> str:
+    """Render a parsed pattern into one matching string."""
+    parts = []
+    for op, value in tokens:
+        name = str(op)
+        if name == 'LITERAL':
+            parts.append(chr(value))
+        elif name == 'SUBPATTERN':
+            parts.append(_render(value[-1], rng, slot_values))
+        elif name == 'BRANCH':
+            parts.append(_render(rng.choice(value[1]), rng, slot_values))
+        elif name == 'IN':
+            allowed = [c for c in "abcdefghijklmnopqrstuvwxyz" if _char_allowed(c, value)]
+            parts.append(rng.choice(allowed or ['x']))
+        elif name == 'ANY':
+            parts.append(' ')
+        elif name in ('MAX_REPEAT', 'MIN_REPEAT'):
+            low, high, body = value
+            single = list(body)
+            kinds = [str(item[0]) for item in single]
+            if kinds == ['ANY'] and low == 0:
+                parts.append(rng.choice(FILLERS))
+            elif kinds in (['ANY'], ['IN']) and (high == _MAX_REPEAT or high > 1):
+                # An entity slot: substitute a value the class accepts
+                items = single[0][1]
+                candidates = [
+                    v for v in slot_values
+                    if kinds == ['ANY'] or all(_char_allowed(c, items) for c in v)
+                ]
+                parts.append(rng.choice(candidates or slot_values))
+            else:
+                count = low if high == low else rng.randint(low, min(high, low + 1))
+                parts.append(''.join(_render(body, rng, slot_values) for _ in range(count)))
+        # AT (anchors) and anything else render as nothing
+    return ''.join(parts)
+
+
+def sample_utterance(
+    pattern: str,
+    rng: random.Random,
+    slot_values: Sequence[str] = SLOT_VALUES
+) -> str:
+    """
+    Generate one utterance matching a pattern.
+    
+    Args:
+        pattern: Regex pattern from the intent table
+        rng: Random source
+        slot_values: Values to use for captured entities
+    
+    Returns:
+        Whitespace-normalized utterance
+    """
+    return ' '.join(_render(sre_parse.parse(pattern), rng, slot_values).split())
+
+
+def generate_corpus(
+    patterns: Dict[IntentType, List[str]],
+    per_pattern: int = 20,
+    seed: int = 0
+) -> List[Tuple[str, IntentType]]:
+    """
+    Generate labelled utterances from an intent pattern table.
+    
+    Each utterance is labelled with the intent of the pattern it came from.
+    
+    Args:
+        patterns: Mapping of intent type to regex patterns
+        per_pattern: Samples drawn per pattern (duplicates are dropped)
+        seed: Random seed, so corpora are reproducible
+    
+    Returns:
+        List of (utterance, intent type) tuples
+    """
+    rng = random.Random(seed)
+    corpus = []
+    seen = set()
+    for intent_type, intent_patterns in patterns.items():
+        for pattern in intent_patterns:
+            for _ in range(per_pattern):
+                text = sample_utterance(pattern, rng)
+                if text and (text, intent_type) not in seen:
+                    seen.add((text, intent_type))
+                    corpus.append((text, intent_type))
+    return corpus
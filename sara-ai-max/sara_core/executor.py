@@ -6,16 +6,84 @@ This module executes the actions created by the planner.
 
 import logging
 import asyncio
-from typing import Optional
+import contextvars
+import json
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
 from pydantic import BaseModel
 
+from .cache import TTLCache
 from .planner import Plan, Action, ActionType
-from .security import SecurityManager
+from .policy import Effect
+from .security import SecurityManager, PermissionLevel
 from .context import ContextManager
 from automation import app_controller, file_ops, system
 
 logger = logging.getLogger(__name__)
 
+# Thread pool each action type's blocking work runs in. GUI automation
+# drives the one mouse and keyboard, so it gets a single worker of its own
+# and a slow app launch never holds up quick system queries.
+ACTION_POOLS: Dict[ActionType, str] = {
+    ActionType.APP_OPEN: 'gui',
+    ActionType.APP_CLOSE: 'gui',
+    ActionType.APP_SWITCH: 'gui',
+    ActionType.SYSTEM_INFO: 'system',
+    ActionType.VOLUME_SET: 'system',
+    ActionType.BRIGHTNESS_SET: 'system',
+    ActionType.SYSTEM_SHUTDOWN: 'system',
+    ActionType.SYSTEM_RESTART: 'system',
+    ActionType.SYSTEM_LOCK: 'system',
+    ActionType.WEB_SEARCH: 'system',
+    ActionType.FILE_CREATE: 'files',
+    ActionType.FILE_DELETE: 'files',
+    ActionType.FOLDER_CREATE: 'files',
+    ActionType.FOLDER_DELETE: 'files',
+    ActionType.FILE_SEARCH: 'files',
+    ActionType.PLUGIN: 'plugins',
+}
+
+# Worker threads per pool
+DEFAULT_POOL_SIZES: Dict[str, int] = {
+    'gui': 1,
+    'system': 2,
+    'files': 2,
+    'plugins': 2,
+}
+
+# Seconds an action of each pool may run before it is abandoned
+DEFAULT_TIMEOUTS: Dict[str, float] = {
+    'gui': 20.0,
+    'system': 15.0,
+    'files': 30.0,
+    'plugins': 60.0,
+}
+
+# Executor section keys; each sets the Executor argument of the same name
+_CONFIG_OPTIONS = (
+    'max_concurrency', 'pool_sizes', 'timeouts', 'default_timeout', 'plan_timeout', 'result_cache_size'
+)
+
+# Seconds the action running in the current task spent waiting for a worker
+_queue_wait: contextvars.ContextVar[List[float]] = contextvars.ContextVar('queue_wait')
+
+
+class _PlanRun:
+    """Tasks of one executing plan, so they can be cancelled from any thread."""
+    
+    __slots__ = ('loop', 'tasks', 'cancelled')
+    
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.tasks: List[asyncio.Task] = []
+        self.cancelled = False
+
+
+# Plan the action running in the current task belongs to
+_current_run: contextvars.ContextVar[_PlanRun] = contextvars.ContextVar('current_run')
+
 
 class ExecutionResult(BaseModel):
     """Result of executing a plan."""
@@ -23,28 +91,142 @@ class ExecutionResult(BaseModel):
     success: bool
     message: Optional[str] = None
     error: Optional[str] = None
+    timed_out: bool = False  # An action ran out of time (rather than failing)
+    cancelled: bool = False  # An action was cancelled before it finished
     data: dict = {}
 
 
 class Executor:
     """Executes action plans safely."""
     
-    def __init__(self, security: SecurityManager, context: ContextManager):
+    def __init__(
+        self,
+        security: SecurityManager,
+        context: ContextManager,
+        max_concurrency: int = 4,
+        pool_sizes: Optional[Dict[str, int]] = None,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 30.0,
+        plan_timeout: Optional[float] = 120.0,
+        result_cache_size: int = 128
+    ):
         """
         Initialize executor.
         
         Args:
             security: Security manager for permission checks and auditing
             context: Context manager for session state
+            max_concurrency: Maximum number of actions running at once
+            pool_sizes: Worker threads per blocking-call pool (see ACTION_POOLS)
+            timeouts: Seconds an action may run, per pool (see DEFAULT_TIMEOUTS)
+            default_timeout: Seconds for actions outside the pools (speech, skills)
+            plan_timeout: Seconds a plan may take if it sets no timeout of its
+                own (None: no limit)
+            result_cache_size: Results of OBSERVE actions kept for reuse (0 disables)
         """
         self.security = security
         self.context = context
+        self.max_concurrency = max(1, max_concurrency)
+        
+        sizes = {**DEFAULT_POOL_SIZES, **(pool_sizes or {})}
+        self.pools: Dict[str, ThreadPoolExecutor] = {
+            name: ThreadPoolExecutor(max_workers=max(1, size), thread_name_prefix=f"sara-{name}")
+            for name, size in sizes.items()
+        }
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.default_timeout = default_timeout
+        self.plan_timeout = plan_timeout
+        
+        # Results of OBSERVE actions, and the computations still running
+        self.results = TTLCache(max_size=result_cache_size)
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._in_flight_lock = threading.Lock()
+        self.coalesced = 0
+        
+        # Plans executing right now, on whichever thread's event loop
+        self._runs: List[_PlanRun] = []
+        self._runs_lock = threading.Lock()
         logger.info("Executor initialized")
     
+    @classmethod
+    def from_config(cls, security: SecurityManager, context: ContextManager, config: Dict[str, Any]) -> "Executor":
+        """
+        Build an executor from the config's executor section.
+        
+        Args:
+            security: Security manager for permission checks and auditing
+            context: Context manager for session state
+            config: The executor section (see config.example.json); missing
+                keys keep their defaults
+        
+        Returns:
+            Executor
+        """
+        options = {key: config[key] for key in _CONFIG_OPTIONS if key in config}
+        return cls(security, context, **options)
+    
+    def shutdown(self):
+        """Stop the worker pools, dropping queued blocking calls."""
+        for pool in self.pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get action result cache statistics.
+        
+        Returns:
+            Dictionary of cache size, hits, misses, hit rate, requests
+            coalesced into a running computation and computations in flight
+        """
+        with self._in_flight_lock:
+            in_flight = len(self._in_flight)
+        return {**self.results.stats(), 'coalesced': self.coalesced, 'in_flight': in_flight}
+    
+    def cancel(self, exclude: Optional[_PlanRun] = None) -> int:
+        """
+        Cancel every action still pending or running.
+        
+        Safe to call from any thread. Handlers are cancelled at their next
+        await; a blocking call already running in a worker thread cannot be
+        interrupted, so its result is discarded when it returns.
+        
+        Args:
+            exclude: Plan run to leave alone (the one asking to cancel)
+        
+        Returns:
+            Number of actions cancelled
+        """
+        with self._runs_lock:
+            runs = [run for run in self._runs if run is not exclude]
+        
+        count = 0
+        for run in runs:
+            run.cancelled = True
+            for task in run.tasks:
+                if not task.done():
+                    run.loop.call_soon_threadsafe(task.cancel)
+                    count += 1
+        if count:
+            logger.info(f"Cancelling {count} actions")
+        return count
+    
     async def execute(self, plan: Plan) -> ExecutionResult:
         """
         Execute a plan.
         
+        Actions run as soon as the actions they depend on have succeeded, up
+        to max_concurrency at a time, so a plan takes as long as its critical
+        path. A failed action skips everything that depends on it, while
+        independent actions carry on. Results are reported in action order.
+        
+        A plan with actions the policy wants confirmed is refused unless it
+        is marked confirmed, so no front end can run them unasked.
+        
+        Each action is bounded by its own timeout (or its pool's) and by
+        what is left of the plan's timeout (or the executor's plan_timeout);
+        an action that runs out of time is reported as timed out rather
+        than failed.
+        
         Args:
             plan: The plan to execute
             
@@ -53,43 +235,64 @@ class Executor:
         """
         logger.info(f"Executing plan: {plan.description}")
         
-        try:
-            # Execute all actions in the plan
-            for action in plan.actions:
-                # Check permissions
-                if not self.security.check_permission(
-                    action.description,
-                    action.permission_level
-                ):
-                    error_msg = f"Permission denied for: {action.description}"
-                    logger.error(error_msg)
+        if not plan.confirmed:
+            unconfirmed = [
+                action for action in plan.actions
+                if self.security.decide(action.permission_level, action.action_type, action.parameters).effect == Effect.CONFIRM
+            ]
+            if unconfirmed:
+                for action in unconfirmed:
                     self.security.log_action(
                         action.description,
                         action.permission_level,
-                        approved= False,
-                        result="Permission denied"
+                        approved=False,
+                        result="Not confirmed"
                     )
-                    return ExecutionResult(success=False, error=error_msg)
-                
-                # Execute the action
-                result = await self._execute_action(action)
-                
-                # Log to audit trail
-                self.security.log_action(
-                    action.description,
-                    action.permission_level,
-                    approved=True,
-                    result="Success" if result.success else result.error
+                error_msg = f"Confirmation needed to {plan.description}"
+                logger.warning(error_msg)
+                return ExecutionResult(success=False, error=error_msg, data={'needs_confirmation': True})
+        
+        try:
+            deadline = None
+            timeout = plan.timeout if plan.timeout is not None else self.plan_timeout
+            if timeout is not None:
+                deadline = asyncio.get_running_loop().time() + timeout
+            outcomes = await self._execute_graph(plan.actions, plan.dependencies(), deadline)
+            
+            results = [result for result in outcomes if result is not None]
+            failures = [result for result in results if not result.success]
+            messages = [result.message for result in results if result.success and result.message]
+            skipped = len(outcomes) - len(results)
+            if skipped:
+                logger.info(f"Skipped {skipped} actions after a failed dependency")
+            timed_out = any(result.timed_out for result in failures)
+            cancelled = any(result.cancelled for result in failures)
+            
+            # Per-action timings in action order, None for skipped actions
+            data = {'timings': [
+                {key: result.data[key] for key in ('queue_wait_ms', 'run_ms') if key in result.data}
+                if result is not None else None
+                for result in outcomes
+            ]}
+            
+            if len(failures) == 1 and not messages:
+                return failures[0].model_copy(update={'data': {**failures[0].data, **data}})
+            if failures:
+                # Report what failed alongside what the independent actions achieved
+                return ExecutionResult(
+                    success=False,
+                    message=" ".join(messages) or None,
+                    error="; ".join(f.error or f.message or "Action failed" for f in failures),
+                    timed_out=timed_out,
+                    cancelled=cancelled,
+                    data=data
                 )
-                
-                # If any action fails, stop execution
-                if not result.success:
-                    return result
             
             # All actions succeeded
             return ExecutionResult(
                 success=True,
-                message=plan.success_message or "Successfully completed"
+                message=plan.success_message or " ".join(messages) or "Successfully completed",
+                data=data
             )
             
         except Exception as e:
@@ -97,18 +300,266 @@ class Executor:
             logger.error(error_msg, exc_info=True)
             return ExecutionResult(success=False, error=error_msg)
     
+    async def _execute_graph(
+        self,
+        actions: List[Action],
+        dependencies: List[List[int]],
+        deadline: Optional[float] = None
+    ) -> List[Optional[ExecutionResult]]:
+        """
+        Run actions concurrently in dependency order.
+        
+        Args:
+            actions: Actions to execute
+            dependencies: Indices each action waits for (from Plan.dependencies)
+            deadline: Event loop time by which every action must finish
+        
+        Returns:
+            Result per action, in action order; None for skipped actions
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        plan_run = _PlanRun(asyncio.get_running_loop())
+        tasks = plan_run.tasks
+        
+        async def run(index: int) -> Optional[ExecutionResult]:
+            try:
+                if dependencies[index]:
+                    prerequisites = await asyncio.gather(*(tasks[d] for d in dependencies[index]))
+                    if any(result is None or not result.success for result in prerequisites):
+                        return None
+                async with semaphore:
+                    return await self._run_action(actions[index], deadline)
+            except asyncio.CancelledError:
+                if not plan_run.cancelled:
+                    raise
+                return ExecutionResult(success=False, cancelled=True, error="Cancelled")
+        
+        # Every task exists before any of them runs, so lookups always succeed.
+        # Tasks copy the current context, so handlers can see their own run.
+        token = _current_run.set(plan_run)
+        try:
+            tasks.extend(asyncio.ensure_future(run(index)) for index in range(len(actions)))
+        finally:
+            _current_run.reset(token)
+        
+        with self._runs_lock:
+            self._runs.append(plan_run)
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            with self._runs_lock:
+                self._runs.remove(plan_run)
+            for task in tasks:
+                task.cancel()
+    
+    def _timeout_for(self, action: Action, deadline: Optional[float]) -> float:
+        """
+        Seconds an action may run.
+        
+        Args:
+            action: Action about to run
+            deadline: Event loop time the plan must finish by, if any
+        
+        Returns:
+            The action's own timeout (or its pool's), cut short by the deadline
+        """
+        timeout = action.timeout
+        if timeout is None:
+            pool = ACTION_POOLS.get(action.action_type)
+            timeout = self.timeouts.get(pool, self.default_timeout) if pool else self.default_timeout
+        if deadline is not None:
+            timeout = min(timeout, deadline - asyncio.get_running_loop().time())
+        return timeout
+    
+    async def _run_action(self, action: Action, deadline: Optional[float] = None) -> ExecutionResult:
+        """
+        Check permission for, execute and audit one action.
+        
+        Args:
+            action: Action to execute
+            deadline: Event loop time the plan must finish by, if any
+        
+        Returns:
+            ExecutionResult
+        """
+        if not self.security.check_permission(
+            action.description,
+            action.permission_level,
+            action.action_type,
+            action.parameters
+        ):
+            error_msg = f"Permission denied for: {action.description}"
+            logger.error(error_msg)
+            self.security.log_action(
+                action.description,
+                action.permission_level,
+                approved= False,
+                result="Permission denied"
+            )
+            return ExecutionResult(success=False, error=error_msg)
+        
+        # Execute the action within its time budget
+        timeout = self._timeout_for(action, deadline)
+        try:
+            if timeout <= 0:
+                raise asyncio.TimeoutError
+            result = await asyncio.wait_for(self._execute_action(action), timeout)
+        except asyncio.TimeoutError:
+            error_msg = f"{action.description or action.action_type.value} timed out after {max(timeout, 0):.1f}s"
+            logger.error(error_msg)
+            result = ExecutionResult(success=False, timed_out=True, error=error_msg)
+        except asyncio.CancelledError:
+            self.security.log_action(
+                action.description,
+                action.permission_level,
+                approved=True,
+                result="Cancelled"
+            )
+            raise
+        
+        # Log to audit trail
+        self.security.log_action(
+            action.description,
+            action.permission_level,
+            approved=True,
+            result="Success" if result.success else result.error
+        )
+        return result
+    
     async def _execute_action(self, action: Action) -> ExecutionResult:
         """
-        Execute a single action.
+        Execute a single action, recording how long it waited and ran.
         
         Args:
             action: The action to execute
             
         Returns:
-            ExecutionResult
+            ExecutionResult, with queue_wait_ms and run_ms in its data
         """
         logger.info(f"Executing action: {action.action_type}")
         
+        queue_wait = [0.0]
+        token = _queue_wait.set(queue_wait)
+        started = time.perf_counter()
+        try:
+            result = await self._dispatch_cached(action)
+        finally:
+            _queue_wait.reset(token)
+        elapsed = time.perf_counter() - started
+        
+        result.data = {
+            **result.data,
+            'queue_wait_ms': round(queue_wait[0] * 1000, 3),
+            'run_ms': round((elapsed - queue_wait[0]) * 1000, 3),
+        }
+        return result
+    
+    async def _run_blocking(self, action: Action, func: Callable, *args: Any) -> Any:
+        """
+        Run a blocking automation call in the action type's worker pool.
+        
+        The event loop stays free for wake-word listening and other
+        commands while the call runs.
+        
+        Args:
+            action: Action the call belongs to
+            func: Blocking callable
+            *args: Arguments for func
+        
+        Returns:
+            What func returned
+        """
+        pool = self.pools[ACTION_POOLS.get(action.action_type, 'system')]
+        queue_wait = _queue_wait.get(None)
+        submitted = time.perf_counter()
+        
+        def call():
+            if queue_wait is not None:
+                queue_wait[0] += time.perf_counter() - submitted
+            return func(*args)
+        
+        return await asyncio.get_running_loop().run_in_executor(pool, call)
+    
+    def _result_key(self, action: Action) -> Optional[Hashable]:
+        """
+        Cache key for an action's result.
+        
+        Args:
+            action: The action to execute
+        
+        Returns:
+            Key, or None if the action's result must not be reused
+        """
+        if (
+            action.permission_level != PermissionLevel.OBSERVE
+            or not action.cache_ttl
+            or self.results.max_size <= 0
+        ):
+            return None
+        return action.action_type, json.dumps(action.parameters, sort_keys=True, default=str)
+    
+    async def _dispatch_cached(self, action: Action) -> ExecutionResult:
+        """
+        Route an action to its handler, reusing results of OBSERVE actions.
+        
+        An OBSERVE action with a cache_ttl reuses a successful result of an
+        identical action (same type and parameters) until the TTL runs out.
+        Identical actions arriving while one is computing wait for its
+        result instead of computing their own, from any thread.
+        
+        Args:
+            action: The action to execute
+        
+        Returns:
+            ExecutionResult; reused results have 'cached' set in their data
+        """
+        key = self._result_key(action)
+        if key is None:
+            return await self._dispatch(action)
+        
+        cached = self.results.get(key)
+        if cached is not None:
+            return cached.model_copy(update={'data': {**cached.data, 'cached': True}})
+        
+        with self._in_flight_lock:
+            pending = self._in_flight.get(key)
+            leader = pending is None
+            if leader:
+                pending = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        
+        if not leader:
+            # Shielded, so cancelling this action leaves the computation alone
+            shared = await asyncio.shield(asyncio.wrap_future(pending))
+            if shared is not None:
+                return shared.model_copy(update={'data': {**shared.data, 'cached': True}})
+            # The computation failed or was abandoned; try on our own
+            return await self._dispatch(action)
+        
+        shared = None
+        try:
+            result = await self._dispatch(action)
+            if result.success:
+                # A copy, since the caller adds its own timings to the result
+                shared = result.model_copy()
+                self.results.put(key, shared, ttl=action.cache_ttl)
+            return result
+        finally:
+            with self._in_flight_lock:
+                del self._in_flight[key]
+            pending.set_result(shared)
+    
+    async def _dispatch(self, action: Action) -> ExecutionResult:
+        """
+        Route an action to its handler.
+        
+        Args:
+            action: The action to execute
+        
+        Returns:
+            ExecutionResult
+        """
         try:
             # Route to appropriate handler
             if action.action_type == ActionType.SYSTEM_INFO:
@@ -131,6 +582,12 @@ class Executor:
                 return await self._handle_lock(action)
             elif action.action_type == ActionType.SPEAK:
                 return await self._handle_speak(action)
+            elif action.action_type == ActionType.CANCEL:
+                return await self._handle_cancel(action)
+            elif action.action_type == ActionType.SKILL:
+                return await self._handle_skill(action)
+            elif action.action_type == ActionType.PLUGIN:
+                return await self._handle_plugin(action)
             else:
                 return ExecutionResult(
                     success=False,
@@ -144,25 +601,28 @@ class Executor:
     async def _handle_system_info(self, action: Action) -> ExecutionResult:
         """Handle system information requests."""
         info_type = action.parameters.get('info_type', 'system')
-        message = system.get_system_info(info_type)
+        window = action.parameters.get('window', 60)
+        message = await self._run_blocking(action, system.get_system_info, info_type, window)
         return ExecutionResult(success=True, message=message)
     
     async def _handle_volume(self, action: Action) -> ExecutionResult:
         """Handle volume control."""
         volume_action = action.parameters.get('action', 'increase')
-        result = system.control_volume(volume_action)
+        result = await self._run_blocking(action, system.control_volume, volume_action)
         return ExecutionResult(success=result, message=f"Volume {volume_action}d")
     
     async def _handle_brightness(self, action: Action) -> ExecutionResult:
         """Handle brightness control."""
         brightness_action = action.parameters.get('action', 'increase')
-        result = system.control_brightness(brightness_action)
+        result = await self._run_blocking(action, system.control_brightness, brightness_action)
         return ExecutionResult(success=result, message=f"Brightness {brightness_action}d")
     
     async def _handle_app_open(self, action: Action) -> ExecutionResult:
         """Handle opening an application."""
         app_name = action.parameters.get('app_name', '')
-        result = app_controller.open_app(app_name)
+        result = await self._run_blocking(
+            action, app_controller.open_app, app_name, action.parameters.get('command')
+        )
         if result:
             return ExecutionResult(success=True, message=f"Opened {app_name}")
         else:
@@ -171,7 +631,9 @@ class Executor:
     async def _handle_app_close(self, action: Action) -> ExecutionResult:
         """Handle closing an application."""
         app_name = action.parameters.get('app_name', '')
-        result = app_controller.close_app(app_name)
+        result = await self._run_blocking(
+            action, app_controller.close_app, app_name, action.parameters.get('process_name')
+        )
         if result:
             return ExecutionResult(success=True, message=f"Closed {app_name}")
         else:
@@ -180,7 +642,7 @@ class Executor:
     async def _handle_folder_create(self, action: Action) -> ExecutionResult:
         """Handle folder creation."""
         folder_name = action.parameters.get('folder_name', '')
-        result = file_ops.create_folder(folder_name)
+        result = await self._run_blocking(action, file_ops.create_folder, folder_name)
         if result:
             return ExecutionResult(success=True, message=f"Created folder: {folder_name}")
         else:
@@ -189,7 +651,7 @@ class Executor:
     async def _handle_web_search(self, action: Action) -> ExecutionResult:
         """Handle web search."""
         query = action.parameters.get('query', '')
-        result = system.web_search(query)
+        result = await self._run_blocking(action, system.web_search, query)
         if result:
             return ExecutionResult(success=True, message=f"Searching for: {query}")
         else:
@@ -197,12 +659,12 @@ class Executor:
     
     async def _handle_shutdown(self, action: Action) -> ExecutionResult:
         """Handle system shutdown."""
-        system.shutdown()
+        await self._run_blocking(action, system.shutdown)
         return ExecutionResult(success=True, message="Shutting down")
     
     async def _handle_lock(self, action: Action) -> ExecutionResult:
         """Handle screen lock."""
-        system.lock_screen()
+        await self._run_blocking(action, system.lock_screen)
         return ExecutionResult(success=True, message="Screen locked")
     
     async def _handle_speak(self, action: Action) -> ExecutionResult:
@@ -210,3 +672,33 @@ class Executor:
         text = action.parameters.get('text', '')
         # This will be spoken by the voice engine in the main loop
         return ExecutionResult(success=True, message=text)
+    
+    async def _handle_cancel(self, action: Action) -> ExecutionResult:
+        """Handle cancelling everything else that is running."""
+        count = self.cancel(exclude=_current_run.get(None))
+        if not count:
+            return ExecutionResult(success=True, message="Nothing to cancel")
+        return ExecutionResult(success=True, message=f"Cancelled {count} {'action' if count == 1 else 'actions'}")
+    
+    async def _handle_skill(self, action: Action) -> ExecutionResult:
+        """Handle running a registered skill."""
+        skill = action.parameters['skill']
+        result = await skill.execute(**action.parameters.get('arguments', {}))
+        return ExecutionResult(
+            success=result.success,
+            message=result.message,
+            error=result.error,
+            data=result.data
+        )
+    
+    async def _handle_plugin(self, action: Action) -> ExecutionResult:
+        """Handle running a registered plugin."""
+        plugin = action.parameters['plugin']
+        arguments = action.parameters.get('arguments', {})
+        result = await self._run_blocking(action, lambda: plugin.execute(**arguments))
+        return ExecutionResult(
+            success=bool(result.get('success')),
+            message=result.get('message'),
+            error=result.get('error'),
+            data=result.get('data') or {}
+        )
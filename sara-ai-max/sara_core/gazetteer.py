@@ -0,0 +1,452 @@
+"""
+Gazetteer - Known application names and aliases for entity resolution.
+
+This module resolves spoken application names to canonical applications
+using a prefix trie, with bounded edit-distance lookup for misheard names.
+"""
+
+import logging
+import os
+import platform
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+# Alias -> search term table carried over from v3 AppLauncher.load_app_mappings
+DEFAULT_APP_ALIASES: Dict[str, str] = {
+    # Browsers
+    "browser": "chrome",
+    "chrome": "chrome",
+    "firefox": "firefox",
+    "edge": "microsoft edge",
+    "internet explorer": "iexplore",
+    
+    # Text Editors
+    "notepad": "notepad",
+    "text editor": "notepad",
+    "editor": "notepad",
+    "vs code": "visual studio code",
+    "vscode": "visual studio code",
+    "visual studio": "visual studio",
+    "atom": "atom",
+    "sublime": "sublime text",
+    
+    # Media Players
+    "media player": "windows media player",
+    "vlc": "vlc",
+    "music": "groove music",
+    "music player": "groove music",
+    "spotify": "spotify",
+    "youtube music": "youtube music",
+    
+    # Office Applications
+    "word": "microsoft word",
+    "excel": "microsoft excel",
+    "powerpoint": "microsoft powerpoint",
+    "outlook": "microsoft outlook",
+    "office": "microsoft office",
+    
+    # System Tools
+    "calculator": "calculator",
+    "calc": "calculator",
+    "paint": "paint",
+    "terminal": "windows terminal",
+    "cmd": "command prompt",
+    "powershell": "powershell",
+    "task manager": "task manager",
+    "control panel": "control panel",
+    "settings": "settings",
+    
+    # File Management
+    "file explorer": "file explorer",
+    "explorer": "file explorer",
+    "files": "file explorer",
+    
+    # Communication
+    "teams": "microsoft teams",
+    "skype": "skype",
+    "discord": "discord",
+    "zoom": "zoom",
+    
+    # Development Tools
+    "git": "git bash",
+    "github": "github desktop",
+    "docker": "docker desktop",
+    "postman": "postman",
+    
+    # Graphics
+    "photoshop": "adobe photoshop",
+    "illustrator": "adobe illustrator",
+    "gimp": "gimp",
+    
+    # Games
+    "steam": "steam",
+    "epic games": "epic games launcher",
+    "xbox": "xbox",
+}
+
+
+class AppEntry(BaseModel):
+    """A known application."""
+    
+    name: str                       # Canonical name, also the start-menu search term
+    command: Optional[str] = None   # Direct launch command, if known
+    source: str = "builtin"
+
+
+class _TrieNode:
+    """A node in the alias trie."""
+    
+    __slots__ = ('children', 'entry', 'longest')
+    
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        self.entry: Optional[AppEntry] = None
+        self.longest = 0  # Length of the longest alias in this subtree
+
+
+def normalize_name(name: str) -> str:
+    """
+    Normalize an application name for lookup.
+    
+    Args:
+        name: Raw application name
+    
+    Returns:
+        Lowercased name with punctuation collapsed to single spaces
+    """
+    return ' '.join(re.sub(r"[^a-z0-9]+", ' ', name.lower()).split())
+
+
+class AppGazetteer:
+    """Prefix trie of application names and aliases."""
+    
+    def __init__(self):
+        """Initialize an empty gazetteer."""
+        self.root = _TrieNode()
+        self.entries: Dict[str, AppEntry] = {}
+        self.alias_count = 0
+    
+    @classmethod
+    def from_aliases(cls, aliases: Dict[str, str]) -> "AppGazetteer":
+        """
+        Build a gazetteer from an alias -> search term table.
+        
+        Args:
+            aliases: Mapping of spoken alias to canonical search term
+        
+        Returns:
+            Populated gazetteer
+        """
+        gazetteer = cls()
+        for alias, search_term in aliases.items():
+            entry = gazetteer.entries.get(search_term) or AppEntry(name=search_term)
+            gazetteer.add(alias, entry)
+            gazetteer.add(search_term, entry)
+        return gazetteer
+    
+    @classmethod
+    def default(cls) -> "AppGazetteer":
+        """
+        Build the gazetteer from the builtin aliases and installed apps.
+        
+        Returns:
+            Populated gazetteer
+        """
+        gazetteer = cls.from_aliases(DEFAULT_APP_ALIASES)
+        
+        if platform.system() == 'Linux':
+            gazetteer.add_desktop_entries(desktop_entry_dirs())
+        
+        logger.info(
+            f"App gazetteer built: {len(gazetteer.entries)} apps, "
+            f"{gazetteer.alias_count} aliases"
+        )
+        return gazetteer
+    
+    def add(self, alias: str, entry: AppEntry):
+        """
+        Register an alias for an application.
+        
+        An existing alias is only replaced by an entry that can be launched
+        directly, so installed applications win over bare search terms.
+        
+        Args:
+            alias: Spoken name or alias
+            entry: Application the alias refers to
+        """
+        key = normalize_name(alias)
+        if not key:
+            return
+        
+        node = self.root
+        node.longest = max(node.longest, len(key))
+        for char in key:
+            node = node.children.setdefault(char, _TrieNode())
+            node.longest = max(node.longest, len(key))
+        
+        if node.entry is None:
+            self.alias_count += 1
+        elif node.entry.command and not entry.command:
+            return
+        
+        node.entry = entry
+        self.entries[entry.name] = entry
+    
+    def add_desktop_entries(self, directories: Iterable[Path]):
+        """
+        Register applications from freedesktop ``.desktop`` files.
+        
+        Builtin entries whose name appears in an installed application's name
+        pick up its launch command as well.
+        
+        Args:
+            directories: Directories to scan for ``.desktop`` files
+        """
+        installed = []
+        for directory in directories:
+            if not directory.is_dir():
+                continue
+            for path in sorted(directory.glob("*.desktop")):
+                entry = parse_desktop_entry(path)
+                if entry:
+                    installed.append((path.stem, entry))
+        
+        builtin = [entry for entry in self.entries.values() if not entry.command]
+        
+        for stem, entry in installed:
+            self.add(entry.name, entry)
+            self.add(stem.split('.')[-1], entry)  # org.gnome.Calculator -> calculator
+            executable = os.path.basename(entry.command.split()[0])
+            self.add(executable, entry)
+            
+            # Let builtin search terms ("chrome") launch installed apps ("google chrome")
+            name_words = f" {normalize_name(entry.name)} "
+            for known in builtin:
+                if f" {normalize_name(known.name)} " in name_words:
+                    known.command = entry.command
+        
+        logger.debug(f"Loaded {len(installed)} desktop entries")
+    
+    def lookup(self, name: str) -> Optional[AppEntry]:
+        """
+        Look up an exact name or alias.
+        
+        Args:
+            name: Application name
+        
+        Returns:
+            Matching application or None
+        """
+        node = self.root
+        for char in normalize_name(name):
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node.entry
+    
+    def longest_prefix(self, text: str) -> Optional[Tuple[AppEntry, str]]:
+        """
+        Find the longest known name at the start of a text.
+        
+        Only matches ending on a word boundary count, so "word" does not
+        match "wordpad". Runs in time linear in the text length.
+        
+        Args:
+            text: Captured text, e.g. "visual studio code please"
+        
+        Returns:
+            (application, matched text) tuple or None
+        """
+        key = normalize_name(text)
+        node = self.root
+        best = None
+        for position, char in enumerate(key):
+            node = node.children.get(char)
+            if node is None:
+                break
+            at_boundary = position + 1 == len(key) or key[position + 1] == ' '
+            if node.entry is not None and at_boundary:
+                best = (node.entry, key[:position + 1])
+        return best
+    
+    def fuzzy_lookup(self, name: str, max_distance: int = 1) -> Optional[Tuple[AppEntry, int]]:
+        """
+        Find the closest alias within an edit distance.
+        
+        Walks the trie computing one Levenshtein row per node and prunes any
+        branch whose best cell already exceeds the bound. Only the diagonal
+        band of each row within the bound is computed, and subtrees whose
+        aliases are all too short to be within the bound are skipped.
+        
+        Args:
+            name: Possibly misrecognized application name
+            max_distance: Maximum number of edits
+        
+        Returns:
+            (application, distance) tuple for the closest alias, or None
+        """
+        key = normalize_name(name)
+        if not key:
+            return None
+        
+        best: List = [None, max_distance + 1]
+        size = len(key)
+        limit = max_distance + 1
+        shortest = size - max_distance
+        first_row = [column if column < limit else limit for column in range(size + 1)]
+        
+        def visit(node: _TrieNode, char: str, previous_row: List[int], depth: int):
+            row = [limit] * (size + 1)
+            row[0] = depth if depth < limit else limit
+            low = max(1, depth - max_distance)
+            high = min(size, depth + max_distance)
+            for column in range(low, high + 1):
+                cost = previous_row[column - 1] + (key[column - 1] != char)
+                if row[column - 1] + 1 < cost:
+                    cost = row[column - 1] + 1
+                if previous_row[column] + 1 < cost:
+                    cost = previous_row[column] + 1
+                row[column] = cost if cost < limit else limit
+            
+            if node.entry is not None and row[-1] < best[1]:
+                best[0], best[1] = node.entry, row[-1]
+            
+            if min(row[low - 1:high + 1]) < best[1]:
+                for next_char, child in node.children.items():
+                    if child.longest >= shortest:
+                        visit(child, next_char, row, depth + 1)
+        
+        for char, child in self.root.children.items():
+            if child.longest >= shortest:
+                visit(child, char, first_row, 1)
+        
+        if best[0] is None:
+            return None
+        return best[0], best[1]
+    
+    def resolve(self, text: str) -> Optional[AppEntry]:
+        """
+        Resolve a captured application span to a known application.
+        
+        Tries the longest exact prefix first, then a bounded edit-distance
+        lookup on the whole span and on its first word.
+        
+        Args:
+            text: Captured application span
+        
+        Returns:
+            Matching application or None
+        """
+        found = self.longest_prefix(text)
+        if found:
+            return found[0]
+        
+        key = normalize_name(text)
+        candidates = [key]
+        if ' ' in key:
+            candidates.append(key.split(' ', 1)[0])
+        
+        for candidate in candidates:
+            # Very short names are too easy to confuse with each other
+            max_distance = 0 if len(candidate) <= 3 else 1 if len(candidate) <= 6 else 2
+            if max_distance == 0:
+                continue
+            found = self.fuzzy_lookup(candidate, max_distance)
+            if found:
+                return found[0]
+        
+        return None
+    
+    def complete(self, prefix: str, limit: int = 2) -> List[AppEntry]:
+        """
+        List applications with an alias starting with a prefix.
+        
+        Args:
+            prefix: Partial application name
+            limit: Stop after this many distinct applications
+        
+        Returns:
+            Up to ``limit`` distinct applications
+        """
+        node = self.root
+        for char in normalize_name(prefix):
+            node = node.children.get(char)
+            if node is None:
+                return []
+        
+        found: Dict[str, AppEntry] = {}
+        stack = [node]
+        while stack and len(found) < limit:
+            current = stack.pop()
+            if current.entry is not None:
+                found.setdefault(current.entry.name, current.entry)
+            stack.extend(current.children.values())
+        return list(found.values())
+
+
+def desktop_entry_dirs() -> List[Path]:
+    """
+    Get the freedesktop application directories for this user.
+    
+    Returns:
+        Candidate directories, user entries first
+    """
+    data_home = os.environ.get('XDG_DATA_HOME') or str(Path.home() / ".local" / "share")
+    data_dirs = os.environ.get('XDG_DATA_DIRS') or "/usr/local/share:/usr/share"
+    
+    directories = [Path(data_home) / "applications"]
+    directories += [Path(d) / "applications" for d in data_dirs.split(':') if d]
+    directories.append(Path("/var/lib/flatpak/exports/share/applications"))
+    return directories
+
+
+def parse_desktop_entry(path: Path) -> Optional[AppEntry]:
+    """
+    Parse a freedesktop ``.desktop`` file.
+    
+    Args:
+        path: Path to the file
+    
+    Returns:
+        Application entry, or None for hidden or non-application entries
+    """
+    fields: Dict[str, str] = {}
+    try:
+        in_entry = False
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                line = line.strip()
+                if line.startswith('['):
+                    in_entry = line == '[Desktop Entry]'
+                elif in_entry and '=' in line and not line.startswith('#'):
+                    key, value = line.split('=', 1)
+                    fields.setdefault(key.strip(), value.strip())
+    except OSError as e:
+        logger.debug(f"Could not read desktop entry {path}: {e}")
+        return None
+    
+    if fields.get('Type') != 'Application' or not fields.get('Name') or not fields.get('Exec'):
+        return None
+    if fields.get('NoDisplay') == 'true' or fields.get('Hidden') == 'true':
+        return None
+    
+    # Drop field codes such as %U and %f; %% is a literal percent sign
+    command = re.sub(r"%[a-zA-Z]", '', fields['Exec']).replace('%%', '%').strip()
+    return AppEntry(name=fields['Name'].lower(), command=command, source=str(path))
+
+
+@lru_cache(maxsize=1)
+def default_gazetteer() -> AppGazetteer:
+    """
+    Get the process-wide default gazetteer, building it on first use.
+    
+    Returns:
+        Shared gazetteer
+    """
+    return AppGazetteer.default()
@@ -0,0 +1,329 @@
+"""
+Intent Classifier - Offline fallback for commands no pattern matches.
+
+Commands are turned into character n-gram TF-IDF vectors and scored against
+every training example with a single matrix-vector product; an intent scores
+as well as its closest example. The model is
+trained from the intent patterns plus a small set of curated examples and
+shipped precomputed as a ``.npz`` file, so startup only has to load it.
+
+Usage:
+    python -m sara_core.intent_classifier   # Retrain and rewrite the model
+"""
+
+import hashlib
+import json
+import logging
+import math
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available, intent classifier disabled. Install with: pip install numpy")
+
+DATA_DIR = Path(__file__).parent / "data"
+DEFAULT_MODEL_PATH = DATA_DIR / "intent_classifier.npz"
+DEFAULT_EXAMPLES_PATH = DATA_DIR / "intent_examples.json"
+
+NGRAM_SIZES = (2, 3, 4)
+
+
+def char_ngrams(text: str) -> Dict[str, int]:
+    """
+    Count the character n-grams of a text.
+    
+    Args:
+        text: Normalized command text
+    
+    Returns:
+        Mapping of n-gram to count
+    """
+    padded = f" {' '.join(text.split())} "
+    counts: Dict[str, int] = {}
+    for size in NGRAM_SIZES:
+        for start in range(len(padded) - size + 1):
+            gram = padded[start:start + size]
+            counts[gram] = counts.get(gram, 0) + 1
+    return counts
+
+
+def training_fingerprint(patterns: Dict[str, List[str]], examples: Dict[str, List[str]]) -> str:
+    """
+    Fingerprint the data a model was trained from.
+    
+    Args:
+        patterns: Intent name -> regex patterns
+        examples: Intent name -> curated example commands
+    
+    Returns:
+        Short hex digest
+    """
+    payload = json.dumps([patterns, examples], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class IntentClassifier:
+    """Nearest-example TF-IDF intent classifier."""
+    
+    def __init__(
+        self,
+        vocabulary: Sequence[str],
+        idf: "np.ndarray",
+        examples: "np.ndarray",
+        example_labels: "np.ndarray",
+        labels: Sequence[str],
+        fingerprint: str = ""
+    ):
+        """
+        Initialize classifier from trained parameters.
+        
+        Args:
+            vocabulary: N-gram for each feature column
+            idf: Inverse document frequency per feature
+            examples: L2-normalized example vectors (examples x features),
+                grouped by label
+            example_labels: Label index of each example row
+            labels: Intent name for each label index
+            fingerprint: Fingerprint of the training data
+        """
+        self.vocabulary = {gram: column for column, gram in enumerate(vocabulary)}
+        self.idf = idf
+        self.examples = examples
+        # Feature-major copy: a query gathers a few contiguous rows from it
+        self._features = np.ascontiguousarray(examples.T)
+        self.example_labels = example_labels
+        self.labels = list(labels)
+        self.fingerprint = fingerprint
+        
+        # First row of each label's group, for per-intent maxima
+        self._label_starts = np.searchsorted(example_labels, np.arange(len(self.labels)))
+    
+    def vectorize(self, text: str) -> Tuple["np.ndarray", "np.ndarray"]:
+        """
+        Turn a command into a sparse, L2-normalized TF-IDF vector.
+        
+        Args:
+            text: Normalized command text
+        
+        Returns:
+            (feature columns, weights) arrays; empty if no n-gram is known
+        """
+        columns = []
+        counts = []
+        for gram, count in char_ngrams(text).items():
+            column = self.vocabulary.get(gram)
+            if column is not None:
+                columns.append(column)
+                counts.append(count)
+        
+        columns = np.array(columns, dtype=np.int64)
+        weights = (1.0 + np.log(np.array(counts, dtype=np.float32))) * self.idf[columns]
+        norm = float(np.linalg.norm(weights)) if len(weights) else 0.0
+        if norm:
+            weights /= norm
+        return columns, weights
+    
+    def scores(self, text: str) -> "np.ndarray":
+        """
+        Score a command against every intent.
+        
+        Args:
+            text: Normalized command text
+        
+        Returns:
+            Best cosine similarity to any example of each intent, by label index
+        """
+        columns, weights = self.vectorize(text)
+        if not len(columns):
+            return np.zeros(len(self.labels), dtype=np.float32)
+        
+        similarities = weights @ self._features[columns]
+        return np.maximum.reduceat(similarities, self._label_starts)
+    
+    def predict(self, text: str) -> Tuple[Optional[str], float, float]:
+        """
+        Classify a command.
+        
+        Args:
+            text: Normalized command text
+        
+        Returns:
+            (intent name, score, margin over the runner-up intent); the
+            intent is None if the text shares nothing with the training data
+        """
+        scores = self.scores(text)
+        if len(scores) < 2:
+            return (self.labels[0] if len(scores) else None), float(scores.max(initial=0.0)), 1.0
+        
+        runner_up, best = np.argpartition(scores, -2)[-2:]
+        if scores[best] <= 0.0:
+            return None, 0.0, 0.0
+        return self.labels[best], float(scores[best]), float(scores[best] - scores[runner_up])
+    
+    @classmethod
+    def train(
+        cls,
+        samples: Sequence[Tuple[str, str]],
+        fingerprint: str = ""
+    ) -> "IntentClassifier":
+        """
+        Train a classifier from labelled commands.
+        
+        Args:
+            samples: (command text, intent name) pairs
+            fingerprint: Fingerprint of the training data
+        
+        Returns:
+            Trained classifier
+        """
+        samples = sorted(set((text.lower(), label) for text, label in samples), key=lambda s: s[1])
+        grams = [char_ngrams(text) for text, _ in samples]
+        
+        vocabulary = sorted({gram for counts in grams for gram in counts})
+        columns = {gram: column for column, gram in enumerate(vocabulary)}
+        labels = sorted({label for _, label in samples})
+        label_index = {label: index for index, label in enumerate(labels)}
+        
+        document_frequency = np.zeros(len(vocabulary), dtype=np.float64)
+        for counts in grams:
+            document_frequency[[columns[gram] for gram in counts]] += 1
+        idf = np.log((1 + len(samples)) / (1 + document_frequency)) + 1.0
+        
+        examples = np.zeros((len(samples), len(vocabulary)), dtype=np.float32)
+        for row, counts in enumerate(grams):
+            index = [columns[gram] for gram in counts]
+            vector = np.array([1.0 + math.log(c) for c in counts.values()]) * idf[index]
+            examples[row, index] = vector / np.linalg.norm(vector)
+        
+        example_labels = np.array([label_index[label] for _, label in samples], dtype=np.int64)
+        return cls(vocabulary, idf.astype(np.float32), examples, example_labels, labels, fingerprint)
+    
+    def save(self, path: Path = DEFAULT_MODEL_PATH):
+        """
+        Save the model, storing the mostly-empty example matrix sparsely.
+        
+        Args:
+            path: Destination ``.npz`` file
+        """
+        rows, columns = np.nonzero(self.examples)
+        vocabulary = sorted(self.vocabulary, key=self.vocabulary.get)
+        np.savez_compressed(
+            path,
+            vocabulary=np.array(vocabulary),
+            idf=self.idf,
+            labels=np.array(self.labels),
+            example_labels=self.example_labels.astype(np.int16),
+            rows=rows.astype(np.int32),
+            columns=columns.astype(np.int32),
+            values=self.examples[rows, columns].astype(np.float16),
+            fingerprint=np.array(self.fingerprint),
+        )
+        logger.info(f"Saved intent classifier to {path}")
+    
+    @classmethod
+    def load(cls, path: Path = DEFAULT_MODEL_PATH) -> "IntentClassifier":
+        """
+        Load a model saved with save().
+        
+        Args:
+            path: ``.npz`` file
+        
+        Returns:
+            Classifier
+        """
+        with np.load(path) as data:
+            vocabulary = data['vocabulary'].tolist()
+            example_labels = data['example_labels'].astype(np.int64)
+            examples = np.zeros((len(example_labels), len(vocabulary)), dtype=np.float32)
+            examples[data['rows'], data['columns']] = data['values']
+            return cls(
+                vocabulary,
+                data['idf'],
+                examples,
+                example_labels,
+                data['labels'].tolist(),
+                str(data['fingerprint'])
+            )
+
+
+@lru_cache(maxsize=1)
+def load_default_classifier() -> Optional[IntentClassifier]:
+    """
+    Load the shipped classifier if NumPy and the model file are available.
+    
+    The model is loaded once per process and shared by every NLU engine.
+    
+    Returns:
+        Classifier or None
+    """
+    if not NUMPY_AVAILABLE or not DEFAULT_MODEL_PATH.exists():
+        return None
+    try:
+        return IntentClassifier.load(DEFAULT_MODEL_PATH)
+    except Exception as e:
+        logger.error(f"Error loading intent classifier: {e}")
+        return None
+
+
+def is_stale(classifier: IntentClassifier, patterns: Dict[str, List[str]]) -> bool:
+    """
+    Check whether a classifier was trained on different data.
+    
+    Args:
+        classifier: Loaded classifier
+        patterns: Current intent name -> regex patterns
+    
+    Returns:
+        True if the patterns or curated examples changed since training
+    """
+    try:
+        with open(DEFAULT_EXAMPLES_PATH, 'r') as f:
+            examples = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return classifier.fingerprint != training_fingerprint(patterns, examples)
+
+
+def train_default(per_pattern: int = 20) -> IntentClassifier:
+    """
+    Train the classifier from the NLU patterns and the curated examples.
+    
+    Args:
+        per_pattern: Generated samples per regex pattern
+    
+    Returns:
+        Trained classifier
+    """
+    from .corpus import generate_corpus
+    from .nlu import NLUEngine
+    
+    patterns = NLUEngine(cache_size=0).patterns
+    with open(DEFAULT_EXAMPLES_PATH, 'r') as f:
+        examples = json.load(f)
+    
+    samples = [(text, intent_type.value) for text, intent_type in generate_corpus(patterns, per_pattern)]
+    for intent_name, texts in examples.items():
+        samples += [(text, intent_name) for text in texts]
+    
+    fingerprint = training_fingerprint(
+        {intent_type.value: list(p) for intent_type, p in patterns.items()},
+        examples
+    )
+    return IntentClassifier.train(samples, fingerprint)
+
+
+def main():
+    """Retrain the shipped model."""
+    logging.basicConfig(level=logging.INFO)
+    train_default().save(DEFAULT_MODEL_PATH)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,14 +4,63 @@ Natural Language Understanding - Intent parsing and entity extraction.
 This module parses user commands into structured intents.
 """
 
+import json
 import logging
+import os
 import re
+import threading
 from enum import Enum
-from typing import Dict, List, Any, Optional
+from pathlib import Path
+from typing import Dict, List, Any, AsyncIterable, AsyncIterator, Iterable, Optional, Tuple
 from pydantic import BaseModel
 
+from .cache import TTLCache
+from .gazetteer import AppGazetteer, default_gazetteer
+from .intent_classifier import IntentClassifier, is_stale, load_default_classifier
+
 logger = logging.getLogger(__name__)
 
+# Intent pattern table, editable without touching code
+DEFAULT_INTENTS_PATH = Path(__file__).parent / "data" / "intents.json"
+INTENTS_FORMAT_VERSION = 1
+
+# NLU section keys and the NLUEngine arguments they set
+_CONFIG_OPTIONS = {
+    'cache_size': 'cache_size',
+    'cache_ttl': 'cache_ttl',
+    'classifier': 'use_classifier',
+    'classifier_threshold': 'classifier_threshold',
+    'classifier_margin': 'classifier_margin',
+    'patterns_path': 'patterns_path',
+    'watch_patterns': 'watch_patterns',
+}
+
+def _normalize(text: str) -> str:
+    """
+    Lowercase and trim an utterance for matching. Transcripts often end in a
+    full stop or exclamation mark ("Stop."), which the patterns do not expect;
+    question marks are kept, as some patterns use them.
+    """
+    return text.lower().strip().rstrip('.!').rstrip()
+
+
+# Separators between clauses of a compound command ("open chrome and then ...")
+_CLAUSE_SEPARATOR = re.compile(
+    r"(\s*,\s*(?:and then\s+|and\s+|then\s+)?|\s+(?:and then|and|then)\s+)",
+    re.IGNORECASE
+)
+
+# System resources a system-info request can ask about, and the words for them
+_SYSTEM_RESOURCES = {
+    'cpu': ('cpu', 'processor'),
+    'memory': ('memory', 'ram'),
+    'disk': ('disk', 'storage'),
+}
+
+# "over the last 10 minutes", "in the past hour"
+_TIME_WINDOW = re.compile(r"\b(?:last|past)\s+(?:(\d+|an?|one)\s+)?(second|minute|hour)s?\b")
+_WINDOW_UNITS = {'second': 1, 'minute': 60, 'hour': 3600}
+
 
 class IntentType(str, Enum):
     """Types of intents Sara can understand."""
@@ -44,10 +93,24 @@ class IntentType(str, Enum):
     JOKE = "joke"
     SEARCH_WEB = "search_web"
     
+    # Control of Sara herself
+    CANCEL = "cancel"
+    
     # Unknown
     UNKNOWN = "unknown"
 
 
+# Intents the fallback classifier may answer on its own: they need no
+# entities and are harmless if guessed wrong. Anything else stays UNKNOWN.
+CLASSIFIER_INTENTS = {
+    IntentType.TIME,
+    IntentType.DATE,
+    IntentType.JOKE,
+    IntentType.SYSTEM_INFO,
+    IntentType.WEATHER,
+}
+
+
 class Intent(BaseModel):
     """Structured representation of user intent."""
     
@@ -57,106 +120,409 @@ class Intent(BaseModel):
     raw_text: str
 
 
+# An inline flag group: (?i), (?x), (?i:...), (?-i:...)
+_INLINE_FLAGS = re.compile(r"\(\?(?:[aiLmsux]+(?:-[imsx]*)?|-[imsx]+)[:)]")
+
+
+def _required_literal(pattern: str) -> str:
+    """
+    Find the longest literal run that every match of a pattern must contain.
+    
+    Only top-level text is considered: anything inside a group, a character
+    class or under a quantifier is optional as far as the prefilter is
+    concerned. Patterns with a top-level alternation have no required literal,
+    and neither do patterns with inline flags such as (?i) or (?x), which
+    change what their text matches.
+    
+    Args:
+        pattern: Regular expression source
+    
+    Returns:
+        Required literal, or an empty string if none could be derived
+    """
+    if _INLINE_FLAGS.search(pattern):
+        return ''
+    
+    runs = []
+    current = []
+    depth = 0
+    i = 0
+    
+    while i < len(pattern):
+        char = pattern[i]
+        
+        if char == '\\':
+            escaped = pattern[i + 1:i + 2]
+            i += 2
+            if depth == 0 and escaped and not escaped.isalnum():
+                current.append(escaped)
+            else:
+                runs.append(''.join(current))
+                current = []
+            continue
+        
+        if char == '[':
+            # Skip the whole character class, including a leading ']'
+            i += 1
+            if pattern[i:i + 1] == '^':
+                i += 1
+            i += 2 if pattern[i:i + 1] == '\\' else 1
+            while i < len(pattern) and pattern[i] != ']':
+                i += 2 if pattern[i] == '\\' else 1
+            runs.append(''.join(current))
+            current = []
+        elif char in '*+?{':
+            # The quantified atom is optional or repeated: drop it from the run
+            if current:
+                current.pop()
+            runs.append(''.join(current))
+            current = []
+            if char == '{':
+                while i < len(pattern) and pattern[i] != '}':
+                    i += 1
+            if pattern[i + 1:i + 2] in ('?', '+'):
+                i += 1
+        elif char == '|' and depth == 0:
+            return ''
+        elif char in '().^$|':
+            if char == '(':
+                depth += 1
+            elif char == ')':
+                depth -= 1
+            runs.append(''.join(current))
+            current = []
+        elif depth == 0:
+            current.append(char)
+        
+        i += 1
+    
+    runs.append(''.join(current))
+    return max(runs, key=len)
+
+
+def load_patterns(path: Path = DEFAULT_INTENTS_PATH) -> Dict[IntentType, List[str]]:
+    """
+    Load and validate an intent pattern table.
+    
+    The file holds ``{"version": 1, "intents": {"time": ["what.*time", ...]}}``.
+    Intents are tried in file order, and each intent's patterns in list order.
+    
+    Args:
+        path: JSON pattern file
+    
+    Returns:
+        Ordered mapping of intent type to regex patterns
+    
+    Raises:
+        ValueError: If the file is malformed, names an unknown intent or
+            contains a pattern that does not compile
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        raise ValueError(f"Cannot read intent patterns from {path}: {e}") from e
+    
+    version = data.get('version') if isinstance(data, dict) else None
+    if version != INTENTS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported intent pattern file version: {version!r}")
+    
+    patterns: Dict[IntentType, List[str]] = {}
+    for name, intent_patterns in data.get('intents', {}).items():
+        try:
+            intent_type = IntentType(name)
+        except ValueError:
+            raise ValueError(f"Unknown intent in pattern file: {name}") from None
+        if not isinstance(intent_patterns, list) or not all(isinstance(p, str) for p in intent_patterns):
+            raise ValueError(f"Patterns for {name} must be a list of strings")
+        for pattern in intent_patterns:
+            try:
+                re.compile(pattern)
+            except re.error as e:
+                raise ValueError(f"Invalid pattern for {name}: {pattern!r} ({e})") from None
+        patterns[intent_type] = list(intent_patterns)
+    return patterns
+
+
+class IntentMatcher:
+    """
+    Compiled, prefiltered form of an intent pattern table.
+    
+    Every pattern is compiled once. Patterns are indexed by a trigram of the
+    literal text they require, so a parse only runs the regexes whose literal
+    actually occurs in the utterance, in the original table order. Matching
+    cost therefore depends on the utterance rather than the table size, and
+    results are identical to an ordered ``re.search`` scan.
+    """
+    
+    def __init__(self, patterns: Dict[IntentType, List[str]]):
+        """
+        Compile a pattern table.
+        
+        Args:
+            patterns: Ordered mapping of intent type to regex patterns
+        """
+        self.entries: List[Tuple[IntentType, "re.Pattern[str]", str]] = []
+        self.trigram_index: Dict[str, List[int]] = {}
+        self.unindexed: List[int] = []
+        
+        for intent_type, intent_patterns in patterns.items():
+            for pattern in intent_patterns:
+                position = len(self.entries)
+                literal = _required_literal(pattern)
+                self.entries.append((intent_type, re.compile(pattern), literal))
+                
+                if len(literal) < 3:
+                    self.unindexed.append(position)
+                    continue
+                
+                # Index under the literal's least crowded trigram
+                trigram = min(
+                    (literal[j:j + 3] for j in range(len(literal) - 2)),
+                    key=lambda gram: len(self.trigram_index.get(gram, ()))
+                )
+                self.trigram_index.setdefault(trigram, []).append(position)
+    
+    def candidates(self, text: str) -> List[int]:
+        """
+        Get the positions of patterns that can possibly match a text.
+        
+        Args:
+            text: Normalized (lowercased, stripped) utterance
+        
+        Returns:
+            Pattern positions in table order
+        """
+        positions = set(self.unindexed)
+        index = self.trigram_index
+        for start in range(len(text) - 2):
+            hits = index.get(text[start:start + 3])
+            if hits:
+                positions.update(hits)
+        return sorted(positions)
+    
+    def match(
+        self,
+        text: str,
+        positions: Optional[Iterable[int]] = None
+    ) -> Optional[Tuple[IntentType, "re.Match[str]"]]:
+        """
+        Find the first pattern in table order that matches a text.
+        
+        Args:
+            text: Normalized (lowercased, stripped) utterance
+            positions: Precomputed candidates() for the text, in table order
+        
+        Returns:
+            (intent type, match) tuple, or None if nothing matched
+        """
+        if positions is None:
+            positions = self.candidates(text)
+        for position in positions:
+            intent_type, regex, literal = self.entries[position]
+            if literal and literal not in text:
+                continue
+            match = regex.search(text)
+            if match:
+                return intent_type, match
+        return None
+
+
 class NLUEngine:
     """Natural Language Understanding engine."""
     
-    def __init__(self):
-        """Initialize NLU engine with intent patterns."""
-        self.patterns = self._build_patterns()
+    def __init__(
+        self,
+        cache_size: int = 256,
+        cache_ttl: Optional[float] = 300.0,
+        gazetteer: Optional[AppGazetteer] = None,
+        classifier: Optional[IntentClassifier] = None,
+        use_classifier: bool = True,
+        classifier_threshold: float = 0.55,
+        classifier_margin: float = 0.1,
+        patterns_path: Optional[Path] = None,
+        watch_patterns: bool = False,
+        watch_interval: float = 1.0
+    ):
+        """
+        Initialize NLU engine with intent patterns.
+        
+        Args:
+            cache_size: Maximum number of cached parses (0 disables caching)
+            cache_ttl: Seconds a cached parse stays valid (None for no expiry)
+            gazetteer: Known applications (defaults to builtin + installed apps)
+            classifier: Fallback classifier (defaults to the shipped model)
+            use_classifier: Whether to consult the classifier at all
+            classifier_threshold: Minimum classifier score to accept an intent
+            classifier_margin: Minimum lead over the runner-up intent
+            patterns_path: Intent pattern file (defaults to the bundled table)
+            watch_patterns: Reload the pattern file whenever it changes
+            watch_interval: Seconds between checks of the pattern file
+        """
+        self._gazetteer = gazetteer
+        self.classifier = (classifier or load_default_classifier()) if use_classifier else None
+        self.classifier_threshold = classifier_threshold
+        self.classifier_margin = classifier_margin
+        self.cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        self.patterns_path = Path(patterns_path) if patterns_path else DEFAULT_INTENTS_PATH
+        
+        self._active: Tuple[int, Optional[IntentMatcher]] = (0, None)
+        self._swap_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
+        
+        self._patterns_stamp = self._stat_patterns()
+        self.set_patterns(self._build_patterns())
+        self._check_classifier()
+        
+        if watch_patterns:
+            self.watch(watch_interval)
         logger.info("NLU engine initialized")
     
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **defaults) -> "NLUEngine":
+        """
+        Build an NLU engine from the config's nlu section.
+        
+        Args:
+            config: The nlu section (see config.example.json)
+            **defaults: Arguments for the keys the section leaves out
+        
+        Returns:
+            NLU engine
+        """
+        options = dict(defaults)
+        for key, option in _CONFIG_OPTIONS.items():
+            if key in config:
+                options[option] = config[key]
+        return cls(**options)
+    
+    def set_patterns(self, patterns: Dict[IntentType, List[str]]):
+        """
+        Replace the intent pattern table.
+        
+        The table is compiled before it is installed and then swapped in with
+        a single assignment, so parses already running finish on the table
+        they started with. Cached parses made against the previous table are
+        discarded.
+        
+        Args:
+            patterns: Ordered mapping of intent type to regex patterns
+        """
+        matcher = IntentMatcher(patterns)
+        with self._swap_lock:
+            self.patterns = patterns
+            self._active = (self._active[0] + 1, matcher)
+        self.cache.clear()
+    
+    @property
+    def matcher(self) -> IntentMatcher:
+        """Compiled form of the active pattern table."""
+        return self._active[1]
+    
+    def reload_patterns(self) -> bool:
+        """
+        Reload the pattern file and swap it in.
+        
+        A file that fails to load or compile is rejected and the current
+        table stays active.
+        
+        Returns:
+            True if the new table was installed
+        """
+        self._patterns_stamp = self._stat_patterns()
+        try:
+            patterns = self._build_patterns()
+        except ValueError as e:
+            logger.error(f"Keeping current intent patterns: {e}")
+            return False
+        
+        self.set_patterns(patterns)
+        self._check_classifier()
+        logger.info(f"Reloaded intent patterns from {self.patterns_path}")
+        return True
+    
+    def watch(self, interval: float = 1.0):
+        """
+        Reload the pattern file in the background whenever it changes.
+        
+        Args:
+            interval: Seconds between checks
+        """
+        if self._watcher and self._watcher.is_alive():
+            return
+        
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop,
+            args=(interval,),
+            name="nlu-pattern-watcher",
+            daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Watching {self.patterns_path} for changes")
+    
+    def stop_watching(self):
+        """Stop the background pattern file watcher."""
+        self._stop_watching.set()
+        if self._watcher:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+    
+    def _watch_loop(self, interval: float):
+        """Poll the pattern file until stop_watching() is called."""
+        while not self._stop_watching.wait(interval):
+            if self._stat_patterns() != self._patterns_stamp:
+                self.reload_patterns()
+    
+    def _stat_patterns(self) -> Optional[Tuple[int, int]]:
+        """Modification time and size of the pattern file, or None if missing."""
+        try:
+            stat = os.stat(self.patterns_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _check_classifier(self):
+        """Warn if the fallback classifier was trained on another table."""
+        if self.classifier and is_stale(self.classifier, self._pattern_names()):
+            logger.warning(
+                "Intent classifier was trained on other patterns; "
+                "retrain with: python -m sara_core.intent_classifier"
+            )
+    
+    def _pattern_names(self) -> Dict[str, List[str]]:
+        """Pattern table keyed by intent name, as the classifier sees it."""
+        return {intent_type.value: list(patterns) for intent_type, patterns in self.patterns.items()}
+    
+    @property
+    def gazetteer(self) -> AppGazetteer:
+        """Application gazetteer, built on first use."""
+        if self._gazetteer is None:
+            self._gazetteer = default_gazetteer()
+        return self._gazetteer
+    
+    def incremental(self) -> "IncrementalParser":
+        """
+        Start incremental parsing of one utterance.
+        
+        Returns:
+            Parser to feed partial transcripts into
+        """
+        return IncrementalParser(self)
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get intent cache statistics.
+        
+        Returns:
+            Dictionary of cache size, hits, misses and hit rate
+        """
+        return self.cache.stats()
+    
     def _build_patterns(self) -> Dict[IntentType, List[str]]:
-        """Build regex patterns for intent matching."""
-        return {
-            # System control
-            IntentType.TIME: [
-                r"what.*time",
-                r"tell.*time",
-                r"current time",
-            ],
-            IntentType.DATE: [
-                r"what.*date",
-                r"today.*date",
-                r"current date",
-            ],
-            IntentType.VOLUME_CONTROL: [
-                r"(increase|decrease|set|adjust).*(volume|sound)",
-                r"volume (up|down)",
-                r"(mute|unmute)",
-            ],
-            IntentType.BRIGHTNESS_CONTROL: [
-                r"(increase|decrease|set).*(brightness|screen)",
-                r"brightness (up|down)",
-            ],
-            IntentType.SHUTDOWN: [
-                r"shut.*down",
-                r"power.*off",
-                r"turn.*off.*computer",
-            ],
-            IntentType.RESTART: [
-                r"restart",
-                r"reboot",
-            ],
-            IntentType.LOCK: [
-                r"lock.*screen",
-                r"lock.*computer",
-            ],
-            IntentType.SYSTEM_INFO: [
-                r"system.*info",
-                r"cpu.*usage",
-                r"memory.*usage",
-                r"disk.*space",
-            ],
-            
-            # Application control
-            IntentType.OPEN_APP: [
-                r"open ([a-zA-Z0-9 ]+)",
-                r"launch ([a-zA-Z0-9 ]+)",
-                r"start ([a-zA-Z0-9 ]+)",
-            ],
-            IntentType.CLOSE_APP: [
-                r"close ([a-zA-Z0-9 ]+)",
-                r"quit ([a-zA-Z0-9 ]+)",
-                r"exit ([a-zA-Z0-9 ]+)",
-            ],
-            
-            # File operations
-            IntentType.CREATE_FOLDER: [
-                r"create (a |)folder.*named ([a-zA-Z0-9 ]+)",
-                r"make (a |)folder.*named ([a-zA-Z0-9 ]+)",
-                r"new folder ([a-zA-Z0-9 ]+)",
-            ],
-            IntentType.DELETE_FOLDER: [
-                r"delete.*folder ([a-zA-Z0-9 ]+)",
-                r"remove.*folder ([a-zA-Z0-9 ]+)",
-            ],
-            IntentType.CREATE_FILE: [
-                r"create (a |)file.*named ([a-zA-Z0-9. ]+)",
-                r"new file ([a-zA-Z0-9. ]+)",
-            ],
-            IntentType.SEARCH_FILE: [
-                r"find.*file ([a-zA-Z0-9. ]+)",
-                r"search.*for ([a-zA-Z0-9. ]+)",
-                r"locate ([a-zA-Z0-9. ]+)",
-            ],
-            
-            # Utilities
-            IntentType.SEARCH_WEB: [
-                r"search.*for (.+)",
-                r"google (.+)",
-                r"look.*up (.+)",
-            ],
-            IntentType.JOKE: [
-                r"tell.*joke",
-                r"make.*laugh",
-                r"something funny",
-            ],
-            IntentType.WEATHER: [
-                r"what.*weather",
-                r"weather.*in (.+)",
-                r"temperature",
-            ],
-        }
+        """Load regex patterns for intent matching from the pattern file."""
+        return load_patterns(self.patterns_path)
     
     def parse(self, text: str) -> Intent:
         """
@@ -168,60 +534,376 @@ class NLUEngine:
         Returns:
             Parsed Intent object
         """
-        text_lower = text.lower().strip()
+        text_lower = _normalize(text)
         logger.info(f"Parsing: {text_lower}")
         
-        # Try to match against patterns
-        for intent_type, patterns in self.patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, text_lower)
-                if match:
-                    # Extract entities from groups
-                    entities = {}
-                    if match.groups():
-                        if intent_type in [IntentType.OPEN_APP, IntentType.CLOSE_APP]:
-                            entities['app_name'] = match.group(1).strip()
-                        elif intent_type == IntentType.CREATE_FOLDER:
-                            entities['folder_name'] = match.groups()[-1].strip()
-                        elif intent_type == IntentType.CREATE_FILE:
-                            entities['file_name'] = match.groups()[-1].strip()
-                        elif intent_type == IntentType.SEARCH_WEB:
-                            entities['query'] = match.group(1).strip()
-                        elif intent_type == IntentType.SEARCH_FILE:
-                            entities['file_name'] = match.group(1).strip()
-                        elif intent_type == IntentType.WEATHER:
-                            if match.groups():
-                                entities['location'] = match.group(1).strip()
-                        
-                        # Volume and brightness
-                        if intent_type == IntentType.VOLUME_CONTROL:
-                            if 'up' in text_lower or 'increase' in text_lower:
-                                entities['action'] = 'increase'
-                            elif 'down' in text_lower or 'decrease' in text_lower:
-                                entities['action'] = 'decrease'
-                            elif 'mute' in text_lower:
-                                entities['action'] = 'mute'
-                            elif 'unmute' in text_lower:
-                                entities['action'] = 'unmute'
-                        
-                        if intent_type == IntentType.BRIGHTNESS_CONTROL:
-                            if 'up' in text_lower or 'increase' in text_lower:
-                                entities['action'] = 'increase'
-                            elif 'down' in text_lower or 'decrease' in text_lower:
-                                entities['action'] = 'decrease'
-                    
-                    return Intent(
+        intent = self._parse_normalized(text, text_lower)
+        if intent.intent_type == IntentType.UNKNOWN:
+            logger.warning(f"Could not parse intent from: {text}")
+        return intent
+    
+    def parse_multi(self, text: str) -> List[Intent]:
+        """
+        Parse a compound command into one Intent per clause.
+        
+        The text is split on "and", "then" and commas. A clause that matches
+        no pattern on its own is glued back onto the clause before it, so
+        "search for salt and pepper" stays a single search. The decision is
+        made on the patterns alone: the classifier fallback would label
+        almost any fragment with some intent.
+        
+        Args:
+            text: User command text
+        
+        Returns:
+            Parsed Intent objects, one per clause, in spoken order
+        """
+        logger.info(f"Parsing compound command: {_normalize(text)}")
+        
+        parts = _CLAUSE_SEPARATOR.split(text.strip())
+        clauses: List[Tuple[str, Intent]] = []
+        matcher = self._active[1]
+        
+        for position in range(0, len(parts), 2):
+            clause = parts[position].strip()
+            if not clause:
+                continue
+            
+            if clauses and not matcher.match(_normalize(clause)):
+                merged = clauses[-1][0] + parts[position - 1] + clause
+                clauses[-1] = (merged, self._parse_normalized(merged, _normalize(merged)))
+            else:
+                clauses.append((clause, self._parse_normalized(clause, _normalize(clause))))
+        
+        if not clauses:
+            return [self.parse(text)]
+        return [intent for _, intent in clauses]
+    
+    def parse_many(self, texts: Iterable[str]) -> List[Intent]:
+        """
+        Parse a batch of command texts.
+        
+        Texts are normalized up front and share the compiled matcher. Unlike
+        parse(), nothing is logged per utterance, which keeps corpus replays
+        and bulk imports cheap.
+        
+        Args:
+            texts: User command texts
+        
+        Returns:
+            Parsed Intent objects, in input order
+        """
+        texts = list(texts)
+        normalized = [_normalize(text) for text in texts]
+        intents = [
+            self._parse_normalized(text, text_lower)
+            for text, text_lower in zip(texts, normalized)
+        ]
+        logger.debug("Parsed batch of %d utterances", len(intents))
+        return intents
+    
+    async def parse_stream(self, texts: AsyncIterable[str]) -> AsyncIterator[Intent]:
+        """
+        Parse command texts as they arrive from an async source.
+        
+        Args:
+            texts: Async iterable of user command texts
+        
+        Yields:
+            Parsed Intent objects, in arrival order
+        """
+        count = 0
+        async for text in texts:
+            yield self._parse_normalized(text, _normalize(text))
+            count += 1
+        logger.debug("Parsed stream of %d utterances", count)
+    
+    def _parse_normalized(self, text: str, text_lower: str) -> Intent:
+        """
+        Parse an already normalized command text without logging.
+        
+        Args:
+            text: Original command text
+            text_lower: Lowercased, stripped command text
+        
+        Returns:
+            Parsed Intent object
+        """
+        # One snapshot of the table for the whole parse; keyed on its
+        # generation so a concurrent swap never serves a parse from the old table
+        generation, matcher = self._active
+        key = (generation, text_lower)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached.model_copy(
+                update={'raw_text': text, 'entities': dict(cached.entities)}
+            )
+        
+        intent = self._match(text, text_lower, matcher)
+        self.cache.put(key, intent.model_copy(update={'entities': dict(intent.entities)}))
+        return intent
+    
+    def _match(self, text: str, text_lower: str, matcher: Optional[IntentMatcher] = None) -> Intent:
+        """
+        Run the compiled patterns against a normalized command text.
+        
+        Args:
+            text: Original command text
+            text_lower: Lowercased, stripped command text
+            matcher: Table to match against (defaults to the active one)
+        
+        Returns:
+            Parsed Intent object
+        """
+        # Only the patterns whose literals occur in the text are tried
+        found = (matcher or self.matcher).match(text_lower)
+        if found:
+            intent_type, match = found
+            # Fields are produced here, so Pydantic validation can be skipped
+            return Intent.model_construct(
+                intent_type=intent_type,
+                entities=self._extract_entities(intent_type, match, text_lower),
+                confidence=0.9,
+                raw_text=text
+            )
+        
+        # No pattern matched: ask the classifier before giving up
+        if self.classifier:
+            label, score, margin = self.classifier.predict(text_lower)
+            if score >= self.classifier_threshold and margin >= self.classifier_margin:
+                intent_type = IntentType(label)
+                if intent_type in CLASSIFIER_INTENTS:
+                    return Intent.model_construct(
                         intent_type=intent_type,
-                        entities=entities,
-                        confidence=0.9,
+                        entities={},
+                        confidence=score,
                         raw_text=text
                     )
         
-        # No pattern matched
-        logger.warning(f"Could not parse intent from: {text}")
-        return Intent(
+        return Intent.model_construct(
             intent_type=IntentType.UNKNOWN,
             entities={},
             confidence=0.0,
             raw_text=text
         )
+    
+    def _extract_entities(
+        self,
+        intent_type: IntentType,
+        match: "re.Match[str]",
+        text_lower: str
+    ) -> Dict[str, Any]:
+        """
+        Extract entities from a pattern match.
+        
+        Args:
+            intent_type: Intent the match belongs to
+            match: Regex match against the normalized text
+            text_lower: Normalized command text
+        
+        Returns:
+            Entity dictionary
+        """
+        entities = {}
+        if intent_type == IntentType.SYSTEM_INFO:
+            return self._system_info_entities(text_lower)
+        if not match.groups():
+            return entities
+        
+        if intent_type in [IntentType.OPEN_APP, IntentType.CLOSE_APP]:
+            entities['app_name'] = match.group(1).strip()
+            app = self.gazetteer.resolve(entities['app_name'])
+            if app:
+                entities['app'] = app.name
+                if app.command:
+                    entities['app_command'] = app.command
+        elif intent_type == IntentType.CREATE_FOLDER:
+            entities['folder_name'] = match.groups()[-1].strip()
+        elif intent_type == IntentType.CREATE_FILE:
+            entities['file_name'] = match.groups()[-1].strip()
+        elif intent_type == IntentType.SEARCH_WEB:
+            entities['query'] = match.group(1).strip()
+        elif intent_type == IntentType.SEARCH_FILE:
+            entities['file_name'] = match.group(1).strip()
+        elif intent_type == IntentType.WEATHER:
+            entities['location'] = match.group(1).strip()
+        
+        # Volume and brightness
+        if intent_type == IntentType.VOLUME_CONTROL:
+            if 'up' in text_lower or 'increase' in text_lower:
+                entities['action'] = 'increase'
+            elif 'down' in text_lower or 'decrease' in text_lower:
+                entities['action'] = 'decrease'
+            elif 'mute' in text_lower:
+                entities['action'] = 'mute'
+            elif 'unmute' in text_lower:
+                entities['action'] = 'unmute'
+        
+        if intent_type == IntentType.BRIGHTNESS_CONTROL:
+            if 'up' in text_lower or 'increase' in text_lower:
+                entities['action'] = 'increase'
+            elif 'down' in text_lower or 'decrease' in text_lower:
+                entities['action'] = 'decrease'
+        
+        return entities
+    
+    @staticmethod
+    def _system_info_entities(text_lower: str) -> Dict[str, Any]:
+        """Resource asked about (if exactly one) and the time window in seconds."""
+        entities: Dict[str, Any] = {}
+        words = set(re.findall(r"[a-z]+", text_lower))
+        resources = [name for name, names in _SYSTEM_RESOURCES.items() if words.intersection(names)]
+        if len(resources) == 1:
+            entities['info_type'] = resources[0]
+        
+        window = _TIME_WINDOW.search(text_lower)
+        if window:
+            count, unit = window.groups()
+            amount = int(count) if count and count.isdigit() else 1
+            entities['window'] = float(amount * _WINDOW_UNITS[unit])
+        return entities
+
+
+class IncrementalParser:
+    """
+    Parses one utterance from a stream of growing partial transcripts.
+    
+    Streaming recognizers revise their hypothesis as the user speaks
+    ("open", "open chro", "open chrome"). Each feed() only indexes the text
+    that changed since the previous hypothesis, and a provisional intent is
+    reported as soon as it is unambiguous, so planning and launching can
+    start before the final transcript arrives.
+    """
+    
+    def __init__(self, nlu: NLUEngine):
+        """
+        Initialize parser.
+        
+        Args:
+            nlu: Engine whose patterns and gazetteer are used
+        """
+        self.nlu = nlu
+        self.provisional: Optional[Intent] = None
+        self.reset()
+    
+    def reset(self):
+        """Forget the current utterance."""
+        self._text = ""
+        self._matcher: Optional[IntentMatcher] = None
+        self._hits: List[Tuple[int, ...]] = []    # Index hits of the trigram at each offset
+        self._counts: Dict[int, int] = {}          # Pattern position -> live trigram hits
+        self.provisional = None
+    
+    def _sync(self, text: str):
+        """Update the candidate patterns from the previous text to a new one."""
+        matcher = self.nlu.matcher
+        if matcher is not self._matcher:
+            # Patterns were replaced: start over against the new table
+            self._matcher = matcher
+            self._text = ""
+            self._hits = []
+            self._counts = {}
+        
+        # Trigrams lying entirely in the unchanged prefix stay valid
+        common = 0
+        limit = min(len(text), len(self._text))
+        while common < limit and text[common] == self._text[common]:
+            common += 1
+        keep = max(0, common - 2)
+        
+        while len(self._hits) > keep:
+            for position in self._hits.pop():
+                self._counts[position] -= 1
+                if not self._counts[position]:
+                    del self._counts[position]
+        
+        index = matcher.trigram_index
+        for start in range(len(self._hits), len(text) - 2):
+            hits = tuple(index.get(text[start:start + 3], ()))
+            self._hits.append(hits)
+            for position in hits:
+                self._counts[position] = self._counts.get(position, 0) + 1
+        
+        self._text = text
+    
+    def feed(self, partial: str) -> Optional[Intent]:
+        """
+        Consume the recognizer's latest partial transcript.
+        
+        Args:
+            partial: Current hypothesis for the whole utterance so far
+        
+        Returns:
+            A provisional Intent when one first becomes unambiguous or its
+            intent type or application changes, otherwise None
+        """
+        text_lower = partial.lower().strip()
+        if text_lower == self._text and self._matcher is self.nlu.matcher:
+            return None
+        self._sync(text_lower)
+        
+        positions = sorted(self._counts.keys() | set(self._matcher.unindexed))
+        found = self._matcher.match(text_lower, positions)
+        intent = self._provisional_intent(partial, text_lower, found) if found else None
+        
+        if intent is None:
+            return None
+        
+        # Free-text slots grow with every partial; only report a new intent
+        # or a different application, not every extra character of a query
+        previous = self.provisional
+        self.provisional = intent
+        if previous is not None and (
+            previous.intent_type == intent.intent_type
+            and previous.entities.get('app') == intent.entities.get('app')
+        ):
+            return None
+        
+        logger.debug(f"Provisional intent: {intent.intent_type.value} {intent.entities}")
+        return intent
+    
+    def _provisional_intent(
+        self,
+        text: str,
+        text_lower: str,
+        found: Tuple[IntentType, "re.Match[str]"]
+    ) -> Optional[Intent]:
+        """
+        Build the intent for a partial match, if it is already unambiguous.
+        
+        An application command is only unambiguous once its spoken name
+        completes to exactly one known application ("chro" -> chrome, but
+        not "visual studio", which may still become "visual studio code").
+        """
+        intent_type, match = found
+        entities = self.nlu._extract_entities(intent_type, match, text_lower)
+        
+        if intent_type in (IntentType.OPEN_APP, IntentType.CLOSE_APP):
+            apps = self.nlu.gazetteer.complete(entities['app_name'], limit=2)
+            if len(apps) != 1:
+                return None
+            entities['app'] = apps[0].name
+            entities.pop('app_command', None)
+            if apps[0].command:
+                entities['app_command'] = apps[0].command
+        
+        return Intent.model_construct(
+            intent_type=intent_type,
+            entities=entities,
+            confidence=0.9,
+            raw_text=text
+        )
+    
+    def finalize(self, text: Optional[str] = None) -> Intent:
+        """
+        Parse the final transcript and reset for the next utterance.
+        
+        Args:
+            text: Final transcript (defaults to the last partial)
+        
+        Returns:
+            Parsed Intent object
+        """
+        intent = self.nlu.parse(text if text is not None else self._text)
+        self.reset()
+        return intent
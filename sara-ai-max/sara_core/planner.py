@@ -5,12 +5,15 @@ This module creates safe, structured execution plans from user intents.
 """
 
 import logging
-from typing import List, Optional
+import os
+from string import Formatter
+from typing import Any, Callable, Dict, List, Optional
 from enum import Enum
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 from .nlu import Intent, IntentType
 from .security import SecurityManager, PermissionLevel
+from .policy import Effect
 
 logger = logging.getLogger(__name__)
 
@@ -41,25 +44,268 @@ class ActionType(str, Enum):
     # Utility actions
     SPEAK = "speak"
     WEB_SEARCH = "web_search"
+    
+    # Control of Sara herself
+    CANCEL = "cancel"
+    
+    # Extensions
+    SKILL = "skill"
+    PLUGIN = "plugin"
 
 
 class Action(BaseModel):
     """A single executable action."""
     
+    # Plans are shared between callers, so they must not change once built
+    model_config = ConfigDict(frozen=True)
+    
     action_type: ActionType
     parameters: dict = {}
     permission_level: PermissionLevel = PermissionLevel.LOW
     description: str = ""
+    clause: int = 0  # Index of the spoken clause this action came from
+    timeout: Optional[float] = None  # Seconds allowed (None for the executor default)
+    cache_ttl: Optional[float] = None  # Seconds an OBSERVE result may be reused (None: never)
+    # Indices of the actions in the plan that must succeed first; None means
+    # the action before this one, so plain action lists run in order
+    depends_on: Optional[List[int]] = None
 
 
 class Plan(BaseModel):
     """A structured execution plan."""
     
+    model_config = ConfigDict(frozen=True)
+    
     actions: List[Action]
     description: str
     requires_confirmation: bool = False
+    confirmed: bool = False  # The user confirmed it; the executor refuses unconfirmed CONFIRM actions
     before_message: Optional[str] = None
     success_message: Optional[str] = None
+    concurrent: bool = False  # Clauses are independent and may run concurrently
+    timeout: Optional[float] = None  # Seconds the whole plan may take
+    
+    def dependencies(self) -> List[List[int]]:
+        """
+        Resolve each action's dependencies to explicit indices.
+        
+        Returns:
+            Dependency indices per action, in action order
+        
+        Raises:
+            ValueError: If a dependency is out of range or the graph has a cycle
+        """
+        resolved = []
+        for index, action in enumerate(self.actions):
+            if action.depends_on is None:
+                resolved.append([index - 1] if index else [])
+                continue
+            for dependency in action.depends_on:
+                if not 0 <= dependency < len(self.actions) or dependency == index:
+                    raise ValueError(f"Action {index} has invalid dependency {dependency}")
+            resolved.append(sorted(set(action.depends_on)))
+        
+        # Kahn's algorithm: every action must become ready eventually
+        remaining = [len(deps) for deps in resolved]
+        dependents: List[List[int]] = [[] for _ in resolved]
+        for index, deps in enumerate(resolved):
+            for dependency in deps:
+                dependents[dependency].append(index)
+        ready = [index for index, count in enumerate(remaining) if not count]
+        visited = 0
+        while ready:
+            index = ready.pop()
+            visited += 1
+            for dependent in dependents[index]:
+                remaining[dependent] -= 1
+                if not remaining[dependent]:
+                    ready.append(dependent)
+        if visited != len(resolved):
+            raise ValueError("Plan dependencies contain a cycle")
+        
+        return resolved
+
+
+# Builds the plan for one intent
+PlanFactory = Callable[[Intent], Plan]
+
+
+def _slots(text: Any) -> List[str]:
+    """Names of the {slot} placeholders in a template string."""
+    if not isinstance(text, str):
+        return []
+    return [name for _, name, _, _ in Formatter().parse(text) if name]
+
+
+class PlanTemplate:
+    """
+    A plan validated once, with ``{slot}`` placeholders in its strings.
+    
+    fill() formats the strings and copies the models, skipping validation
+    that already happened when the template was built. Every plan gets its
+    own actions and parameter dicts, so a caller changing one cannot affect
+    the template or other plans.
+    """
+    
+    def __init__(self, plan: Plan):
+        """
+        Initialize template.
+        
+        Args:
+            plan: Plan whose description, messages and string parameters may
+                contain placeholders such as ``{app_name}``
+        """
+        self.plan = plan
+        strings = [plan.description, plan.before_message, plan.success_message]
+        for action in plan.actions:
+            strings.append(action.description)
+            strings.extend(action.parameters.values())
+        self.slots = {name for text in strings for name in _slots(text)}
+    
+    def fill(self, slots: Optional[Dict[str, str]] = None, parameters: Optional[Dict[str, Any]] = None) -> Plan:
+        """
+        Build a plan from the template.
+        
+        Args:
+            slots: Values for the placeholders
+            parameters: Extra parameters added to every action
+        
+        Returns:
+            Execution plan
+        """
+        slots = slots or {}
+        
+        def format_text(text):
+            return text.format_map(slots) if isinstance(text, str) and self.slots else text
+        
+        actions = [
+            action.model_copy(update={
+                'description': format_text(action.description),
+                'parameters': {
+                    **{key: format_text(value) for key, value in action.parameters.items()},
+                    **(parameters or {}),
+                },
+            })
+            for action in self.plan.actions
+        ]
+        return self.plan.model_copy(update={
+            'actions': actions,
+            'description': format_text(self.plan.description),
+            'before_message': format_text(self.plan.before_message),
+            'success_message': format_text(self.plan.success_message),
+        })
+
+
+def _single_action_template(
+    action_type: ActionType,
+    permission_level: PermissionLevel,
+    action_description: str,
+    description: str,
+    parameters: Optional[Dict[str, Any]] = None,
+    cache_ttl: Optional[float] = None,
+    **plan_fields
+) -> PlanTemplate:
+    """Build a template for a plan with one action."""
+    return PlanTemplate(Plan(
+        actions=[
+            Action(
+                action_type=action_type,
+                parameters=parameters or {},
+                permission_level=permission_level,
+                description=action_description,
+                cache_ttl=cache_ttl
+            )
+        ],
+        description=description,
+        **plan_fields
+    ))
+
+
+# Plan templates, built once at import and shared by every planner
+TIME_PLAN = _single_action_template(
+    ActionType.SYSTEM_INFO, PermissionLevel.OBSERVE,
+    "Get current time", "tell you the current time",
+    parameters={'info_type': 'time'},
+    cache_ttl=1.0
+)
+DATE_PLAN = _single_action_template(
+    ActionType.SYSTEM_INFO, PermissionLevel.OBSERVE,
+    "Get current date", "tell you the current date",
+    parameters={'info_type': 'date'}
+)
+SYSTEM_INFO_PLAN = _single_action_template(
+    ActionType.SYSTEM_INFO, PermissionLevel.OBSERVE,
+    "Get {info_type} information", "get {info_type} information",
+    parameters={'info_type': '{info_type}'},
+    cache_ttl=5.0
+)
+SHUTDOWN_PLAN = _single_action_template(
+    ActionType.SYSTEM_SHUTDOWN, PermissionLevel.HIGH,
+    "Shutdown computer", "shutdown your computer",
+    requires_confirmation=True,  # High risk
+    before_message="Shutting down now"
+)
+LOCK_PLAN = _single_action_template(
+    ActionType.SYSTEM_LOCK, PermissionLevel.MEDIUM,
+    "Lock screen", "lock your screen",
+    before_message="Locking screen"
+)
+JOKE_PLAN = _single_action_template(
+    ActionType.SPEAK, PermissionLevel.OBSERVE,
+    "Tell a joke", "tell you a joke",
+    parameters={'text': 'Why did the programmer quit his job? Because he didnt get arrays!'}
+)
+OPEN_APP_PLAN = _single_action_template(
+    ActionType.APP_OPEN, PermissionLevel.MEDIUM,
+    "Open {app_name}", "open {app_name}",
+    parameters={'app_name': '{app_name}'},
+    before_message="Opening {app_name}"
+)
+CLOSE_APP_PLAN = _single_action_template(
+    ActionType.APP_CLOSE, PermissionLevel.MEDIUM,
+    "Close {app_name}", "close {app_name}",
+    parameters={'app_name': '{app_name}'},
+    before_message="Closing {app_name}"
+)
+VOLUME_PLAN = _single_action_template(
+    ActionType.VOLUME_SET, PermissionLevel.LOW,
+    "{Action} volume", "{action} the volume",
+    parameters={'action': '{action}'}
+)
+BRIGHTNESS_PLAN = _single_action_template(
+    ActionType.BRIGHTNESS_SET, PermissionLevel.LOW,
+    "{Action} brightness", "{action} the brightness",
+    parameters={'action': '{action}'}
+)
+CREATE_FOLDER_PLAN = _single_action_template(
+    ActionType.FOLDER_CREATE, PermissionLevel.MEDIUM,
+    "Create folder '{folder_name}'", "create a folder named {folder_name}",
+    parameters={'folder_name': '{folder_name}'},
+    success_message="Folder {folder_name} created successfully"
+)
+WEB_SEARCH_PLAN = _single_action_template(
+    ActionType.WEB_SEARCH, PermissionLevel.LOW,
+    "Search web for '{query}'", "search for {query}",
+    parameters={'query': '{query}'},
+    before_message="Searching for {query}"
+)
+CANCEL_PLAN = _single_action_template(
+    ActionType.CANCEL, PermissionLevel.OBSERVE,
+    "Cancel running actions", "cancel what I'm doing"
+)
+UNKNOWN_PLAN = _single_action_template(
+    ActionType.SPEAK, PermissionLevel.OBSERVE,
+    "Respond to unknown command", "respond that I don't understand",
+    parameters={'text': "I'm not sure how to help with: {text}"}
+)
+
+
+# Intents that must not overlap with anything else in a compound command
+SEQUENTIAL_INTENTS = {
+    IntentType.SHUTDOWN,
+    IntentType.RESTART,
+    IntentType.LOCK,
+}
 
 
 class Planner:
@@ -73,8 +319,86 @@ class Planner:
             security: Security manager for permission checks
         """
         self.security = security
+        self.factories: Dict[IntentType, PlanFactory] = {
+            IntentType.TIME: lambda intent: TIME_PLAN.fill(),
+            IntentType.DATE: lambda intent: DATE_PLAN.fill(),
+            IntentType.OPEN_APP: self._plan_open_app,
+            IntentType.CLOSE_APP: self._plan_close_app,
+            IntentType.VOLUME_CONTROL: self._plan_volume,
+            IntentType.BRIGHTNESS_CONTROL: self._plan_brightness,
+            IntentType.CREATE_FOLDER: self._plan_create_folder,
+            IntentType.SEARCH_WEB: self._plan_web_search,
+            IntentType.SYSTEM_INFO: self._plan_system_info,
+            IntentType.SHUTDOWN: lambda intent: SHUTDOWN_PLAN.fill(),
+            IntentType.LOCK: lambda intent: LOCK_PLAN.fill(),
+            IntentType.JOKE: lambda intent: JOKE_PLAN.fill(),
+            IntentType.CANCEL: lambda intent: CANCEL_PLAN.fill(),
+        }
         logger.info("Planner initialized")
     
+    def register(self, intent_type: IntentType, factory: PlanFactory):
+        """
+        Register the plan factory for an intent, replacing any existing one.
+        
+        Args:
+            intent_type: Intent the factory plans for
+            factory: Callable building a Plan from an Intent
+        """
+        if intent_type in self.factories:
+            logger.info(f"Replacing plan factory for {intent_type.value}")
+        self.factories[intent_type] = factory
+    
+    def unregister(self, intent_type: IntentType):
+        """
+        Remove the plan factory for an intent.
+        
+        Args:
+            intent_type: Intent to stop planning for
+        """
+        self.factories.pop(intent_type, None)
+    
+    def register_skill(
+        self,
+        intent_type: IntentType,
+        skill: Any,
+        permission_level: PermissionLevel = PermissionLevel.MEDIUM
+    ):
+        """
+        Handle an intent by running a skill with the intent's entities.
+        
+        Args:
+            intent_type: Intent the skill handles
+            skill: BaseSkill instance
+            permission_level: Permission required to run the skill
+        """
+        name = skill.metadata.name
+        template = _single_action_template(
+            ActionType.SKILL, permission_level, f"Run skill {name}", f"run {name}",
+            parameters={'skill': skill}
+        )
+        self.register(intent_type, lambda intent: template.fill(parameters={'arguments': dict(intent.entities)}))
+    
+    def register_plugin(
+        self,
+        intent_type: IntentType,
+        plugin: Any,
+        permission_level: PermissionLevel = PermissionLevel.MEDIUM
+    ):
+        """
+        Handle an intent by running a plugin with the intent's entities.
+        
+        Args:
+            intent_type: Intent the plugin handles
+            plugin: Loaded Plugin instance
+            permission_level: Permission required to run the plugin
+        """
+        name = plugin.metadata.name
+        template = _single_action_template(
+            ActionType.PLUGIN, permission_level, f"Run plugin {name}", f"run {name}",
+            parameters={'plugin': plugin}
+        )
+        self.register(intent_type, lambda intent: template.fill(parameters={'arguments': dict(intent.entities)}))
+    
     def create_plan(self, intent: Intent) -> Plan:
         """
         Create an execution plan from an intent.
@@ -87,231 +411,108 @@ class Planner:
         """
         logger.info(f"Creating plan for intent: {intent.intent_type}")
         
-        # Route to appropriate plan creator
-        if intent.intent_type == IntentType.TIME:
-            return self._plan_time()
-        elif intent.intent_type == IntentType.DATE:
-            return self._plan_date()
-        elif intent.intent_type == IntentType.OPEN_APP:
-            return self._plan_open_app(intent.entities.get('app_name', ''))
-        elif intent.intent_type == IntentType.CLOSE_APP:
-            return self._plan_close_app(intent.entities.get('app_name', ''))
-        elif intent.intent_type == IntentType.VOLUME_CONTROL:
-            return self._plan_volume(intent.entities.get('action', 'increase'))
-        elif intent.intent_type == IntentType.BRIGHTNESS_CONTROL:
-            return self._plan_brightness(intent.entities.get('action', 'increase'))
-        elif intent.intent_type == IntentType.CREATE_FOLDER:
-            return self._plan_create_folder(intent.entities.get('folder_name', ''))
-        elif intent.intent_type == IntentType.SEARCH_WEB:
-            return self._plan_web_search(intent.entities.get('query', ''))
-        elif intent.intent_type == IntentType.SYSTEM_INFO:
-            return self._plan_system_info()
-        elif intent.intent_type == IntentType.SHUTDOWN:
-            return self._plan_shutdown()
-        elif intent.intent_type == IntentType.LOCK:
-            return self._plan_lock()
-        elif intent.intent_type == IntentType.JOKE:
-            return self._plan_joke()
-        else:
-            return self._plan_unknown(intent.raw_text)
+        factory = self.factories.get(intent.intent_type)
+        if factory is None:
+            return self._plan_unknown(intent)
+        return self._apply_policy(factory(intent))
     
-    def _plan_time(self) -> Plan:
-        """Plan for telling the time."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.SYSTEM_INFO,
-                    parameters={'info_type': 'time'},
-                    permission_level=PermissionLevel.OBSERVE,
-                    description="Get current time"
-                )
-            ],
-            description="tell you the current time",
-            requires_confirmation=False
+    def _apply_policy(self, plan: Plan) -> Plan:
+        """Ask for confirmation exactly when the policy wants an action confirmed."""
+        confirm = any(
+            self.security.decide(action.permission_level, action.action_type, action.parameters).effect == Effect.CONFIRM
+            for action in plan.actions
         )
+        if confirm == plan.requires_confirmation:
+            return plan
+        return plan.model_copy(update={'requires_confirmation': confirm})
     
-    def _plan_date(self) -> Plan:
-        """Plan for telling the date."""
+    def create_plans(self, intents: List[Intent]) -> Plan:
+        """
+        Create one combined execution plan from several intents.
+        
+        Each intent's actions are tagged with its clause index and keep their
+        own order. Clauses are independent of each other, so they may run
+        concurrently unless one of them is in SEQUENTIAL_INTENTS, in which
+        case every action waits for the one before it.
+        
+        Args:
+            intents: Parsed intents, one per spoken clause
+        
+        Returns:
+            Combined execution plan
+        """
+        if len(intents) == 1:
+            return self.create_plan(intents[0])
+        
+        logger.info(f"Creating combined plan for {len(intents)} intents")
+        
+        plans = [self.create_plan(intent) for intent in intents]
+        concurrent = not any(intent.intent_type in SEQUENTIAL_INTENTS for intent in intents)
+        
+        actions = []
+        for clause, plan in enumerate(plans):
+            offset = len(actions)
+            for index, (action, deps) in enumerate(zip(plan.actions, plan.dependencies())):
+                update = {'clause': clause}
+                if concurrent:
+                    # Shift the clause's own dependencies to their new positions
+                    update['depends_on'] = [offset + dependency for dependency in deps]
+                else:
+                    update['depends_on'] = None
+                actions.append(action.model_copy(update=update))
+        
+        before_messages = [plan.before_message for plan in plans if plan.before_message]
+        
         return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.SYSTEM_INFO,
-                    parameters={'info_type': 'date'},
-                    permission_level=PermissionLevel.OBSERVE,
-                    description="Get current date"
-                )
-            ],
-            description="tell you the current date",
-            requires_confirmation=False
+            actions=actions,
+            description=" and ".join(plan.description for plan in plans),
+            requires_confirmation=any(plan.requires_confirmation for plan in plans),
+            before_message=". ".join(before_messages) if before_messages else None,
+            concurrent=concurrent
         )
     
-    def _plan_open_app(self, app_name: str) -> Plan:
+    def _plan_open_app(self, intent: Intent) -> Plan:
         """Plan for opening an application."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.APP_OPEN,
-                    parameters={'app_name': app_name},
-                    permission_level=PermissionLevel.MEDIUM,
-                    description=f"Open {app_name}"
-                )
-            ],
-            description=f"open {app_name}",
-            requires_confirmation=False,
-            before_message=f"Opening {app_name}"
-        )
+        app_name = intent.entities.get('app') or intent.entities.get('app_name', '')
+        command = intent.entities.get('app_command')
+        return OPEN_APP_PLAN.fill({'app_name': app_name}, {'command': command} if command else None)
     
-    def _plan_close_app(self, app_name: str) -> Plan:
+    def _plan_close_app(self, intent: Intent) -> Plan:
         """Plan for closing an application."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.APP_CLOSE,
-                    parameters={'app_name': app_name},
-                    permission_level=PermissionLevel.MEDIUM,
-                    description=f"Close {app_name}"
-                )
-            ],
-            description=f"close {app_name}",
-            requires_confirmation=False,
-            before_message=f"Closing {app_name}"
+        app_name = intent.entities.get('app_name', '')
+        command = intent.entities.get('app_command')
+        executable = os.path.basename(command.split()[0]) if command else None
+        if executable and executable not in ('env', 'flatpak', 'snap', 'sh'):
+            # The launch command's executable is the process name to look for
+            return CLOSE_APP_PLAN.fill({'app_name': app_name}, {'process_name': executable})
+        return CLOSE_APP_PLAN.fill({'app_name': app_name})
+    
+    def _plan_system_info(self, intent: Intent) -> Plan:
+        """Plan for system information, optionally one resource over a window."""
+        window = intent.entities.get('window')
+        return SYSTEM_INFO_PLAN.fill(
+            {'info_type': intent.entities.get('info_type', 'system')},
+            parameters={'window': window} if window else None
         )
     
-    def _plan_volume(self, action: str) -> Plan:
+    def _plan_volume(self, intent: Intent) -> Plan:
         """Plan for volume control."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.VOLUME_SET,
-                    parameters={'action': action},
-                    permission_level=PermissionLevel.LOW,
-                    description=f"{action.capitalize()} volume"
-                )
-            ],
-            description=f"{action} the volume",
-            requires_confirmation=False
-        )
+        action = intent.entities.get('action', 'increase')
+        return VOLUME_PLAN.fill({'action': action, 'Action': action.capitalize()})
     
-    def _plan_brightness(self, action: str) -> Plan:
+    def _plan_brightness(self, intent: Intent) -> Plan:
         """Plan for brightness control."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.BRIGHTNESS_SET,
-                    parameters={'action': action},
-                    permission_level=PermissionLevel.LOW,
-                    description=f"{action.capitalize()} brightness"
-                )
-            ],
-            description=f"{action} the brightness",
-            requires_confirmation=False
-        )
+        action = intent.entities.get('action', 'increase')
+        return BRIGHTNESS_PLAN.fill({'action': action, 'Action': action.capitalize()})
     
-    def _plan_create_folder(self, folder_name: str) -> Plan:
+    def _plan_create_folder(self, intent: Intent) -> Plan:
         """Plan for creating a folder."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.FOLDER_CREATE,
-                    parameters={'folder_name': folder_name},
-                    permission_level=PermissionLevel.MEDIUM,
-                    description=f"Create folder '{folder_name}'"
-                )
-            ],
-            description=f"create a folder named {folder_name}",
-            requires_confirmation=False,
-            success_message=f"Folder {folder_name} created successfully"
-        )
+        return CREATE_FOLDER_PLAN.fill({'folder_name': intent.entities.get('folder_name', '')})
     
-    def _plan_web_search(self, query: str) -> Plan:
+    def _plan_web_search(self, intent: Intent) -> Plan:
         """Plan for web search."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.WEB_SEARCH,
-                    parameters={'query': query},
-                    permission_level=PermissionLevel.LOW,
-                    description=f"Search web for '{query}'"
-                )
-            ],
-            description=f"search for {query}",
-            requires_confirmation=False,
-            before_message=f"Searching for {query}"
-        )
-   
-    def _plan_system_info(self) -> Plan:
-        """Plan for system information."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.SYSTEM_INFO,
-                    parameters={'info_type': 'system'},
-                    permission_level=PermissionLevel.OBSERVE,
-                    description="Get system information"
-                )
-            ],
-            description="get system information",
-            requires_confirmation=False
-        )
-    
-    def _plan_shutdown(self) -> Plan:
-        """Plan for system shutdown."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.SYSTEM_SHUTDOWN,
-                    parameters={},
-                    permission_level=PermissionLevel.HIGH,
-                    description="Shutdown computer"
-                )
-            ],
-            description="shutdown your computer",
-            requires_confirmation=True,  # High risk
-            before_message="Shutting down now"
-        )
-    
-    def _plan_lock(self) -> Plan:
-        """Plan for locking the screen."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.SYSTEM_LOCK,
-                    parameters={},
-                    permission_level=PermissionLevel.MEDIUM,
-                    description="Lock screen"
-                )
-            ],
-            description="lock your screen",
-            requires_confirmation=False,
-            before_message="Locking screen"
-        )
-    
-    def _plan_joke(self) -> Plan:
-        """Plan for telling a joke."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.SPEAK,
-                    parameters={'text': 'Why did the programmer quit his job? Because he didnt get arrays!'},
-                    permission_level=PermissionLevel.OBSERVE,
-                    description="Tell a joke"
-                )
-            ],
-            description="tell you a joke",
-            requires_confirmation=False
-        )
+        return WEB_SEARCH_PLAN.fill({'query': intent.entities.get('query', '')})
     
-    def _plan_unknown(self, text: str) -> Plan:
+    def _plan_unknown(self, intent: Intent) -> Plan:
         """Plan for unknown intent."""
-        return Plan(
-            actions=[
-                Action(
-                    action_type=ActionType.SPEAK,
-                    parameters={'text': f"I'm not sure how to help with: {text}"},
-                    permission_level=PermissionLevel.OBSERVE,
-                    description="Respond to unknown command"
-                )
-            ],
-            description="respond that I don't understand",
-            requires_confirmation=False
-        )
+        return UNKNOWN_PLAN.fill({'text': intent.raw_text})
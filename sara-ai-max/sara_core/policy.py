@@ -0,0 +1,343 @@
+"""
+Policy - Rule-based permission decisions for actions.
+
+Rules are read from the ``security`` section of the config and compiled into
+a two-level decision tree: action type, then permission level, down to the
+short list of rules that could still apply. Only parameter, path and time
+conditions are evaluated per call, and decisions that do not depend on the
+time are memoized per action type, permission level and parameters.
+
+Example config::
+
+    "security": {
+        "require_confirmation_for_high_risk": true,
+        "trusted_mode": false,
+        "policy": {
+            "default": "allow",
+            "relative_to": "~/Desktop",
+            "rules": [
+                {"effect": "deny", "action_types": ["folder_delete", "file_delete"],
+                 "path_prefixes": ["~/Documents"], "description": "Keep documents"},
+                {"effect": "confirm", "action_types": ["app_open"],
+                 "parameters": {"app_name": "*terminal*"}},
+                {"effect": "deny", "permission_levels": ["high"],
+                 "time_window": "23:00-06:00", "description": "No shutdowns at night"}
+            ]
+        }
+    }
+
+Rules are checked in order and the first one that matches decides.
+"""
+
+import fnmatch
+import logging
+import os
+import re
+import threading
+from datetime import datetime, time as day_time
+from enum import Enum
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Parameters holding file system paths, checked against path_prefixes
+PATH_PARAMETERS = ('path', 'location', 'folder_name', 'file_name', 'source', 'destination')
+
+# Week days as written in time-window rules
+WEEKDAYS = ('mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun')
+
+
+class Effect(str, Enum):
+    """What a policy decides about an action."""
+    
+    ALLOW = "allow"
+    CONFIRM = "confirm"  # Allowed once the user confirms
+    DENY = "deny"
+
+
+class PolicyDecision(BaseModel):
+    """Decision for one action."""
+    
+    model_config = ConfigDict(frozen=True)
+    
+    effect: Effect
+    reason: str = ""
+    
+    @property
+    def allowed(self) -> bool:
+        """Whether the action may run (possibly after confirmation)."""
+        return self.effect != Effect.DENY
+
+
+class PolicyRule(BaseModel):
+    """One rule; every condition given must hold for it to match."""
+    
+    effect: Effect
+    description: str = ""
+    action_types: Optional[List[str]] = None  # None matches every type
+    permission_levels: Optional[List[str]] = None  # None matches every level
+    parameters: Dict[str, str] = {}  # Parameter -> glob pattern (case-insensitive)
+    path_prefixes: Optional[List[str]] = None  # Any path parameter under one of these
+    time_window: Optional[str] = None  # "HH:MM-HH:MM", may wrap past midnight
+    days: Optional[List[str]] = None  # Week days, e.g. ["sat", "sun"]
+    
+    @field_validator('time_window')
+    @classmethod
+    def _check_time_window(cls, value: Optional[str]) -> Optional[str]:
+        if value is not None:
+            _parse_time_window(value)
+        return value
+    
+    @field_validator('days')
+    @classmethod
+    def _check_days(cls, value: Optional[List[str]]) -> Optional[List[str]]:
+        if value is not None:
+            unknown = [day for day in value if day.lower()[:3] not in WEEKDAYS]
+            if unknown:
+                raise ValueError(f"Unknown week days: {unknown}")
+        return value
+
+
+def _parse_time_window(window: str) -> Tuple[day_time, day_time]:
+    """Parse "HH:MM-HH:MM" into start and end times."""
+    match = re.fullmatch(r"\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*", window)
+    if not match:
+        raise ValueError(f"Time window must look like 22:00-06:00, got {window!r}")
+    start_hour, start_minute, end_hour, end_minute = map(int, match.groups())
+    return day_time(start_hour, start_minute), day_time(end_hour, end_minute)
+
+
+def _normalize_path(path: str, relative_to: Optional[str] = None) -> str:
+    """Expand, resolve symlinks in and case-normalize a path for prefix checks."""
+    path = os.path.expanduser(path)
+    if relative_to and not os.path.isabs(path):
+        path = os.path.join(os.path.expanduser(relative_to), path)
+    return os.path.normcase(os.path.realpath(path))
+
+
+def _freeze(value: Any) -> Hashable:
+    """Turn a parameter value into a hashable, comparable cache key part."""
+    if isinstance(value, str):
+        return value
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, dict):
+        return tuple(sorted((str(key), _freeze(item)) for key, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    # Objects such as skills: rules cannot look inside them
+    return f"<{type(value).__name__}>"
+
+
+class _CompiledRule:
+    """A rule reduced to the checks still needed once type and level match."""
+    
+    __slots__ = ('rule', 'decision', 'parameters', 'prefixes', 'window', 'days', 'unconditional')
+    
+    def __init__(self, rule: PolicyRule, relative_to: Optional[str]):
+        self.rule = rule
+        self.decision = PolicyDecision(effect=rule.effect, reason=rule.description)
+        self.parameters = [
+            (name, re.compile(fnmatch.translate(pattern.lower())))
+            for name, pattern in rule.parameters.items()
+        ]
+        self.prefixes = [_normalize_path(prefix, relative_to) for prefix in rule.path_prefixes or []]
+        self.window = _parse_time_window(rule.time_window) if rule.time_window else None
+        self.days = {WEEKDAYS.index(day.lower()[:3]) for day in rule.days} if rule.days else None
+        self.unconditional = not (self.parameters or rule.path_prefixes is not None or self.timed)
+    
+    @property
+    def timed(self) -> bool:
+        """Whether the rule's outcome depends on the clock."""
+        return self.window is not None or self.days is not None
+    
+    def matches_parameters(self, parameters: Dict[str, Any], paths: List[str]) -> bool:
+        """Check the parameter and path conditions."""
+        for name, pattern in self.parameters:
+            value = parameters.get(name)
+            if value is None or not pattern.match(str(value).lower()):
+                return False
+        if self.rule.path_prefixes is not None:
+            if not any(
+                path == prefix or path.startswith(prefix.rstrip(os.sep) + os.sep)
+                for path in paths for prefix in self.prefixes
+            ):
+                return False
+        return True
+    
+    def matches_time(self, now: datetime) -> bool:
+        """Check the time-window and week-day conditions."""
+        if self.days is not None and now.weekday() not in self.days:
+            return False
+        if self.window is not None:
+            start, end = self.window
+            current = now.time()
+            if start <= end:
+                return start <= current < end
+            return current >= start or current < end
+        return True
+
+
+class PolicyEngine:
+    """Decides whether actions may run, from rules in the config."""
+    
+    def __init__(
+        self,
+        config: Optional[Dict[str, Any]] = None,
+        cache_size: int = 1024,
+        clock: Callable[[], datetime] = datetime.now
+    ):
+        """
+        Initialize policy engine.
+        
+        Args:
+            config: The config's security section (see module docstring)
+            cache_size: Decisions memoized (0 disables memoization)
+            clock: Wall-clock source for time-window rules
+        """
+        self._clock = clock
+        self.cache = TTLCache(max_size=cache_size)
+        self._lock = threading.Lock()
+        self._generation = 0  # Bumped by every load, so decisions of an old policy are not cached
+        self.load(config or {})
+    
+    def load(self, config: Dict[str, Any]):
+        """
+        Compile a policy, replacing the current one and its memoized decisions.
+        
+        Args:
+            config: The config's security section
+        
+        Raises:
+            ValueError: If a rule is malformed
+        """
+        policy = config.get('policy', {})
+        rules = [PolicyRule(**rule) for rule in policy.get('rules', [])]
+        relative_to = policy.get('relative_to', "~/Desktop")
+        compiled = [_CompiledRule(rule, relative_to) for rule in rules]
+        
+        trusted = bool(config.get('trusted_mode', False))
+        confirm_high = bool(config.get('require_confirmation_for_high_risk', True))
+        default = PolicyDecision(effect=Effect(policy.get('default', Effect.ALLOW)), reason="Default policy")
+        
+        with self._lock:
+            self.rules = rules
+            self.relative_to = relative_to
+            self.trusted_mode = trusted
+            self.require_confirmation_for_high_risk = confirm_high
+            self._compiled = compiled
+            self._default = default
+            self._high_risk = PolicyDecision(effect=Effect.CONFIRM, reason="High-risk action")
+            # Leaves of the decision tree, built per (type, level) on first use
+            self._leaves: Dict[Tuple[str, str], List[_CompiledRule]] = {}
+            self._generation += 1
+            self.cache.clear()
+        logger.info(f"Loaded permission policy with {len(rules)} rules")
+    
+    def reload(self, config: Dict[str, Any]):
+        """Replace the policy; memoized decisions are dropped."""
+        self.load(config)
+    
+    def decide(
+        self,
+        action_type: Any,
+        permission_level: Any,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> PolicyDecision:
+        """
+        Decide whether an action may run.
+        
+        Args:
+            action_type: Action type (enum or value)
+            permission_level: Permission level (enum or value)
+            parameters: Action parameters
+        
+        Returns:
+            The decision
+        """
+        action_type = getattr(action_type, 'value', action_type)
+        permission_level = getattr(permission_level, 'value', permission_level)
+        parameters = parameters or {}
+        
+        key = (action_type, permission_level, _freeze(parameters))
+        decision = self.cache.get(key)
+        if decision is not None:
+            return decision
+        
+        generation = self._generation
+        decision, timed = self._evaluate(action_type, permission_level, parameters)
+        if not timed:
+            with self._lock:
+                # A reload while evaluating already cleared the cache; do not refill it
+                if self._generation == generation:
+                    self.cache.put(key, decision)
+        return decision
+    
+    def _leaf(self, action_type: str, permission_level: str) -> List[_CompiledRule]:
+        """Rules that can apply to a type and level, in order."""
+        leaf = self._leaves.get((action_type, permission_level))
+        if leaf is None:
+            leaf = []
+            for compiled in self._compiled:
+                rule = compiled.rule
+                if rule.action_types is not None and action_type not in rule.action_types:
+                    continue
+                if rule.permission_levels is not None and permission_level not in rule.permission_levels:
+                    continue
+                leaf.append(compiled)
+                if compiled.unconditional:
+                    # Nothing after an unconditional rule is ever reached
+                    break
+            self._leaves[(action_type, permission_level)] = leaf
+        return leaf
+    
+    def _evaluate(self, action_type: str, permission_level: str, parameters: Dict[str, Any]) -> Tuple[PolicyDecision, bool]:
+        """Walk the decision tree; also report whether the clock was consulted."""
+        paths = None
+        now = None
+        timed = False
+        decision = None
+        for compiled in self._leaf(action_type, permission_level):
+            if compiled.parameters or compiled.rule.path_prefixes is not None:
+                if paths is None:
+                    paths = self._paths(parameters)
+                if not compiled.matches_parameters(parameters, paths):
+                    continue
+            if compiled.timed:
+                timed = True
+                now = now or self._clock()
+                if not compiled.matches_time(now):
+                    continue
+            decision = compiled.decision
+            break
+        
+        if decision is None:
+            if permission_level == "high" and self.require_confirmation_for_high_risk:
+                decision = self._high_risk
+            else:
+                decision = self._default
+        if self.trusted_mode and decision.effect == Effect.CONFIRM:
+            decision = PolicyDecision(effect=Effect.ALLOW, reason="Trusted mode")
+        return decision, timed
+    
+    def _paths(self, parameters: Dict[str, Any]) -> List[str]:
+        """Normalized paths named by an action's parameters."""
+        location = parameters.get('location')
+        base = location if isinstance(location, str) and location else self.relative_to
+        return [
+            _normalize_path(parameters[name], base if name != 'location' else self.relative_to)
+            for name in PATH_PARAMETERS
+            if isinstance(parameters.get(name), str) and parameters[name]
+        ]
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """
+        Get decision cache statistics.
+        
+        Returns:
+            Dictionary of cache size, hits, misses and hit rate
+        """
+        return self.cache.stats()
@@ -5,13 +5,16 @@ This module handles all security and permission checks.
 """
 
 import logging
-import json
+import threading
 from datetime import datetime
 from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional, Union
 from pydantic import BaseModel
 
+from .audit import AuditLog, AuditWriter
+from .policy import Effect, PolicyDecision, PolicyEngine
+
 logger = logging.getLogger(__name__)
 
 
@@ -34,52 +37,183 @@ class AuditEntry(BaseModel):
     result: Optional[str] = None
 
 
+# Security section keys and the SecurityManager arguments they set
+_CONFIG_OPTIONS = {
+    'audit_log_path': 'audit_log_path',
+    'audit_max_segment_bytes': 'max_segment_bytes',
+    'audit_max_segment_age': 'max_segment_age',
+    'audit_compress_segments': 'compress_segments',
+    'audit_mode': 'audit_mode',
+    'audit_sync_levels': 'sync_levels',
+    'audit_queue_size': 'audit_queue_size',
+    'audit_batch_size': 'audit_batch_size',
+    'audit_flush_interval': 'audit_flush_interval',
+    'policy': 'policy',
+    'require_confirmation_for_high_risk': 'require_confirmation_for_high_risk',
+    'trusted_mode': 'trusted_mode',
+}
+
+
 class SecurityManager:
     """Manages permissions and audit logging."""
     
-    def __init__(self, audit_log_path: str = "sara_audit.json"):
+    def __init__(
+        self,
+        audit_log_path: str = "sara_audit.json",
+        max_segment_bytes: int = 5 * 1024 * 1024,
+        max_segment_age: Optional[float] = 24 * 3600,
+        compress_segments: bool = True,
+        audit_mode: str = "batched",
+        sync_levels: Iterable[PermissionLevel] = (PermissionLevel.HIGH,),
+        audit_queue_size: int = 1024,
+        audit_batch_size: int = 64,
+        audit_flush_interval: float = 0.5,
+        policy: Optional[Dict[str, Any]] = None,
+        require_confirmation_for_high_risk: bool = True,
+        trusted_mode: bool = False
+    ):
         """
         Initialize security manager.
         
         Args:
-            audit_log_path: Path to audit log file
+            audit_log_path: Path to the active audit log segment (JSON lines;
+                a log in the old JSON array format is converted on open)
+            max_segment_bytes: Size at which the audit log is rotated
+            max_segment_age: Seconds after which the audit log is rotated
+            compress_segments: Gzip rotated audit log segments
+            audit_mode: "batched" to write entries from a background thread,
+                or "sync" to write and sync each one before log_action returns
+            sync_levels: Permission levels written synchronously even when batched
+            audit_queue_size: Entries that may wait for the background writer
+            audit_batch_size: Entries the background writer writes at once
+            audit_flush_interval: Seconds an entry may wait for its batch
+            policy: Permission policy rules (see sara_core.policy)
+            require_confirmation_for_high_risk: Confirm high-risk actions no
+                rule decides
+            trusted_mode: Run actions the policy would confirm without asking
         """
+        if audit_mode not in ("batched", "sync"):
+            raise ValueError(f"Unknown audit mode: {audit_mode}")
+        
         self.audit_log_path = Path(audit_log_path)
-        self.audit_entries = []
+        self._audit_options = {
+            'max_segment_bytes': max_segment_bytes,
+            'max_segment_age': max_segment_age,
+            'compress': compress_segments,
+        }
+        self._audit: Optional[AuditLog] = None
+        self._audit_lock = threading.Lock()
+        
+        self.audit_mode = audit_mode
+        self.sync_levels = frozenset(sync_levels)
+        self.writer = AuditWriter(
+            lambda: self.audit,
+            queue_size=audit_queue_size,
+            batch_size=audit_batch_size,
+            flush_interval=audit_flush_interval
+        )
         
-        # Load existing audit log if it exists
-        if self.audit_log_path.exists():
-            try:
-                with open(self.audit_log_path, 'r') as f:
-                    data = json.load(f)
-                    self.audit_entries = [AuditEntry(**entry) for entry in data]
-            except Exception as e:
-                logger.error(f"Error loading audit log: {e}")
+        self.policy = PolicyEngine({
+            'policy': policy or {},
+            'require_confirmation_for_high_risk': require_confirmation_for_high_risk,
+            'trusted_mode': trusted_mode,
+        })
         
         logger.info("Security manager initialized")
     
-    def check_permission(self, action: str, level: PermissionLevel) -> bool:
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SecurityManager":
+        """
+        Build a security manager from the config's security section.
+        
+        Args:
+            config: The security section (see config.example.json); missing
+                keys keep their defaults
+        
+        Returns:
+            Security manager
+        
+        Raises:
+            ValueError: If a policy rule or audit setting is malformed
+        """
+        options = {}
+        for key, option in _CONFIG_OPTIONS.items():
+            if key in config:
+                options[option] = config[key]
+        if 'sync_levels' in options:
+            options['sync_levels'] = [PermissionLevel(level) for level in options['sync_levels']]
+        return cls(**options)
+    
+    @property
+    def audit(self) -> AuditLog:
+        """Audit log, opened on first use so startup does not depend on its size."""
+        if self._audit is None:
+            with self._audit_lock:
+                if self._audit is None:
+                    self._audit = AuditLog(str(self.audit_log_path), **self._audit_options)
+        return self._audit
+    
+    def decide(
+        self,
+        level: PermissionLevel,
+        action_type: Any = None,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> PolicyDecision:
+        """
+        Decide whether an action may run, and whether it needs confirmation.
+        
+        Args:
+            level: Permission level required
+            action_type: Action type, matched against the policy rules
+            parameters: Action parameters, matched against the policy rules
+        
+        Returns:
+            Policy decision
+        """
+        return self.policy.decide(action_type, level, parameters)
+    
+    def check_permission(
+        self,
+        action: str,
+        level: PermissionLevel,
+        action_type: Any = None,
+        parameters: Optional[Dict[str, Any]] = None
+    ) -> bool:
         """
         Check if an action is permitted.
         
+        Actions the policy wants confirmed are permitted here; confirmation
+        is asked for before the plan runs (see Plan.requires_confirmation),
+        and the executor refuses plans that were not confirmed.
+        
         Args:
             action: Description of the action
             level: Permission level required
+            action_type: Action type, matched against the policy rules
+            parameters: Action parameters, matched against the policy rules
             
         Returns:
             True if permitted, False otherwise
         """
-        # In MVP, all actions are permitted
-        # In production, implement fine-grained permission system
+        decision = self.policy.decide(action_type, level, parameters)
+        if decision.effect == Effect.DENY:
+            logger.warning(f"Permission denied: {action} ({decision.reason or 'policy'})")
+            return False
         
-        logger.info(f"Permission check: {action} (level: {level})")
+        logger.debug(f"Permission check: {action} (level: {level}) -> {decision.effect.value}")
+        return True
+    
+    def reload_policy(self, config: Dict[str, Any]):
+        """
+        Replace the permission policy, dropping memoized decisions.
         
-        # High-risk actions should always require explicit confirmation
-        if level == PermissionLevel.HIGH:
-            logger.warning(f"High-risk action requires confirmation: {action}")
-            return True  # Will be confirmed in main loop
+        Args:
+            config: The config's security section
         
-        return True
+        Raises:
+            ValueError: If a rule is malformed (the old policy stays in place)
+        """
+        self.policy.reload(config)
     
     def log_action(
         self, 
@@ -105,24 +239,48 @@ class SecurityManager:
             result=result
         )
         
-        self.audit_entries.append(entry)
         logger.info(f"Audit log: {action} - Approved: {approved}")
         
-        # Save to file
-        self._save_audit_log()
-    
-    def _save_audit_log(self):
-        """Save audit log to file."""
+        # Append to file, off the caller's thread unless it must be durable now
         try:
-            with open(self.audit_log_path, 'w') as f:
-                json.dump(
-                    [entry.model_dump() for entry in self.audit_entries],
-                    f,
-                    indent=2
-                )
+            if self.audit_mode == "sync":
+                self.audit.append(entry.model_dump(mode='json'), sync=True)
+            else:
+                # Opened here rather than on the writer thread, so a broken
+                # log path surfaces in the caller and the file exists at once
+                self.audit
+                self.writer.submit(entry.model_dump(mode='json'), sync=permission_level in self.sync_levels)
         except Exception as e:
             logger.error(f"Error saving audit log: {e}")
     
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """
+        Wait until the actions logged so far are written to the audit log.
+        
+        Args:
+            timeout: Seconds to wait at most (None: no limit)
+        
+        Returns:
+            False if they were not all written in time
+        """
+        return self.writer.flush(timeout)
+    
+    def close(self):
+        """Drain the audit writer, then flush and close the audit log."""
+        self.writer.close()
+        if self._audit is not None:
+            self._audit.close()
+    
+    def audit_stats(self) -> Dict[str, Any]:
+        """
+        Get audit writer statistics.
+        
+        Returns:
+            Dictionary of queue depth, entries written, batches, backpressure
+            and dropped entries
+        """
+        return {'mode': self.audit_mode, **self.writer.stats()}
+    
     def get_recent_actions(self, count: int = 10) -> list:
         """
         Get recent audit entries.
@@ -133,4 +291,38 @@ class SecurityManager:
         Returns:
             List of recent audit entries
         """
-        return self.audit_entries[-count:]
+        self.flush()
+        return [AuditEntry(**entry) for entry in self.audit.tail(count)]
+    
+    def get_actions(
+        self,
+        since: Optional[Union[datetime, str]] = None,
+        until: Optional[Union[datetime, str]] = None,
+        permission_level: Optional[PermissionLevel] = None,
+        approved: Optional[bool] = None,
+        limit: Optional[int] = None
+    ) -> List[AuditEntry]:
+        """
+        Find audit entries through the audit index.
+        
+        Args:
+            since: Earliest time (inclusive)
+            until: Latest time (exclusive)
+            permission_level: Only entries at this level
+            approved: Only approved (True) or denied (False) entries
+            limit: Return only the newest this many matches
+        
+        Returns:
+            Matching audit entries, oldest first
+        """
+        self.flush()
+        entries = self.audit.query(
+            since=since,
+            until=until,
+            permission_level=permission_level,
+            approved=approved,
+            limit=limit,
+            newest=True
+        )
+        return [AuditEntry(**entry) for entry in entries]
+
@@ -0,0 +1,434 @@
+"""
+Sessions - Persistent, session-keyed conversation context.
+
+Each session (a browser tab of the web GUI, say) gets its own ContextManager.
+History is kept in a SQLite database in WAL mode, so any number of threads
+can read while one writes. New messages go to an in-memory write-back buffer
+that a background thread flushes in batches, and only recently used sessions
+stay in memory: the least recently used one is evicted when the cache is full
+and reloaded from the database the next time it is asked for.
+
+Message text and metadata are also indexed with SQLite FTS5 as they are
+written, so history can be searched by word, ranked by relevance.
+"""
+
+import json
+import logging
+import queue
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .context import ContextEntry, ContextManager, ContextRecord
+
+logger = logging.getLogger(__name__)
+
+# Statements are kept as constants so each connection's statement cache
+# compiles them once and reuses the prepared statement afterwards
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS messages (
+        id INTEGER PRIMARY KEY,
+        session TEXT NOT NULL,
+        timestamp REAL NOT NULL,
+        role TEXT NOT NULL,
+        content TEXT NOT NULL,
+        metadata TEXT
+    );
+    CREATE INDEX IF NOT EXISTS messages_by_session ON messages (session, id);
+    CREATE TABLE IF NOT EXISTS sessions (
+        session TEXT PRIMARY KEY,
+        started REAL NOT NULL,
+        last_seen REAL NOT NULL
+    ) WITHOUT ROWID;
+"""
+# Full-text index kept in step with the messages table by triggers. Session
+# and role are indexed too, so filtering on them narrows the match inside
+# FTS5 instead of ranking every match and discarding most of them
+_FTS_SCHEMA = """
+    CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+        content, metadata, session, role,
+        content='messages', content_rowid='id', tokenize='porter unicode61'
+    );
+    CREATE TRIGGER IF NOT EXISTS messages_fts_insert AFTER INSERT ON messages BEGIN
+        INSERT INTO messages_fts (rowid, content, metadata, session, role)
+        VALUES (new.id, new.content, new.metadata, new.session, new.role);
+    END;
+    CREATE TRIGGER IF NOT EXISTS messages_fts_delete AFTER DELETE ON messages BEGIN
+        INSERT INTO messages_fts (messages_fts, rowid, content, metadata, session, role)
+        VALUES ('delete', old.id, old.content, old.metadata, old.session, old.role);
+    END;
+    CREATE INDEX IF NOT EXISTS messages_by_time ON messages (timestamp);
+"""
+_INSERT_MESSAGE = "INSERT INTO messages (session, timestamp, role, content, metadata) VALUES (?, ?, ?, ?, ?)"
+_TOUCH_SESSION = (
+    "INSERT INTO sessions (session, started, last_seen) VALUES (?, ?, ?) "
+    "ON CONFLICT (session) DO UPDATE SET last_seen = MAX(last_seen, excluded.last_seen)"
+)
+_SELECT_RECENT = (
+    "SELECT timestamp, role, content, metadata FROM messages "
+    "WHERE session = ? ORDER BY id DESC LIMIT ?"
+)
+_SELECT_SESSIONS = "SELECT session, started, last_seen FROM sessions ORDER BY last_seen DESC LIMIT ?"
+_DELETE_MESSAGES = "DELETE FROM messages WHERE session = ?"
+_DELETE_SESSION = "DELETE FROM sessions WHERE session = ?"
+# Filters apply before the LIMIT, so a filtered search still fills it.
+# Session and role are already part of the match expression, so the exact
+# comparisons only guard against ids that tokenize alike; unused filters are
+# NULL, so one prepared statement serves every search
+_SEARCH = (
+    "SELECT m.timestamp, m.role, m.content, m.metadata "
+    "FROM messages_fts JOIN messages AS m ON m.id = messages_fts.rowid "
+    "WHERE messages_fts MATCH :query "
+    "AND (:session IS NULL OR m.session = :session) "
+    "AND (:since IS NULL OR m.timestamp >= :since) "
+    "AND (:role IS NULL OR m.role = :role) "
+    "ORDER BY messages_fts.rank LIMIT :limit"
+)
+
+# Context section keys and the SessionStore arguments they set
+_CONFIG_OPTIONS = {
+    'sessions_path': 'path',
+    'max_sessions': 'max_sessions',
+    'max_history': 'max_history',
+    'flush_interval': 'flush_interval',
+}
+
+# A pending row of the messages table
+_Row = Tuple[str, float, str, str, Optional[str]]
+
+
+def _as_epoch(value: Union[datetime, float, str]) -> float:
+    """Turn a datetime, ISO string or epoch seconds into epoch seconds."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value).timestamp()
+    return float(value)
+
+
+def _phrase(text: str) -> str:
+    """Quote text as an FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _match_expression(query: str, session_id: Optional[str] = None, role: Optional[str] = None) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must appear in the text or
+    metadata, and the last may be a prefix (so a filter box matches as the
+    user types). Session and role narrow the match; the exact comparison in
+    _SEARCH keeps ids that tokenize alike apart.
+    """
+    words = re.findall(r"\w+", query.lower())
+    if not words:
+        return None
+    expression = "{content metadata} : (" + " ".join(_phrase(word) for word in words) + "*)"
+    if session_id is not None and re.search(r"\w", session_id):
+        expression += " AND session : " + _phrase(session_id)
+    if role is not None and re.search(r"\w", role):
+        expression += " AND role : " + _phrase(role)
+    return expression
+
+
+class SessionStore:
+    """SQLite-backed store of per-session conversation context."""
+    
+    def __init__(
+        self,
+        path: str = "sara_sessions.db",
+        max_sessions: int = 256,
+        max_history: int = 50,
+        flush_interval: float = 1.0,
+        flush_batch: int = 256
+    ):
+        """
+        Open (or create) a session store.
+        
+        Args:
+            path: SQLite database file
+            max_sessions: Sessions kept in memory before the least recently
+                used one is evicted
+            max_history: History entries each session keeps in memory
+            flush_interval: Seconds new messages may wait before being written
+            flush_batch: Pending messages that trigger a write straight away
+        """
+        self.path = Path(path)
+        self.max_sessions = max(1, max_sessions)
+        self.max_history = max_history
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        
+        self._sessions: "OrderedDict[str, ContextManager]" = OrderedDict()
+        self._sessions_lock = threading.Lock()
+        
+        # Write-back buffer, written by one connection at a time
+        self._pending: List[_Row] = []
+        self._pending_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._writer = self._connect()
+        self._writer.executescript(_SCHEMA)
+        self._create_search_index()
+        
+        # Pool of read connections; WAL lets them run beside the writer
+        self._readers: "queue.SimpleQueue[sqlite3.Connection]" = queue.SimpleQueue()
+        self._connections: List[sqlite3.Connection] = [self._writer]
+        self._connections_lock = threading.Lock()
+        
+        self.loads = 0
+        self.evictions = 0
+        self.written = 0
+        
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sara-sessions", daemon=True)
+        self._thread.start()
+        
+        logger.info(f"Session store opened: {self.path}")
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "SessionStore":
+        """
+        Open a session store from the config's context section.
+        
+        Args:
+            config: The context section (see config.example.json); missing
+                keys keep their defaults
+        
+        Returns:
+            Session store
+        """
+        options = {option: config[key] for key, option in _CONFIG_OPTIONS.items() if key in config}
+        return cls(**options)
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection in autocommit mode with WAL journaling."""
+        db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+    
+    def _create_search_index(self):
+        """Create the full-text index, filling it from a store that predates it."""
+        existed = self._writer.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'messages_fts'"
+        ).fetchone()
+        self._writer.executescript(_FTS_SCHEMA)
+        if not existed:
+            self._writer.execute("INSERT INTO messages_fts (messages_fts) VALUES ('rebuild')")
+    
+    def _read(self, sql: str, parameters: Union[Tuple, Dict[str, Any]]) -> List[Tuple]:
+        """Run a query on a pooled read connection."""
+        try:
+            db = self._readers.get_nowait()
+        except queue.Empty:
+            db = self._connect()
+            with self._connections_lock:
+                self._connections.append(db)
+        try:
+            return db.execute(sql, parameters).fetchall()
+        finally:
+            self._readers.put(db)
+    
+    def get(self, session_id: str) -> ContextManager:
+        """
+        Get a session's context, loading it from the database if needed.
+        
+        Args:
+            session_id: Session identifier
+        
+        Returns:
+            The session's ContextManager (shared by every caller)
+        """
+        with self._sessions_lock:
+            context = self._sessions.get(session_id)
+            if context is not None:
+                self._sessions.move_to_end(session_id)
+                return context
+        
+        # Load outside the lock so one cold session does not stall the rest
+        context = ContextManager(max_history=self.max_history, session_id=session_id, store=self)
+        context.history.extend(self.load(session_id, self.max_history))
+        
+        with self._sessions_lock:
+            existing = self._sessions.get(session_id)
+            if existing is not None:
+                # Another thread loaded it first
+                self._sessions.move_to_end(session_id)
+                return existing
+            self._sessions[session_id] = context
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+        return context
+    
+    def load(self, session_id: str, count: int) -> List[ContextRecord]:
+        """
+        Read a session's most recent messages from the database.
+        
+        Args:
+            session_id: Session identifier
+            count: Maximum number of messages
+        
+        Returns:
+            Records, oldest first
+        """
+        # Messages still in the write-back buffer must be readable too
+        if self._pending:
+            self.flush()
+        rows = self._read(_SELECT_RECENT, (session_id, count))
+        self.loads += 1
+        return [
+            ContextRecord(timestamp, role, content, json.loads(metadata) if metadata else None)
+            for timestamp, role, content, metadata in reversed(rows)
+        ]
+    
+    def search(
+        self,
+        query: str,
+        session_id: Optional[str] = None,
+        since: Optional[Union[datetime, float, str]] = None,
+        role: Optional[str] = None,
+        limit: int = 20
+    ) -> List[ContextEntry]:
+        """
+        Find messages by the words in their text or metadata.
+        
+        Args:
+            query: Words to look for; all must appear, the last as a prefix
+            session_id: Only search this session (None for every session)
+            since: Only messages from this time on
+            role: Only messages from 'user' or 'assistant'
+            limit: Maximum number of results
+        
+        Returns:
+            Matching entries, most relevant first
+        """
+        expression = _match_expression(query, session_id, role)
+        if expression is None:
+            return []
+        if self._pending:
+            self.flush()
+        
+        rows = self._read(_SEARCH, {
+            'query': expression,
+            'session': session_id,
+            'since': _as_epoch(since) if since is not None else None,
+            'role': role,
+            'limit': limit,
+        })
+        return [
+            ContextRecord(timestamp, role, content, json.loads(metadata) if metadata else None).to_entry()
+            for timestamp, role, content, metadata in rows
+        ]
+    
+    def record(self, session_id: str, record: ContextRecord):
+        """
+        Queue a message to be written.
+        
+        Args:
+            session_id: Session identifier
+            record: The message
+        """
+        metadata = json.dumps(record.metadata, default=str) if record.metadata else None
+        with self._pending_lock:
+            self._pending.append((session_id, record.timestamp, record.role, record.content, metadata))
+            full = len(self._pending) >= self.flush_batch
+        if full:
+            self._wake.set()
+    
+    def flush(self):
+        """Write every queued message to the database."""
+        with self._write_lock:
+            with self._pending_lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return
+            
+            last_seen: Dict[str, Tuple[float, float]] = {}
+            for session_id, timestamp, *_ in rows:
+                started, _ = last_seen.get(session_id, (timestamp, timestamp))
+                last_seen[session_id] = (min(started, timestamp), timestamp)
+            
+            self._writer.execute("BEGIN")
+            try:
+                self._writer.executemany(_INSERT_MESSAGE, rows)
+                self._writer.executemany(
+                    _TOUCH_SESSION,
+                    [(session_id, started, seen) for session_id, (started, seen) in last_seen.items()]
+                )
+                self._writer.execute("COMMIT")
+            except Exception:
+                self._writer.execute("ROLLBACK")
+                with self._pending_lock:
+                    self._pending[:0] = rows
+                raise
+            self.written += len(rows)
+    
+    def delete(self, session_id: str):
+        """
+        Delete a session's stored history.
+        
+        Args:
+            session_id: Session identifier
+        """
+        self.flush()
+        with self._write_lock:
+            self._writer.execute("BEGIN")
+            self._writer.execute(_DELETE_MESSAGES, (session_id,))
+            self._writer.execute(_DELETE_SESSION, (session_id,))
+            self._writer.execute("COMMIT")
+    
+    def sessions(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        List stored sessions, most recently active first.
+        
+        Args:
+            limit: Maximum number of sessions
+        
+        Returns:
+            Dictionaries with session, started and last_seen (epoch seconds)
+        """
+        self.flush()
+        rows = self._read(_SELECT_SESSIONS, (limit,))
+        return [{'session': session, 'started': started, 'last_seen': seen} for session, started, seen in rows]
+    
+    def _run(self):
+        """Flush thread: write queued messages every interval, or sooner when many queue up."""
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error writing session history: {e}")
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get store statistics.
+        
+        Returns:
+            Dictionary of sessions in memory, loads, evictions, pending and
+            written messages
+        """
+        return {
+            'sessions_in_memory': len(self._sessions),
+            'max_sessions': self.max_sessions,
+            'loads': self.loads,
+            'evictions': self.evictions,
+            'pending': len(self._pending),
+            'written': self.written,
+        }
+    
+    def close(self):
+        """Write queued messages and close the database."""
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+        with self._connections_lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
@@ -0,0 +1,219 @@
+"""
+VAD - Voice-activity detection over PCM frames.
+
+Frames are classified from three features computed with NumPy over strided
+frame views of the signal, so a whole block is framed without copying:
+
+- short-time energy (RMS), against the capture's running noise floor
+- zero-crossing rate, high for fricatives such as "s"
+- spectral flatness over the speech band, near 0 for voiced (harmonic)
+  sound and near 0.5 or above for noise
+
+A frame is speech if it is loud and either tonal or fricative. Decisions are
+smoothed with a hangover, so the quiet consonants inside and at the end of
+a word are kept, and an endpointer turns them into phrase start and end.
+"""
+
+import logging
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available, voice-activity detection disabled. Install with: pip install numpy")
+
+SAMPLE_RATE = 16000
+
+
+def frame_view(samples: "np.ndarray", frame_samples: int, hop: Optional[int] = None) -> "np.ndarray":
+    """
+    View a signal as frames without copying it.
+    
+    Args:
+        samples: 1-D PCM samples
+        frame_samples: Samples per frame
+        hop: Step between frames (default: frame_samples, no overlap)
+    
+    Returns:
+        Read-only array of frames x frame_samples sharing the signal's memory;
+        a trailing partial frame is left out
+    """
+    hop = hop or frame_samples
+    if len(samples) < frame_samples:
+        return np.zeros((0, frame_samples), dtype=samples.dtype)
+    return sliding_window_view(samples, frame_samples)[::hop]
+
+
+class VoiceActivityDetector:
+    """Classifies frames as speech or not and finds where phrases end."""
+    
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = 20,
+        energy_ratio: float = 3.0,
+        min_energy: float = 100.0,
+        flatness_max: float = 0.1,
+        zcr_fricative: float = 0.4,
+        hangover_ms: int = 200,
+        onset_ms: int = 40
+    ):
+        """
+        Initialize detector.
+        
+        Args:
+            sample_rate: Samples per second
+            frame_ms: Frame length the decisions are made on
+            energy_ratio: How far above the noise floor a frame must be
+            min_energy: RMS that always counts as silence
+            flatness_max: Highest spectral flatness of voiced sound
+            zcr_fricative: Lowest zero-crossing rate of a fricative
+            hangover_ms: How long speech is assumed to go on after the last
+                speech frame
+            onset_ms: Speech needed before a phrase counts as started, so
+                clicks and knocks do not start one
+        
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        if not NUMPY_AVAILABLE:
+            raise RuntimeError("NumPy is required for voice-activity detection. Install with: pip install numpy")
+        self.sample_rate = sample_rate
+        self.frame_samples = sample_rate * frame_ms // 1000
+        self.energy_ratio = energy_ratio
+        self.min_energy = min_energy
+        self.flatness_max = flatness_max
+        self.zcr_fricative = zcr_fricative
+        self.hangover_frames = max(0, hangover_ms // frame_ms)
+        self.onset_frames = max(1, onset_ms // frame_ms)
+        
+        self._taper = np.hanning(self.frame_samples).astype(np.float32)
+        freqs = np.fft.rfftfreq(self.frame_samples, 1.0 / sample_rate)
+        self._band = (freqs >= 100) & (freqs <= 4000)
+    
+    def features(self, frames: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """
+        Compute the frame features, vectorized over all frames.
+        
+        Args:
+            frames: frames x frame_samples PCM (a frame_view, or rows of the
+                capture ring buffer)
+        
+        Returns:
+            RMS energy, zero-crossing rate (0-1) and spectral flatness (0-1)
+            per frame
+        """
+        samples = frames.shape[1]
+        signal = frames.astype(np.float32)
+        energy = np.sqrt(np.einsum('ij,ij->i', signal, signal) / samples)
+        crossings = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1)
+        zcr = crossings / (samples - 1)
+        
+        spectrum = np.fft.rfft(signal * self._taper, axis=1)[:, self._band]
+        power = spectrum.real ** 2 + spectrum.imag ** 2 + 1e-3
+        flatness = np.exp(np.log(power).mean(axis=1)) / power.mean(axis=1)
+        return energy, zcr, flatness
+    
+    def classify(self, frames: "np.ndarray", noise_floor: Optional[float] = None) -> "np.ndarray":
+        """
+        Decide frame by frame whether there is speech, without smoothing.
+        
+        Args:
+            frames: frames x frame_samples PCM
+            noise_floor: RMS of the background (None: only min_energy applies)
+        
+        Returns:
+            Boolean array, True for speech frames
+        """
+        energy, zcr, flatness = self.features(frames)
+        loud = energy > max(self.min_energy, (noise_floor or 0.0) * self.energy_ratio)
+        return loud & ((flatness < self.flatness_max) | (zcr > self.zcr_fricative))
+    
+    def smooth(self, speech: "np.ndarray") -> "np.ndarray":
+        """
+        Apply the hangover: a frame is speech if any of the frames up to
+        hangover_frames before it was.
+        
+        Args:
+            speech: Raw decisions from classify()
+        
+        Returns:
+            Smoothed decisions
+        """
+        if not self.hangover_frames or not len(speech):
+            return speech
+        counts = np.cumsum(speech, dtype=np.int32)
+        lagged = np.concatenate((np.zeros(self.hangover_frames + 1, dtype=np.int32), counts))[:len(counts)]
+        return counts - lagged > 0
+    
+    def trim(self, samples: "np.ndarray", noise_floor: Optional[float] = None) -> "np.ndarray":
+        """
+        Drop the non-speech frames of a recording, keeping hangover.
+        
+        Args:
+            samples: 1-D PCM samples
+            noise_floor: RMS of the background
+        
+        Returns:
+            The speech frames joined together (empty if there were none)
+        """
+        frames = frame_view(samples, self.frame_samples)
+        keep = self.smooth(self.classify(frames, noise_floor))
+        return frames[keep].reshape(-1)
+    
+    def endpointer(self, pause_seconds: float = 0.5) -> "Endpointer":
+        """
+        Get a fresh endpointer for one phrase.
+        
+        Args:
+            pause_seconds: Silence after the last speech frame that ends the
+                phrase (at least the hangover)
+        
+        Returns:
+            Endpointer
+        """
+        frame_seconds = self.frame_samples / self.sample_rate
+        return Endpointer(self, max(self.hangover_frames + 1, int(round(pause_seconds / frame_seconds))))
+
+
+class Endpointer:
+    """Streaming phrase start/end decisions, one frame at a time."""
+    
+    def __init__(self, vad: VoiceActivityDetector, pause_frames: int):
+        self.vad = vad
+        self.pause_frames = pause_frames
+        self.started = False  # Onset seen
+        self.ended = False  # Pause after speech seen
+        self.speech = False  # Smoothed decision for the last frame
+        self._run = 0  # Consecutive raw speech frames
+        self._since_speech = None  # Frames since the last raw speech frame
+    
+    def update(self, speech: bool) -> bool:
+        """
+        Feed the raw decision for the next frame.
+        
+        Args:
+            speech: classify() result for the frame
+        
+        Returns:
+            Smoothed decision: True while speech or its hangover goes on
+        """
+        if speech:
+            self._run += 1
+            self._since_speech = 0
+        else:
+            self._run = 0
+            if self._since_speech is not None:
+                self._since_speech += 1
+        
+        if not self.started and self._run >= self.vad.onset_frames:
+            self.started = True
+        self.speech = self._since_speech is not None and self._since_speech <= self.vad.hangover_frames
+        if self.started and self._since_speech >= self.pause_frames:
+            self.ended = True
+        return self.speech
@@ -6,17 +6,42 @@ This module handles all voice I/O for Sara AI Max.
 
 import asyncio
 import logging
-from typing import Optional
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional
 import pyttsx3
 
+from .audio import AudioCapture, AudioSource, FrameReader, MicrophoneSource, to_audio_data
+from .wakeword import NUMPY_AVAILABLE, WakeWordDetector, wait_for_wake_word
+
 logger = logging.getLogger(__name__)
 
+# Voice section keys; each sets the VoiceEngine argument of the same name
+_CONFIG_OPTIONS = ('frame_ms', 'buffer_seconds', 'pause_seconds', 'wake_word_model')
+
 
 class VoiceEngine:
     """Handles wake word detection, STT, and TTS."""
     
-    def __init__(self):
-        """Initialize voice engine."""
+    def __init__(
+        self,
+        source: Optional[AudioSource] = None,
+        frame_ms: int = 20,
+        buffer_seconds: float = 10.0,
+        wake_word_model: Optional[str] = "sara_wakeword.npz",
+        pause_seconds: float = 0.5
+    ):
+        """
+        Initialize voice engine.
+        
+        Args:
+            source: Audio source (default: the microphone, opened on first listen)
+            frame_ms: Capture frame length in milliseconds
+            buffer_seconds: Audio buffered for listeners
+            wake_word_model: Enrolled wake-word templates (see enroll_wake_word);
+                without them the wake word is recognized online
+            pause_seconds: Silence after speech that ends a phrase
+        """
         # Initialize TTS engine
         self.tts_engine = pyttsx3.init()
         self.tts_engine.setProperty('rate', 160)  # Speed
@@ -29,8 +54,81 @@ class VoiceEngine:
         
         self.listening = False
         
+        # One capture stream for the engine's lifetime, started on first listen
+        self._source = source
+        self._frame_ms = frame_ms
+        self._buffer_seconds = buffer_seconds
+        self._pause_seconds = pause_seconds
+        self.capture: Optional[AudioCapture] = None
+        self._reader: Optional[FrameReader] = None
+        self._recognizer = None
+        
+        self.wake_word_model = wake_word_model
+        self.wake_word: Optional[WakeWordDetector] = None
+        if not NUMPY_AVAILABLE:
+            logger.warning("NumPy not available, listening is disabled")
+        elif wake_word_model and Path(wake_word_model).exists():
+            try:
+                self.wake_word = WakeWordDetector.load(wake_word_model)
+                logger.info(f"On-device wake word loaded from {wake_word_model}")
+            except Exception as e:
+                logger.error(f"Could not load wake-word model: {e}")
+        
         logger.info("Voice engine initialized")
     
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], **kwargs) -> "VoiceEngine":
+        """
+        Build a voice engine from the config's voice section.
+        
+        Args:
+            config: The voice section (see config.example.json); missing
+                keys keep their defaults
+            **kwargs: Further arguments, such as the audio source; they
+                win over the section
+        
+        Returns:
+            Voice engine
+        """
+        options = {key: config[key] for key in _CONFIG_OPTIONS if key in config}
+        options.update(kwargs)
+        return cls(**options)
+    
+    def _listener(self) -> FrameReader:
+        """
+        Start capture if needed and get the engine's frame reader.
+        
+        A capture whose thread has ended (the microphone was unplugged, or
+        reading it failed) is replaced by a fresh one. A source passed to
+        the engine is not reopened: once it ends, listening hears nothing.
+        """
+        if self.capture is not None and self.capture.ended and self._source is None:
+            logger.warning("Audio capture ended, reopening the microphone")
+            self.capture.stop()
+            self.capture = None
+        if self.capture is None:
+            source = self._source or MicrophoneSource()
+            self.capture = AudioCapture(source, frame_ms=self._frame_ms, buffer_seconds=self._buffer_seconds)
+            self.capture.start()
+            self._reader = self.capture.reader()
+        return self._reader
+    
+    async def _record(self, timeout: Optional[float], phrase_time_limit: Optional[float]):
+        """Record the next phrase off the event loop; None if nothing was said."""
+        reader = self._listener()
+        return await asyncio.to_thread(
+            self.capture.record_phrase, reader, timeout, phrase_time_limit, self._pause_seconds
+        )
+    
+    async def _transcribe(self, samples) -> str:
+        """Send a recorded phrase to the speech recognizer."""
+        import speech_recognition as sr
+        
+        if self._recognizer is None:
+            self._recognizer = sr.Recognizer()
+        audio = to_audio_data(samples, self.capture.sample_rate)
+        return await asyncio.to_thread(self._recognizer.recognize_google, audio)
+    
     async def listen_for_wake_word(self, timeout: int = 10) -> bool:
         """
         Listen for the wake word "Hey Sara" or "Sara".
@@ -41,34 +139,43 @@ class VoiceEngine:
         Returns:
             True if wake word detected, False otherwise
         """
+        if self.wake_word is not None:
+            # On device, frame by frame as audio arrives
+            try:
+                reader = self._listener()
+                detection = await asyncio.to_thread(wait_for_wake_word, self.wake_word, reader, timeout)
+                if detection is not None:
+                    logger.info(
+                        f"Wake word at {detection.end_time:.2f}s "
+                        f"(score {detection.score:.3f}, {detection.processing_ms:.2f} ms to process)"
+                    )
+                    return True
+            except Exception as e:
+                logger.error(f"Error in wake word detection: {e}")
+            return False
+        
         try:
-            # For MVP, we'll use a simple approach
-            # In production, use Porcupine or similar for wake word detection
+            # Without enrolled templates, recognize the phrase online
             import speech_recognition as sr
             
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
-                # Adjust for ambient noise
-                recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            try:
+                # Listen with timeout
+                samples = await self._record(timeout, phrase_time_limit=3)
+                if samples is None:
+                    return False  # Timeout, continue listening
                 
-                try:
-                    # Listen with timeout
-                    audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=3)
-                    
-                    # Recognize using Google Speech Recognition
-                    text = recognizer.recognize_google(audio).lower()
-                    logger.info(f"Heard: {text}")
+                # Recognize using Google Speech Recognition
+                text = (await self._transcribe(samples)).lower()
+                logger.info(f"Heard: {text}")
+                
+                # Check for wake words
+                if 'hey sara' in text or 'sara' in text or 'hey sarah' in text:
+                    return True
                     
-                    # Check for wake words
-                    if 'hey sara' in text or 'sara' in text or 'hey sarah' in text:
-                        return True
-                        
-                except sr.WaitTimeoutError:
-                    pass  # Timeout, continue listening
-                except sr.UnknownValueError:
-                    pass  # Could not understand audio
-                except Exception as e:
-                    logger.error(f"Error in wake word detection: {e}")
+            except sr.UnknownValueError:
+                pass  # Could not understand audio
+            except Exception as e:
+                logger.error(f"Error in wake word detection: {e}")
                     
         except Exception as e:
             logger.error(f"Voice engine error: {e}")
@@ -88,34 +195,86 @@ class VoiceEngine:
         try:
             import speech_recognition as sr
             
-            recognizer = sr.Recognizer()
-            with sr.Microphone() as source:
-                logger.info("Listening for command...")
-                
-                # Adjust for ambient noise
-                recognizer.adjust_for_ambient_noise(source, duration=0.3)
-                
-                try:
-                    # Listen for command
-                    audio = recognizer.listen(source, timeout=timeout, phrase_time_limit=10)
-                    
-                    # Recognize speech
-                    text = recognizer.recognize_google(audio)
-                    logger.info(f"Command recognized: {text}")
-                    return text
-                    
-                except sr.WaitTimeoutError:
+            logger.info("Listening for command...")
+            
+            try:
+                # Listen for command
+                samples = await self._record(timeout, phrase_time_limit=10)
+                if samples is None:
                     logger.warning("Timeout waiting for command")
                     return None
-                except sr.UnknownValueError:
-                    logger.warning("Could not understand audio")
-                    self.speak("Sorry, I didn't understand that.")
-                    return None
+                
+                # Recognize speech
+                text = await self._transcribe(samples)
+                logger.info(f"Command recognized: {text}")
+                return text
+            
+            except sr.UnknownValueError:
+                logger.warning("Could not understand audio")
+                self.speak("Sorry, I didn't understand that.")
+                return None
                     
         except Exception as e:
             logger.error(f"Error listening for command: {e}")
             return None
     
+    async def listen_while(self, stop: threading.Event) -> Optional[str]:
+        """
+        Listen for speech on a reader of its own until something is heard.
+        
+        Used while a plan runs, so "cancel" is heard without taking the
+        reader the main loop listens on.
+        
+        Args:
+            stop: Set when there is nothing left to listen for
+        
+        Returns:
+            Recognized text, or None once stop is set
+        """
+        import speech_recognition as sr
+        
+        self._listener()
+        reader = self.capture.reader()
+        while not stop.is_set():
+            samples = await asyncio.to_thread(
+                self.capture.record_phrase, reader, 0.5, 3, self._pause_seconds
+            )
+            if samples is None or stop.is_set():
+                continue
+            try:
+                return await self._transcribe(samples)
+            except sr.UnknownValueError:
+                continue
+            except Exception as e:
+                logger.error(f"Error listening while busy: {e}")
+                return None
+        return None
+    
+    async def enroll_wake_word(self, takes: int = 3) -> bool:
+        """
+        Record the user saying the wake word and enable on-device detection.
+        
+        Args:
+            takes: Recordings to enroll from
+        
+        Returns:
+            True if enrolled (and saved to wake_word_model), False otherwise
+        """
+        recordings = []
+        for take in range(takes):
+            self.speak(f"Say hey Sara ({take + 1} of {takes})")
+            samples = await self._record(timeout=5, phrase_time_limit=3)
+            if samples is None:
+                self.speak("I didn't hear anything.")
+                return False
+            recordings.append(samples)
+        
+        self.wake_word = WakeWordDetector.enroll(recordings, sample_rate=self.capture.sample_rate)
+        if self.wake_word_model:
+            self.wake_word.save(self.wake_word_model)
+        logger.info(f"Wake word enrolled from {takes} recordings (threshold {self.wake_word.threshold:.3f})")
+        return True
+    
     def speak(self, text: str):
         """
         Speak the given text using TTS.
@@ -127,6 +286,9 @@ class VoiceEngine:
             logger.info(f"Speaking: {text}")
             self.tts_engine.say(text)
             self.tts_engine.runAndWait()
+            if self._reader is not None:
+                # Do not treat Sara's own voice as the next command
+                self._reader.skip_to_now()
         except Exception as e:
             logger.error(f"TTS error: {e}")
     
@@ -136,3 +298,5 @@ class VoiceEngine:
             self.tts_engine.stop()
         except:
             pass
+        if self.capture is not None:
+            self.capture.stop()
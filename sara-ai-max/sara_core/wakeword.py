@@ -0,0 +1,499 @@
+"""
+Wake Word - On-device wake-word spotting over streaming PCM frames.
+
+Audio is turned into MFCC features (log-mel energies through a DCT) with
+NumPy, 25 ms windows every 10 ms, and matched against a few recorded
+examples of the wake word by subsequence dynamic time warping. Matching is
+streaming: each new feature row updates one cost column per template, so
+spotting costs a fraction of a millisecond per 10 ms of audio and no audio
+leaves the machine.
+
+Templates are enrolled from recordings of the user saying the wake word::
+
+    detector = WakeWordDetector.enroll([recording1, recording2, recording3])
+    detector.save("sara_wakeword.npz")
+"""
+
+import logging
+import time
+from collections import deque
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("NumPy not available, wake-word detector disabled. Install with: pip install numpy")
+
+SAMPLE_RATE = 16000
+
+
+def _require_numpy():
+    """Fail clearly, instead of with a NameError, when NumPy is missing."""
+    if not NUMPY_AVAILABLE:
+        raise RuntimeError("NumPy is required for the wake-word detector. Install with: pip install numpy")
+
+
+def mel_filterbank(n_mels: int, n_fft: int, sample_rate: int, fmin: float = 20.0, fmax: Optional[float] = None) -> "np.ndarray":
+    """
+    Build triangular mel filters.
+    
+    Args:
+        n_mels: Number of filters
+        n_fft: FFT size
+        sample_rate: Samples per second
+        fmin: Lowest frequency covered
+        fmax: Highest frequency covered (default: Nyquist)
+    
+    Returns:
+        Array of n_mels x (n_fft // 2 + 1) filter weights
+    """
+    fmax = fmax or sample_rate / 2
+    to_mel = lambda hz: 2595.0 * np.log10(1.0 + hz / 700.0)
+    to_hz = lambda mel: 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+    
+    edges = to_hz(np.linspace(to_mel(fmin), to_mel(fmax), n_mels + 2))
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    lower, center, upper = edges[:-2, None], edges[1:-1, None], edges[2:, None]
+    rising = (bins - lower) / (center - lower)
+    falling = (upper - bins) / (upper - center)
+    return np.maximum(0.0, np.minimum(rising, falling))
+
+
+def dct_matrix(n_out: int, n_in: int) -> "np.ndarray":
+    """Orthonormal DCT-II basis, n_out x n_in."""
+    k = np.arange(n_out)[:, None]
+    n = np.arange(n_in)[None, :]
+    basis = np.cos(np.pi * k * (2 * n + 1) / (2 * n_in)) * np.sqrt(2.0 / n_in)
+    basis[0] /= np.sqrt(2.0)
+    return basis
+
+
+class FeatureExtractor:
+    """Computes MFCC rows from PCM, in one batch or as audio streams in."""
+    
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        window_ms: int = 25,
+        hop_ms: int = 10,
+        n_mels: int = 26,
+        n_mfcc: int = 13,
+        n_fft: int = 512
+    ):
+        """
+        Initialize extractor.
+        
+        Args:
+            sample_rate: Samples per second
+            window_ms: Analysis window length
+            hop_ms: Step between windows
+            n_mels: Mel filters
+            n_mfcc: Cepstral coefficients, including c0 (which is dropped,
+                so features do not depend on loudness)
+            n_fft: FFT size
+        
+        Raises:
+            RuntimeError: If NumPy is not installed
+        """
+        _require_numpy()
+        self.sample_rate = sample_rate
+        self.window = sample_rate * window_ms // 1000
+        self.hop = sample_rate * hop_ms // 1000
+        self.n_fft = n_fft
+        self._taper = np.hamming(self.window).astype(np.float32)
+        self._mel = mel_filterbank(n_mels, n_fft, sample_rate).astype(np.float32).T
+        self._dct = dct_matrix(n_mfcc, n_mels)[1:].astype(np.float32).T
+        self._pending = np.zeros(0, dtype=np.float32)
+    
+    @property
+    def dimensions(self) -> int:
+        """Length of a feature row."""
+        return self._dct.shape[1]
+    
+    def features(self, samples: "np.ndarray") -> "np.ndarray":
+        """
+        Compute features for every full window in a block of audio.
+        
+        Args:
+            samples: PCM samples (any numeric dtype)
+        
+        Returns:
+            Array of windows x dimensions, each row scaled to unit length
+        """
+        samples = np.asarray(samples, dtype=np.float32)
+        if len(samples) < self.window:
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        
+        # Pre-emphasis, then overlapping windows as a strided view (no copy)
+        emphasized = np.empty_like(samples)
+        emphasized[0] = samples[0]
+        np.subtract(samples[1:], 0.97 * samples[:-1], out=emphasized[1:])
+        windows = sliding_window_view(emphasized, self.window)[::self.hop]
+        
+        spectrum = np.fft.rfft(windows * self._taper, n=self.n_fft)
+        power = spectrum.real ** 2 + spectrum.imag ** 2
+        mfcc = np.log(power.astype(np.float32) @ self._mel + 1e-3) @ self._dct
+        mfcc /= np.linalg.norm(mfcc, axis=1, keepdims=True) + 1e-9
+        return mfcc
+    
+    def push(self, samples: "np.ndarray") -> "np.ndarray":
+        """
+        Feed streamed audio and get the feature rows it completes.
+        
+        Args:
+            samples: The next PCM samples
+        
+        Returns:
+            New feature rows (possibly none)
+        """
+        buffered = np.concatenate((self._pending, np.asarray(samples, dtype=np.float32)))
+        if len(buffered) < self.window:
+            self._pending = buffered
+            return np.zeros((0, self.dimensions), dtype=np.float32)
+        count = (len(buffered) - self.window) // self.hop + 1
+        rows = self.features(buffered[:(count - 1) * self.hop + self.window])
+        self._pending = buffered[count * self.hop:]
+        return rows
+    
+    def reset(self):
+        """Forget streamed audio not yet turned into features."""
+        self._pending = np.zeros(0, dtype=np.float32)
+
+
+def trim_silence(samples: "np.ndarray", sample_rate: int = SAMPLE_RATE, ratio: float = 0.1) -> "np.ndarray":
+    """
+    Cut leading and trailing quiet audio from a recording.
+    
+    Args:
+        samples: PCM samples
+        sample_rate: Samples per second
+        ratio: Frames below this fraction of the loudest frame's RMS are quiet
+    
+    Returns:
+        The loud part of the recording
+    """
+    samples = np.asarray(samples)
+    frame = sample_rate // 100
+    usable = len(samples) // frame * frame
+    if not usable:
+        return samples
+    rms = np.sqrt(np.mean(np.square(samples[:usable].reshape(-1, frame), dtype=np.float32), axis=1))
+    loud = np.flatnonzero(rms >= rms.max() * ratio)
+    return samples[loud[0] * frame:(loud[-1] + 1) * frame]
+
+
+class WakeWordDetection(BaseModel):
+    """A spotted wake word."""
+    
+    score: float  # Mean per-frame distance of the match (lower is closer)
+    template: int  # Index of the template that matched
+    end_time: float  # Seconds of audio fed to the detector when the match ended
+    processing_ms: float  # Time process() took on the frame that reported it (not the delay after the word)
+
+
+class _TemplateMatcher:
+    """Streaming subsequence DTW of one template against incoming features."""
+    
+    __slots__ = ('template', 'cost', 'length')
+    
+    def __init__(self, template: "np.ndarray"):
+        self.template = template
+        self.cost = np.full(len(template), np.inf, dtype=np.float32)
+        self.length = np.zeros(len(template), dtype=np.float32)
+    
+    def step(self, feature: "np.ndarray") -> float:
+        """
+        Advance by one input frame.
+        
+        A template frame may repeat (slower speech) or be skipped (faster),
+        and a match may begin at any input frame; predecessors are chosen by
+        mean cost so long and short paths compete fairly.
+        
+        Returns:
+            Mean cost of the best match ending at this frame
+        """
+        distance = 1.0 - self.template @ feature
+        cost, length = self.cost, self.length
+        
+        # Candidates: stay on the same template frame, advance one, or skip one
+        stay_cost, stay_length = cost, length
+        one_cost = np.concatenate(([0.0], cost[:-1]))
+        one_length = np.concatenate(([0.0], length[:-1]))
+        two_cost = np.concatenate(([np.inf, np.inf], cost[:-2]))
+        two_length = np.concatenate(([0.0, 0.0], length[:-2]))
+        
+        candidates_cost = np.stack((stay_cost, one_cost, two_cost))
+        candidates_length = np.stack((stay_length, one_length, two_length))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(candidates_length > 0, candidates_cost / candidates_length, candidates_cost)
+        best = np.argmin(mean, axis=0)
+        columns = np.arange(len(distance))
+        
+        self.cost = candidates_cost[best, columns] + distance
+        self.length = candidates_length[best, columns] + 1.0
+        return float(self.cost[-1] / self.length[-1])
+    
+    def reset(self):
+        """Forget partial matches."""
+        self.cost.fill(np.inf)
+        self.length.fill(0.0)
+
+
+class WakeWordDetector:
+    """Spots the wake word in streamed audio by matching enrolled templates."""
+    
+    def __init__(
+        self,
+        templates: Sequence["np.ndarray"],
+        threshold: float,
+        sample_rate: int = SAMPLE_RATE,
+        refractory_seconds: float = 1.0,
+        settle_seconds: float = 0.1
+    ):
+        """
+        Initialize detector.
+        
+        Args:
+            templates: Feature arrays of enrolled wake-word recordings
+            threshold: Highest mean match distance that counts as a detection
+            sample_rate: Samples per second of the audio fed in
+            refractory_seconds: Quiet time after a detection, so one utterance
+                is reported once
+            settle_seconds: How long a match must go without improving before
+                it is reported. A match can reach the end of a template while
+                the last vowel is still being spoken; waiting for its best
+                score puts the reported end where the word ends.
+        
+        Raises:
+            ValueError: If there are no templates
+            RuntimeError: If NumPy is not installed
+        """
+        _require_numpy()
+        if not templates:
+            raise ValueError("At least one wake-word template is needed")
+        self.templates = [np.asarray(template, dtype=np.float32) for template in templates]
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self.refractory_seconds = refractory_seconds
+        
+        self.extractor = FeatureExtractor(sample_rate)
+        self._matchers = [_TemplateMatcher(template) for template in self.templates]
+        self._hop_seconds = self.extractor.hop / sample_rate
+        self._rows = 0  # Feature rows processed
+        self._quiet_until = 0  # Row before which detections are suppressed
+        self._settle_rows = max(1, int(round(settle_seconds / self._hop_seconds)))
+        self._candidate: Optional[Tuple[int, int, float]] = None  # Best match so far: row, template, score
+        
+        self.frames = 0
+        self.processing_seconds = 0.0  # Total time spent in process()
+    
+    @classmethod
+    def enroll(
+        cls,
+        recordings: Sequence["np.ndarray"],
+        sample_rate: int = SAMPLE_RATE,
+        margin: float = 5.0
+    ) -> "WakeWordDetector":
+        """
+        Build a detector from recordings of the wake word.
+        
+        The threshold is set from how far the recordings are from each
+        other: a new utterance should be about as close to one of them as
+        they are among themselves.
+        
+        Args:
+            recordings: Two or more PCM recordings of the wake word
+            sample_rate: Samples per second
+            margin: Threshold as a multiple of the typical distance between
+                recordings
+        
+        Returns:
+            Detector
+        """
+        extractor = FeatureExtractor(sample_rate)
+        templates = [extractor.features(trim_silence(recording, sample_rate)) for recording in recordings]
+        
+        distances = []
+        for i, template in enumerate(templates):
+            for j, other in enumerate(templates):
+                if i != j:
+                    matcher = _TemplateMatcher(other)
+                    distances.append(min(matcher.step(row) for row in template))
+        typical = float(np.median(distances)) if distances else 0.1
+        return cls(templates, threshold=typical * margin, sample_rate=sample_rate)
+    
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "WakeWordDetector":
+        """
+        Load templates saved with save().
+        
+        Args:
+            path: .npz file
+        
+        Returns:
+            Detector
+        """
+        _require_numpy()
+        with np.load(path) as data:
+            count = int(data['count'])
+            templates = [data[f'template_{i}'] for i in range(count)]
+            kwargs.setdefault('threshold', float(data['threshold']))
+            kwargs.setdefault('sample_rate', int(data['sample_rate']))
+        return cls(templates, **kwargs)
+    
+    def save(self, path: str):
+        """
+        Save the templates and threshold.
+        
+        Args:
+            path: .npz file
+        """
+        arrays = {f'template_{i}': template for i, template in enumerate(self.templates)}
+        np.savez_compressed(
+            Path(path),
+            count=len(self.templates),
+            threshold=self.threshold,
+            sample_rate=self.sample_rate,
+            **arrays
+        )
+    
+    def process(self, samples: "np.ndarray") -> Optional[WakeWordDetection]:
+        """
+        Feed the next frame of audio.
+        
+        Args:
+            samples: PCM samples (typically one 10-30 ms frame)
+        
+        Returns:
+            Detection once a match has settled in this frame, otherwise None
+        """
+        started = time.perf_counter()
+        detection = None
+        for row in self.extractor.push(samples):
+            self._rows += 1
+            scores = [matcher.step(row) for matcher in self._matchers]
+            best = int(np.argmin(scores))
+            if self._rows < self._quiet_until or detection is not None:
+                continue
+            if scores[best] <= self.threshold and (self._candidate is None or scores[best] < self._candidate[2]):
+                self._candidate = (self._rows, best, scores[best])
+            elif self._candidate is not None and self._rows - self._candidate[0] >= self._settle_rows:
+                detection, self._candidate = self._candidate, None
+                self._quiet_until = self._rows + int(self.refractory_seconds / self._hop_seconds)
+                for matcher in self._matchers:
+                    matcher.reset()
+        
+        elapsed = time.perf_counter() - started
+        self.frames += 1
+        self.processing_seconds += elapsed
+        if detection is None:
+            return None
+        
+        row, template, score = detection
+        result = WakeWordDetection(
+            score=score,
+            template=template,
+            end_time=row * self._hop_seconds,
+            processing_ms=elapsed * 1000
+        )
+        logger.info(f"Wake word detected (score {score:.3f}, template {template})")
+        return result
+    
+    def detect(self, samples: "np.ndarray", frame_samples: int = 320) -> List[WakeWordDetection]:
+        """
+        Run a whole recording through the detector frame by frame.
+        
+        Args:
+            samples: PCM samples
+            frame_samples: Frame size fed per step
+        
+        Returns:
+            Detections in order
+        """
+        detections = []
+        for start in range(0, len(samples), frame_samples):
+            detection = self.process(samples[start:start + frame_samples])
+            if detection is not None:
+                detections.append(detection)
+        return detections
+    
+    def reset(self):
+        """Forget buffered audio and partial matches."""
+        self.extractor.reset()
+        self._candidate = None
+        for matcher in self._matchers:
+            matcher.reset()
+    
+    def stats(self) -> dict:
+        """
+        Get processing statistics.
+        
+        Returns:
+            Frames processed, mean milliseconds per frame and real-time load
+            (processing time as a fraction of the audio's duration)
+        """
+        audio_seconds = self._rows * self._hop_seconds
+        return {
+            'frames': self.frames,
+            'mean_ms': self.processing_seconds / self.frames * 1000 if self.frames else 0.0,
+            'load': self.processing_seconds / audio_seconds if audio_seconds else 0.0,
+        }
+
+
+def wait_for_wake_word(
+    detector: WakeWordDetector,
+    reader,
+    timeout: Optional[float] = None,
+    pre_roll_seconds: float = 0.3
+) -> Optional[WakeWordDetection]:
+    """
+    Feed captured speech to the detector until it fires.
+    
+    Frames the capture's voice-activity detector marks as silence are not
+    fed, so features are only computed while someone is talking; when speech
+    starts, the detector is reset and given the audio just before it.
+    
+    Args:
+        detector: Enrolled detector
+        reader: FrameReader over the audio capture
+        timeout: Seconds to listen (None: until capture ends)
+        pre_roll_seconds: Audio fed from before the start of speech
+    
+    Returns:
+        The detection, or None on timeout
+    """
+    capture = reader.capture
+    gate = capture.vad.endpointer()
+    pre_roll: deque = deque(maxlen=max(1, int(pre_roll_seconds * 1000 / capture.frame_ms)))
+    active = False
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    while True:
+        remaining = deadline - time.monotonic() if deadline is not None else None
+        if remaining is not None and remaining <= 0:
+            return None
+        frame = reader.read(remaining)
+        if frame is None:
+            return None
+        
+        if not gate.update(reader.speech):
+            active = False
+            pre_roll.append(frame)
+            continue
+        
+        frames = [frame]
+        if not active:
+            active = True
+            detector.reset()
+            frames = list(pre_roll) + frames
+            pre_roll.clear()
+        for frame in frames:
+            detection = detector.process(frame)
+            if detection is not None:
+                return detection
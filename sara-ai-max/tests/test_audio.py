@@ -0,0 +1,276 @@
+"""Test Audio - Tests for audio capture, driven by WAV files."""
+
+import wave
+
+import numpy as np
+import pytest
+
+from benchmarks.wakeword import synth
+from sara_core.audio import AudioCapture, WavSource, SAMPLE_RATE
+from sara_core.vad import VoiceActivityDetector, frame_view
+from sara_core.wakeword import WakeWordDetector, wait_for_wake_word
+
+
+def write_wav(path, samples):
+    """Write int16 mono samples as a 16 kHz WAV file."""
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(SAMPLE_RATE)
+        wav.writeframes(np.asarray(samples, dtype=np.int16).tobytes())
+
+
+def noise(seconds, level=30.0, seed=0):
+    """Background hiss."""
+    return np.random.default_rng(seed).normal(0, level, int(seconds * SAMPLE_RATE))
+
+
+def tone(seconds, level=3000.0, frequency=440.0):
+    """A loud stand-in for speech."""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return level * np.sin(2 * np.pi * frequency * t)
+
+
+class TestAudioCapture:
+    """Test audio capture."""
+    
+    def test_phrase_recorded_from_buffer(self, tmp_path):
+        """Test a phrase is cut out of the stream against the noise floor."""
+        path = tmp_path / "phrase.wav"
+        write_wav(path, np.concatenate((noise(1.0), tone(0.6) + noise(0.6, seed=1), noise(1.5, seed=2))))
+        
+        capture = AudioCapture(WavSource(str(path)), frame_ms=20)
+        reader = capture.reader(from_start=True)
+        capture.start()
+        samples = capture.record_phrase(reader, timeout=5, pause_seconds=0.5, pre_roll_seconds=0.2)
+        capture.stop()
+        
+        # Pre-roll, the tone and the hangover; the silence after it is dropped
+        assert samples is not None
+        assert 0.9 <= len(samples) / SAMPLE_RATE <= 1.1
+        assert 15 < capture.noise_floor < 60
+    
+    def test_pause_inside_phrase_kept(self, tmp_path):
+        """Test a pause shorter than pause_seconds stays in the phrase."""
+        path = tmp_path / "two_words.wav"
+        words = np.concatenate((tone(0.4), np.zeros(int(0.4 * SAMPLE_RATE)), tone(0.4)))
+        write_wav(path, np.concatenate((noise(1.0), words + noise(1.2, seed=1), noise(1.5, seed=2))))
+        
+        capture = AudioCapture(WavSource(str(path)), frame_ms=20)
+        reader = capture.reader(from_start=True)
+        capture.start()
+        samples = capture.record_phrase(reader, timeout=5, pause_seconds=0.5, pre_roll_seconds=0.2)
+        capture.stop()
+        
+        # Pre-roll, both words with the whole pause between them, and the hangover
+        assert samples is not None
+        assert 1.5 <= len(samples) / SAMPLE_RATE <= 1.7
+    
+    def test_readers_share_one_stream(self, tmp_path):
+        """Test several readers see every frame of one capture, and silence times out."""
+        path = tmp_path / "quiet.wav"
+        write_wav(path, noise(1.0))
+        
+        capture = AudioCapture(WavSource(str(path)), frame_ms=20)
+        first, second = capture.reader(), capture.reader()
+        capture.start()
+        assert capture.record_phrase(first, timeout=0.5) is None
+        
+        frames = 0
+        while second.read(timeout=1) is not None:
+            frames += 1
+        assert frames == capture.frames_captured == 50
+        capture.stop()
+    
+    def test_slow_reader_skips_overwritten_frames(self, tmp_path):
+        """Test a reader that falls behind the ring buffer resumes at the oldest frame."""
+        path = tmp_path / "long.wav"
+        write_wav(path, noise(2.0))
+        
+        capture = AudioCapture(WavSource(str(path)), frame_ms=20, buffer_seconds=0.5)
+        reader = capture.reader()
+        capture.start()
+        capture._thread.join()
+        
+        assert reader.read(timeout=1) is not None
+        assert reader.overruns == 100 - capture.capacity
+        assert reader.position == 100 - capture.capacity + 1
+    
+    def test_numpy_required(self, monkeypatch, tmp_path):
+        """Test a missing NumPy is reported clearly rather than as a NameError."""
+        from sara_core import audio, vad, wakeword
+        path = tmp_path / "quiet.wav"
+        write_wav(path, noise(0.1))
+        
+        for module in (audio, vad, wakeword):
+            monkeypatch.setattr(module, 'NUMPY_AVAILABLE', False)
+        with pytest.raises(RuntimeError, match="NumPy"):
+            AudioCapture(WavSource(str(path)))
+        with pytest.raises(RuntimeError, match="NumPy"):
+            VoiceActivityDetector()
+        with pytest.raises(RuntimeError, match="NumPy"):
+            WakeWordDetector.load(str(tmp_path / "missing.npz"))
+    
+    def test_voice_engine_from_config(self, monkeypatch):
+        """Test the config's voice section reaches the voice engine."""
+        from sara_core import voice_engine
+        
+        class SilentTTS:
+            def setProperty(self, name, value):
+                pass
+            
+            def getProperty(self, name):
+                return []
+        
+        monkeypatch.setattr(voice_engine.pyttsx3, 'init', SilentTTS)
+        config = {'frame_ms': 30, 'buffer_seconds': 4.0, 'pause_seconds': 0.8, 'wake_word_model': 'custom.npz'}
+        engine = voice_engine.VoiceEngine.from_config(config)
+        
+        assert (engine._frame_ms, engine._buffer_seconds, engine._pause_seconds) == (30, 4.0, 0.8)
+        assert engine.wake_word_model == 'custom.npz'
+        assert voice_engine.VoiceEngine.from_config(config, wake_word_model=None).wake_word_model is None
+    
+    def test_ended_microphone_reopened(self, tmp_path, monkeypatch):
+        """Test the voice engine replaces a capture whose thread has ended."""
+        from sara_core import voice_engine
+        path = tmp_path / "short.wav"
+        write_wav(path, noise(0.2))
+        monkeypatch.setattr(voice_engine, 'MicrophoneSource', lambda: WavSource(str(path)))
+        
+        # Without TTS: only the capture state is needed
+        engine = voice_engine.VoiceEngine.__new__(voice_engine.VoiceEngine)
+        engine._source = None
+        engine._frame_ms = 20
+        engine._buffer_seconds = 1.0
+        engine.capture = None
+        engine._reader = None
+        
+        first = engine._listener()
+        dead = engine.capture
+        dead._thread.join()
+        assert dead.ended
+        
+        assert engine._listener() is not first
+        assert engine.capture is not dead
+        engine.capture.stop()
+
+
+
+@pytest.fixture(scope="module")
+def speaker():
+    return synth.Speaker(pitch=150, rate=1.0, tract=1.0, loudness=6000)
+
+
+@pytest.fixture(scope="module")
+def detector(speaker):
+    # Enrollment takes are recorded in a room too
+    takes = [synth.synthesize(synth.WAKE_WORD, speaker, seed=i) for i in range(3)]
+    recordings = [synth.scene([take], gap_seconds=(0.3, 0.5), seed=i)[0] for i, take in enumerate(takes)]
+    return WakeWordDetector.enroll(recordings)
+
+
+class TestWakeWord:
+    """Test on-device wake-word spotting."""
+    
+    def test_detects_wake_word(self, detector, speaker):
+        """Test each spoken wake word in a noisy stream is detected once."""
+        takes = [synth.synthesize(synth.WAKE_WORD, speaker, seed=10 + i) for i in range(3)]
+        audio, spans = synth.scene(takes, noise_level=60.0, seed=1)
+        
+        detector.reset()
+        detections = detector.detect(audio)
+        assert len(detections) == len(spans)
+        for detection, (start, end) in zip(detections, spans):
+            # The match settles where the word ends, not inside its last vowel
+            assert end - 0.1 <= detection.end_time <= end + 0.1
+    
+    def test_ignores_other_words(self, detector, speaker):
+        """Test distractor phrases do not wake Sara."""
+        names = ['okay', 'hello', 'what time', 'good morning', 'lock the screen']
+        takes = [synth.synthesize(synth.DISTRACTORS[name], speaker, seed=20 + i) for i, name in enumerate(names)]
+        audio, _ = synth.scene(takes, seed=2)
+        
+        detector.reset()
+        assert detector.detect(audio) == []
+    
+    def test_save_and_load(self, detector, tmp_path):
+        """Test templates and threshold survive a save/load round trip."""
+        path = tmp_path / "wakeword.npz"
+        detector.save(str(path))
+        loaded = WakeWordDetector.load(str(path))
+        
+        assert loaded.threshold == pytest.approx(detector.threshold)
+        assert len(loaded.templates) == len(detector.templates)
+        assert np.allclose(loaded.templates[0], detector.templates[0])
+    
+    def test_wait_on_capture(self, detector, speaker, tmp_path):
+        """Test the detector listens on a capture reader like the voice engine does."""
+        audio, _ = synth.scene([synth.synthesize(synth.WAKE_WORD, speaker, seed=30)], seed=3)
+        path = tmp_path / "wake.wav"
+        write_wav(path, audio)
+        
+        capture = AudioCapture(WavSource(str(path)))
+        reader = capture.reader(from_start=True)
+        capture.start()
+        fed = detector.frames
+        detection = wait_for_wake_word(detector, reader, timeout=5)
+        capture.stop()
+        
+        assert detection is not None
+        assert detection.processing_ms < 50
+        # Only speech was fed, not the silence before it
+        assert detector.frames - fed < reader.position - 10
+
+
+class TestVoiceActivity:
+    """Test voice-activity detection."""
+    
+    def test_classifies_frames(self, speaker):
+        """Test voiced sound and fricatives are speech, and room noise is not."""
+        vad = VoiceActivityDetector()
+        hiss = synth.background(1.0, 60.0)
+        assert not vad.classify(frame_view(hiss, vad.frame_samples), noise_floor=60.0).any()
+        
+        # Loud room noise is spectrally flat, so it is still not speech
+        assert not vad.classify(frame_view(hiss * 20, vad.frame_samples), noise_floor=60.0).any()
+        
+        vowel = synth.synthesize(['a', 'a'], speaker)
+        assert vad.classify(frame_view(vowel, vad.frame_samples), noise_floor=60.0).mean() > 0.8
+        fricative = synth.synthesize(['s', 's'], speaker)
+        assert vad.classify(frame_view(fricative, vad.frame_samples), noise_floor=60.0).mean() > 0.8
+    
+    def test_frames_are_views(self):
+        """Test framing shares the signal's memory."""
+        samples = np.arange(1000, dtype=np.int16)
+        frames = frame_view(samples, 320)
+        assert frames.shape == (3, 320)
+        assert np.shares_memory(frames, samples)
+    
+    def test_hangover_and_trim(self):
+        """Test speech is extended by the hangover and the rest is dropped."""
+        vad = VoiceActivityDetector(hangover_ms=60)
+        raw = np.array([0, 1, 0, 0, 0, 0, 0, 1, 1, 0], dtype=bool)
+        assert vad.smooth(raw).tolist() == [0, 1, 1, 1, 1, 0, 0, 1, 1, 1]
+        
+        samples = np.concatenate((noise(1.0), tone(0.5), noise(1.0, seed=1)))
+        trimmed = vad.trim(samples, noise_floor=30.0)
+        assert len(trimmed) == int(0.56 * SAMPLE_RATE)
+    
+    def test_phrase_ends_when_speech_stops(self, tmp_path):
+        """Test command capture stops at the pause, not at the end of the audio."""
+        path = tmp_path / "command.wav"
+        write_wav(path, np.concatenate((noise(0.5), tone(0.5) + noise(0.5, seed=1), noise(5.0, seed=2))))
+        
+        capture = AudioCapture(WavSource(str(path)), frame_ms=20)
+        reader = capture.reader(from_start=True)
+        capture.start()
+        samples = capture.record_phrase(reader, timeout=5, pause_seconds=0.4)
+        capture.stop()
+        
+        assert samples is not None
+        # Stopped 0.4 s after the tone, with 5 s of audio still to come
+        assert reader.position * 0.02 == pytest.approx(1.4, abs=0.05)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
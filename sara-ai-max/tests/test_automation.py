@@ -40,5 +40,70 @@ class TestAppController:
         pytest.skip("App controller test requires manual verification")
 
 
+class TestSystemSampler:
+    """Test background system metrics sampling."""
+    
+    def test_ring_buffer_windows(self):
+        """Test the buffer keeps the newest samples and summarizes a window."""
+        pytest.importorskip("numpy")
+        from automation.metrics import SystemSampler
+        
+        now = [0.0]
+        sampler = SystemSampler(capacity=4, clock=lambda: now[0])
+        assert sampler.latest() is None
+        assert sampler.average('cpu') is None
+        
+        for second in range(6):
+            now[0] = float(second)
+            sampler.sample()
+        
+        window = sampler.window()
+        assert len(sampler) == 4
+        assert window[:, 0].tolist() == [2.0, 3.0, 4.0, 5.0]
+        assert sampler.latest()['time'] == 5.0
+        assert len(sampler.window(seconds=1.5)) == 2
+        assert 0 <= sampler.percentile('memory', 95, seconds=1.5) <= 100
+        assert set(sampler.summary()['cpu']) == {'mean', 'p50', 'p95', 'max'}
+    
+    def test_system_info_answers_from_sampler(self, monkeypatch):
+        """Test system info uses the latest sample instead of measuring."""
+        pytest.importorskip("numpy")
+        import time
+        import psutil
+        from automation import metrics, system
+        
+        sampler = metrics.SystemSampler(interval=60)
+        sampler.sample()
+        sampler.start()
+        monkeypatch.setattr(metrics, '_default_sampler', sampler)
+        try:
+            latest = sampler.latest()
+            monkeypatch.setattr(psutil, 'cpu_percent', lambda interval=None: time.sleep(1) or 0.0)
+            
+            start = time.monotonic()
+            answer = system.get_system_info('system')
+            assert time.monotonic() - start < 0.5
+            assert answer.startswith(f"CPU usage: {latest['cpu']}%")
+            assert "averaging" in system.get_system_info('cpu')
+        finally:
+            sampler.stop()
+        
+        assert metrics.get_sampler() is None
+
+    
+    def test_sampler_from_config(self, monkeypatch):
+        """Test the config's automation section sizes the shared sampler."""
+        pytest.importorskip("numpy")
+        from automation import metrics
+        
+        monkeypatch.setattr(metrics, '_default_sampler', None)
+        sampler = metrics.start_sampler_from_config({'sampler_interval': 30, 'sampler_capacity': 10})
+        try:
+            assert sampler.interval == 30
+            assert sampler.capacity == 10
+        finally:
+            sampler.stop()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
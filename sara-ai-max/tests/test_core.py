@@ -36,6 +36,15 @@ class TestNLU:
         assert 'folder_name' in intent.entities
         assert intent.entities['folder_name'] == "TestFolder"
     
+    def test_trailing_punctuation_ignored(self):
+        """Test transcripts ending in a full stop or exclamation mark still match."""
+        nlu = NLUEngine()
+        for text in ("Stop.", "cancel that!", "Abort everything!!"):
+            assert nlu.parse(text).intent_type == IntentType.CANCEL
+        assert [intent.intent_type for intent in nlu.parse_many(["Stop.", "what time is it?"])] == [
+            IntentType.CANCEL, IntentType.TIME
+        ]
+    
     def test_unknown_intent(self):
         """Test unknown command."""
         nlu = NLUEngine()
@@ -44,6 +53,642 @@ class TestNLU:
         assert intent.intent_type == IntentType.UNKNOWN
         assert intent.confidence == 0.0
 
+    def test_matcher_inline_flags(self):
+        """Test patterns with inline flags are never filtered out by their literal."""
+        from sara_core.nlu import IntentMatcher
+        
+        matcher = IntentMatcher({
+            IntentType.OPEN_APP: [r"(?i)^Open Notepad$"],
+            IntentType.SEARCH_WEB: [r"(?x)^ look \s up \s (.+)$"],
+        })
+        assert matcher.match("open notepad")[0] == IntentType.OPEN_APP
+        assert matcher.match("lookup cats") is None
+        assert matcher.match("look up cats")[0] == IntentType.SEARCH_WEB
+    
+    def test_matcher_matches_ordered_scan(self):
+        """Test the compiled matcher agrees with a plain ordered scan."""
+        import re
+        nlu = NLUEngine()
+        utterances = [
+            "what time is it",
+            "turn the volume up",
+            "unmute",
+            "set screen brightness",
+            "please shut it down",
+            "lock the computer",
+            "open visual studio code",
+            "make a folder named reports",
+            "search for cheap flights",
+            "look it up online",
+            "what's the weather in paris",
+            "nothing to see here",
+        ]
+        
+        for text in utterances:
+            expected = None
+            for intent_type, patterns in nlu.patterns.items():
+                match = next((m for m in (re.search(p, text) for p in patterns) if m), None)
+                if match:
+                    expected = (intent_type, match.groups())
+                    break
+            
+            found = nlu.matcher.match(text)
+            actual = (found[0], found[1].groups()) if found else None
+            assert actual == expected
+    
+    def test_system_info_resource_and_window(self):
+        """Test a system-info request picks the resource and time window."""
+        from sara_core.planner import Planner
+        nlu = NLUEngine()
+        planner = Planner(SecurityManager())
+        
+        intent = nlu.parse("what was the cpu usage over the last 10 minutes")
+        assert intent.entities == {'info_type': 'cpu', 'window': 600.0}
+        plan = planner.create_plan(intent)
+        assert plan.actions[0].parameters == {'info_type': 'cpu', 'window': 600.0}
+        
+        intent = nlu.parse("show me system info")
+        assert intent.entities == {}
+        assert planner.create_plan(intent).actions[0].parameters == {'info_type': 'system'}
+    
+    def test_parse_multi_splits_clauses(self):
+        """Test compound commands split into one intent per clause."""
+        nlu = NLUEngine()
+        
+        intents = nlu.parse_multi("open chrome and then turn the volume up, lock the screen")
+        
+        assert [i.intent_type for i in intents] == [
+            IntentType.OPEN_APP, IntentType.VOLUME_CONTROL, IntentType.LOCK
+        ]
+        assert intents[0].entities['app_name'] == "chrome"
+    
+    def test_parse_multi_keeps_unparseable_clause_together(self):
+        """Test a conjunction inside an entity does not split the command."""
+        nlu = NLUEngine()
+        
+        intents = nlu.parse_multi("google salt and pepper")
+        
+        assert len(intents) == 1
+        assert intents[0].entities['query'] == "salt and pepper"
+    
+    def test_parse_multi_ignores_classifier_for_merging(self, monkeypatch):
+        """Test a fragment the classifier would label still merges back."""
+        nlu = NLUEngine()
+        monkeypatch.setattr(nlu.classifier, 'predict', lambda text: ('joke', 1.0, 1.0))
+        
+        intents = nlu.parse_multi("google salt and pepper")
+        
+        assert len(intents) == 1
+        assert intents[0].entities['query'] == "salt and pepper"
+    
+    def test_parse_many_matches_parse(self):
+        """Test batch parsing gives the same intents as single parses."""
+        nlu = NLUEngine()
+        texts = ["What time is it?", "open notepad", "  volume up ", "xyz abc"]
+        
+        intents = nlu.parse_many(texts)
+        
+        assert [i.model_dump() for i in intents] == [nlu.parse(t).model_dump() for t in texts]
+    
+    @pytest.mark.asyncio
+    async def test_parse_stream(self):
+        """Test parsing texts from an async source."""
+        nlu = NLUEngine()
+        
+        async def source():
+            for text in ["lock the screen", "tell me a joke"]:
+                yield text
+        
+        intents = [intent async for intent in nlu.parse_stream(source())]
+        
+        assert [i.intent_type for i in intents] == [IntentType.LOCK, IntentType.JOKE]
+    
+    def test_from_config(self):
+        """Test the config's nlu section reaches the engine."""
+        import json
+        from pathlib import Path
+        
+        config = json.loads(Path("config.example.json").read_text())['nlu']
+        config.update({'classifier': False, 'cache_size': 8, 'watch_patterns': False})
+        nlu = NLUEngine.from_config(config)
+        
+        assert nlu.classifier is None
+        assert nlu.cache.max_size == 8
+        assert nlu.parse("what time is it").intent_type == IntentType.TIME
+    
+    def test_intent_cache(self):
+        """Test repeated utterances are served from the cache."""
+        nlu = NLUEngine(cache_size=8)
+        
+        first = nlu.parse("Open Chrome")
+        second = nlu.parse("open chrome ")
+        
+        assert second.intent_type == first.intent_type
+        assert second.entities == first.entities
+        assert second.raw_text == "open chrome "
+        assert nlu.cache_stats()['hits'] == 1
+        assert nlu.cache_stats()['misses'] == 1
+    
+    def test_intent_cache_invalidated_on_pattern_change(self):
+        """Test changing the pattern table drops cached parses."""
+        nlu = NLUEngine()
+        assert nlu.parse("hello there").intent_type == IntentType.UNKNOWN
+        
+        nlu.set_patterns({IntentType.JOKE: [r"hello"]})
+        
+        assert nlu.parse("hello there").intent_type == IntentType.JOKE
+        assert nlu.cache_stats()['size'] == 1
+    
+    def test_reload_patterns_from_file(self, tmp_path):
+        """Test an edited pattern file is swapped in, and a broken one rejected."""
+        import json
+        path = tmp_path / "intents.json"
+        path.write_text(json.dumps({"version": 1, "intents": {"time": ["what.*time"]}}))
+        nlu = NLUEngine(patterns_path=path, use_classifier=False)
+        assert nlu.parse("tell me a joke").intent_type == IntentType.UNKNOWN
+        
+        path.write_text(json.dumps({"version": 1, "intents": {"joke": ["tell.*joke"]}}))
+        assert nlu.reload_patterns()
+        assert nlu.parse("tell me a joke").intent_type == IntentType.JOKE
+        
+        path.write_text(json.dumps({"version": 1, "intents": {"joke": ["tell(.*joke"]}}))
+        assert not nlu.reload_patterns()
+        assert nlu.parse("tell me a joke").intent_type == IntentType.JOKE
+    
+    def test_watch_patterns(self, tmp_path):
+        """Test the watcher reloads a changed pattern file."""
+        import json
+        import time
+        path = tmp_path / "intents.json"
+        path.write_text(json.dumps({"version": 1, "intents": {"time": ["what.*time"]}}))
+        nlu = NLUEngine(patterns_path=path, use_classifier=False, watch_patterns=True, watch_interval=0.01)
+        
+        try:
+            path.write_text(json.dumps({"version": 1, "intents": {"date": ["what.*time", "today"]}}))
+            deadline = time.monotonic() + 5
+            while nlu.parse("what time").intent_type != IntentType.DATE and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert nlu.parse("what time").intent_type == IntentType.DATE
+        finally:
+            nlu.stop_watching()
+    
+    def test_intent_cache_expiry(self):
+        """Test cached parses expire after their TTL."""
+        from sara_core.cache import TTLCache
+        now = [0.0]
+        cache = TTLCache(max_size=2, ttl=10, clock=lambda: now[0])
+        
+        cache.put("a", 1)
+        now[0] = 11.0
+        
+        assert cache.get("a") is None
+        assert cache.stats()['expirations'] == 1
+
+    
+    def test_incremental_provisional_intent(self):
+        """Test a partial transcript yields an intent once it is unambiguous."""
+        from sara_core.gazetteer import AppGazetteer, DEFAULT_APP_ALIASES
+        nlu = NLUEngine(gazetteer=AppGazetteer.from_aliases(DEFAULT_APP_ALIASES))
+        parser = nlu.incremental()
+        
+        assert parser.feed("open") is None
+        assert parser.feed("open visual studio") is None  # Could still become "... code"
+        
+        intent = parser.feed("open visual studio c")
+        assert intent.intent_type == IntentType.OPEN_APP
+        assert intent.entities['app'] == "visual studio code"
+        
+        # Same app again is not reported twice
+        assert parser.feed("open visual studio code") is None
+        assert parser.finalize().entities['app'] == "visual studio code"
+    
+    def test_incremental_handles_revisions(self):
+        """Test revised hypotheses give the same candidates as a fresh parse."""
+        nlu = NLUEngine(use_classifier=False)
+        parser = nlu.incremental()
+        
+        for partial in ["what ti", "what time", "lock the", "lock the screen", "lo"]:
+            parser.feed(partial)
+            expected = nlu.matcher.candidates(partial)
+            actual = sorted(parser._counts.keys() | set(nlu.matcher.unindexed))
+            assert actual == expected
+
+
+class TestGazetteer:
+    """Test application name resolution."""
+    
+    def test_resolve_alias_and_longest_prefix(self):
+        """Test aliases resolve and the longest known name wins."""
+        from sara_core.gazetteer import AppGazetteer, DEFAULT_APP_ALIASES
+        gazetteer = AppGazetteer.from_aliases(DEFAULT_APP_ALIASES)
+        
+        assert gazetteer.resolve("vs code").name == "visual studio code"
+        assert gazetteer.resolve("visual studio code please").name == "visual studio code"
+        assert gazetteer.resolve("wordpad") is None
+    
+    def test_resolve_misrecognized_name(self):
+        """Test names within a small edit distance still resolve."""
+        from sara_core.gazetteer import AppGazetteer, DEFAULT_APP_ALIASES
+        gazetteer = AppGazetteer.from_aliases(DEFAULT_APP_ALIASES)
+        
+        assert gazetteer.resolve("crome").name == "chrome"
+        assert gazetteer.resolve("spotifi").name == "spotify"
+        assert gazetteer.fuzzy_lookup("zzzzzz", max_distance=1) is None
+    
+    def test_desktop_entries(self, tmp_path):
+        """Test installed applications are launched by command."""
+        from sara_core.gazetteer import AppGazetteer, DEFAULT_APP_ALIASES
+        (tmp_path / "google-chrome.desktop").write_text(
+            "[Desktop Entry]\nType=Application\nName=Google Chrome\n"
+            "Exec=/usr/bin/google-chrome-stable %U\n"
+        )
+        gazetteer = AppGazetteer.from_aliases(DEFAULT_APP_ALIASES)
+        gazetteer.add_desktop_entries([tmp_path])
+        
+        assert gazetteer.resolve("chrome").command == "/usr/bin/google-chrome-stable"
+        assert gazetteer.resolve("google chrome").name == "google chrome"
+    
+    def test_nlu_resolves_app_entity(self):
+        """Test the NLU attaches the canonical application."""
+        from sara_core.gazetteer import AppGazetteer, DEFAULT_APP_ALIASES
+        nlu = NLUEngine(gazetteer=AppGazetteer.from_aliases(DEFAULT_APP_ALIASES))
+        
+        intent = nlu.parse("open crome")
+        
+        assert intent.entities['app_name'] == "crome"
+        assert intent.entities['app'] == "chrome"
+
+
+class TestIntentClassifier:
+    """Test the fallback intent classifier."""
+    
+    def test_classifier_answers_paraphrase(self):
+        """Test a paraphrase no pattern matches is still understood."""
+        pytest.importorskip("numpy")
+        nlu = NLUEngine()
+        
+        intent = nlu.parse("how late is it")
+        
+        assert intent.intent_type == IntentType.TIME
+        assert 0.0 < intent.confidence <= 1.0
+        assert intent.entities == {}
+    
+    def test_classifier_leaves_gibberish_unknown(self):
+        """Test low-scoring commands stay unknown with zero confidence."""
+        pytest.importorskip("numpy")
+        nlu = NLUEngine()
+        
+        intent = nlu.parse("xyz random gibberish abc")
+        
+        assert intent.intent_type == IntentType.UNKNOWN
+        assert intent.confidence == 0.0
+    
+    def test_classifier_disabled(self):
+        """Test the classifier can be turned off."""
+        nlu = NLUEngine(use_classifier=False)
+        
+        assert nlu.parse("how late is it").intent_type == IntentType.UNKNOWN
+    
+    def test_shipped_model_is_current(self):
+        """Test the shipped model was trained on the current patterns."""
+        pytest.importorskip("numpy")
+        from sara_core.intent_classifier import is_stale, load_default_classifier
+        nlu = NLUEngine()
+        
+        assert not is_stale(load_default_classifier(), nlu._pattern_names())
+
+
+class TestPlanner:
+    """Test plan creation."""
+    
+    def test_static_plans_are_copies(self):
+        """Test parameterless plans are fresh copies that cannot be changed."""
+        from pydantic import ValidationError
+        from sara_core.planner import Planner
+        planner = Planner(SecurityManager())
+        intent = NLUEngine().parse("what time is it")
+        
+        plan = planner.create_plan(intent)
+        
+        again = planner.create_plan(intent)
+        assert again == plan and again is not plan
+        assert again.actions[0].parameters is not plan.actions[0].parameters
+        with pytest.raises(ValidationError):
+            plan.description = "something else"
+    
+    def test_slot_substitution(self):
+        """Test entity plans fill their template slots."""
+        from sara_core.planner import Planner, ActionType
+        from sara_core.nlu import Intent
+        planner = Planner(SecurityManager())
+        intent = Intent(
+            intent_type=IntentType.OPEN_APP,
+            entities={'app_name': 'chrom', 'app': 'chrome', 'app_command': '/usr/bin/chrome'},
+            raw_text="open chrom"
+        )
+        
+        plan = planner.create_plan(intent)
+        
+        assert plan.description == "open chrome"
+        assert plan.before_message == "Opening chrome"
+        assert plan.actions[0].action_type == ActionType.APP_OPEN
+        assert plan.actions[0].parameters == {'app_name': 'chrome', 'command': '/usr/bin/chrome'}
+        assert planner.create_plan(intent) is not plan
+    
+    def test_template_plans_are_not_shared(self):
+        """Test changing one plan's parameters does not leak into the next."""
+        from sara_core.planner import TIME_PLAN
+        
+        first = TIME_PLAN.fill()
+        first.actions[0].parameters['info_type'] = 'date'
+        
+        assert TIME_PLAN.fill().actions[0].parameters == {'info_type': 'time'}
+    
+    def test_register_factory(self):
+        """Test registered factories replace the builtin plan."""
+        from sara_core.planner import Planner, JOKE_PLAN
+        planner = Planner(SecurityManager())
+        intent = NLUEngine().parse("restart the computer")
+        assert planner.create_plan(intent).description == "respond that I don't understand"
+        
+        planner.register(IntentType.RESTART, lambda intent: JOKE_PLAN.fill())
+        
+        assert planner.create_plan(intent).description == "tell you a joke"
+
+
+class TestExecutor:
+    """Test plan execution."""
+    
+    @staticmethod
+    def _executor(delays, log, max_concurrency=4, **options):
+        """Executor whose actions sleep for delays[text] and fail on 'fail'."""
+        from sara_core.executor import Executor, ExecutionResult
+        from sara_core.context import ContextManager
+        
+        class FakeExecutor(Executor):
+            running = 0
+            peak = 0
+            
+            async def _execute_action(self, action):
+                if 'text' not in action.parameters:
+                    return await super()._execute_action(action)
+                text = action.parameters['text']
+                FakeExecutor.running += 1
+                FakeExecutor.peak = max(FakeExecutor.peak, FakeExecutor.running)
+                await asyncio.sleep(delays.get(text, 0))
+                FakeExecutor.running -= 1
+                log.append(text)
+                if text == 'fail':
+                    return ExecutionResult(success=False, error="failed")
+                return ExecutionResult(success=True, message=text)
+        
+        return FakeExecutor(SecurityManager(), ContextManager(), max_concurrency=max_concurrency, **options)
+    
+    @staticmethod
+    def _plan(*steps):
+        """Plan of SPEAK actions given as (text, depends_on) pairs."""
+        from sara_core.planner import Plan, Action, ActionType
+        return Plan(
+            actions=[
+                Action(action_type=ActionType.SPEAK, parameters={'text': text}, depends_on=deps)
+                for text, deps in steps
+            ],
+            description="test plan"
+        )
+    
+    @pytest.mark.asyncio
+    async def test_critical_path(self):
+        """Test independent actions overlap and the plan takes its longest path."""
+        import time
+        log = []
+        executor = self._executor({'a': 0.2, 'b': 0.2, 'c': 0.2}, log)
+        plan = self._plan(('a', []), ('b', []), ('c', [0, 1]))
+        
+        start = time.monotonic()
+        result = await executor.execute(plan)
+        elapsed = time.monotonic() - start
+        
+        assert result.success is True
+        assert result.message == "a b c"
+        assert log[-1] == 'c'
+        assert elapsed < 0.55
+    
+    @pytest.mark.asyncio
+    async def test_failure_skips_dependents(self):
+        """Test a failure skips its dependents but not independent actions."""
+        log = []
+        executor = self._executor({'b': 0.05}, log)
+        plan = self._plan(('fail', []), ('a', None), ('b', []), ('c', [2]))
+        
+        result = await executor.execute(plan)
+        
+        assert result.success is False
+        assert result.error == "failed"
+        assert result.message == "b c"
+        assert 'a' not in log
+    
+    @pytest.mark.asyncio
+    async def test_concurrency_cap(self):
+        """Test no more than max_concurrency actions run at once."""
+        log = []
+        executor = self._executor({str(i): 0.02 for i in range(6)}, log, max_concurrency=2)
+        
+        result = await executor.execute(self._plan(*((str(i), []) for i in range(6))))
+        
+        assert result.success is True
+        assert type(executor).peak == 2
+    
+    @pytest.mark.asyncio
+    async def test_blocking_calls_leave_loop_free(self, monkeypatch):
+        """Test blocking automation runs off the loop and records its timing."""
+        import time
+        from automation import app_controller
+        from sara_core.executor import Executor
+        from sara_core.context import ContextManager
+        from sara_core.planner import Plan, Action, ActionType
+        
+        monkeypatch.setattr(app_controller, 'open_app', lambda name, command=None: time.sleep(0.2) or True)
+        executor = Executor(SecurityManager(), ContextManager())
+        plan = Plan(
+            actions=[
+                Action(action_type=ActionType.APP_OPEN, parameters={'app_name': name}, depends_on=[])
+                for name in ("one", "two")
+            ],
+            description="open two apps"
+        )
+        
+        ticks = 0
+        
+        async def heartbeat():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        
+        beating = asyncio.ensure_future(heartbeat())
+        try:
+            result = await executor.execute(plan)
+        finally:
+            beating.cancel()
+            executor.shutdown()
+        
+        assert result.success is True
+        assert ticks >= 20
+        # The single GUI worker runs the two launches one after the other
+        first, second = result.data['timings']
+        assert first['run_ms'] >= 150 and second['run_ms'] >= 150
+        assert max(first['queue_wait_ms'], second['queue_wait_ms']) >= 150
+    
+    @pytest.mark.asyncio
+    async def test_invalid_dependencies(self):
+        """Test a plan with a dependency cycle is rejected."""
+        executor = self._executor({}, [])
+        
+        result = await executor.execute(self._plan(('a', [1]), ('b', [0])))
+        
+        assert result.success is False
+        assert "cycle" in result.error
+    
+    @pytest.mark.asyncio
+    async def test_observe_results_cached(self, monkeypatch):
+        """Test identical OBSERVE actions share one computation and its result."""
+        import time
+        from automation import system
+        from sara_core.executor import Executor
+        from sara_core.context import ContextManager
+        from sara_core.planner import SYSTEM_INFO_PLAN, Action, ActionType, Plan
+        
+        calls = []
+        monkeypatch.setattr(system, 'get_system_info', lambda info_type, window=60: calls.append(info_type) or time.sleep(0.1) or "CPU 5%")
+        executor = Executor(SecurityManager(), ContextManager())
+        try:
+            results = await asyncio.gather(*(executor.execute(SYSTEM_INFO_PLAN.fill({'info_type': 'system'})) for _ in range(3)))
+            again = await executor.execute(SYSTEM_INFO_PLAN.fill({'info_type': 'system'}))
+            
+            # Only OBSERVE actions are eligible, whatever their cache_ttl
+            elevated = Plan(
+                actions=[Action(action_type=ActionType.SYSTEM_INFO, parameters={'info_type': 'system'},
+                                permission_level=PermissionLevel.LOW, cache_ttl=5)],
+                description="system info at a higher level"
+            )
+            await executor.execute(elevated)
+        finally:
+            executor.shutdown()
+        
+        assert [r.message for r in results + [again]] == ["CPU 5%"] * 4
+        assert len(calls) == 2
+        assert again.data['timings'][0]['run_ms'] < 50
+        stats = executor.cache_stats()
+        assert stats['coalesced'] == 2
+        assert stats['hits'] == 1
+        assert stats['in_flight'] == 0
+    
+    @pytest.mark.asyncio
+    async def test_action_timeout(self):
+        """Test an action past its timeout is reported as timed out, not failed."""
+        import time
+        log = []
+        executor = self._executor({'slow': 5}, log)
+        plan = self._plan(('slow', []), ('a', None), ('b', []))
+        slow = plan.actions[0].model_copy(update={'timeout': 0.1})
+        plan = plan.model_copy(update={'actions': [slow, *plan.actions[1:]]})
+        
+        start = time.monotonic()
+        result = await executor.execute(plan)
+        
+        assert time.monotonic() - start < 1
+        assert result.success is False
+        assert result.timed_out is True
+        assert "timed out after 0.1s" in result.error
+        assert result.message == "b"
+        assert log == ['b']
+    
+    @pytest.mark.asyncio
+    async def test_plan_deadline(self):
+        """Test the plan's timeout bounds the actions left when it expires."""
+        log = []
+        executor = self._executor({'a': 0.1, 'b': 5}, log)
+        plan = self._plan(('a', []), ('b', None)).model_copy(update={'timeout': 0.3})
+        
+        result = await executor.execute(plan)
+        
+        assert result.timed_out is True
+        assert result.message == "a"
+        assert "timed out after 0.2s" in result.error
+    
+    @pytest.mark.asyncio
+    async def test_default_plan_deadline(self):
+        """Test plans without a timeout get the executor's plan_timeout."""
+        log = []
+        executor = self._executor({'a': 0.1, 'b': 5}, log, plan_timeout=0.3)
+        
+        result = await executor.execute(self._plan(('a', []), ('b', None)))
+        
+        assert result.timed_out is True
+        assert log == ['a']
+    
+    def test_from_config(self):
+        """Test the config's executor section reaches the executor."""
+        import json
+        from pathlib import Path
+        from sara_core.executor import Executor
+        
+        config = json.loads(Path("config.example.json").read_text())['executor']
+        config.update({'plan_timeout': 5, 'timeouts': {'gui': 3}})
+        executor = Executor.from_config(SecurityManager(), ContextManager(), config)
+        
+        assert executor.plan_timeout == 5
+        assert executor.timeouts['gui'] == 3
+        assert executor.timeouts['files'] == 30
+        assert executor.pools['system']._max_workers == 2
+        executor.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_unconfirmed_plan_refused(self):
+        """Test plans the policy wants confirmed only run once confirmed."""
+        from sara_core.executor import Executor, ExecutionResult
+        from sara_core.context import ContextManager
+        from sara_core.planner import SHUTDOWN_PLAN
+        ran = []
+        
+        class RecordingExecutor(Executor):
+            async def _execute_action(self, action):
+                ran.append(action.action_type)
+                return ExecutionResult(success=True)
+        
+        executor = RecordingExecutor(SecurityManager(), ContextManager())
+        plan = SHUTDOWN_PLAN.fill()
+        
+        refused = await executor.execute(plan)
+        assert refused.success is False
+        assert refused.data == {'needs_confirmation': True}
+        assert ran == []
+        
+        confirmed = await executor.execute(plan.model_copy(update={'confirmed': True}))
+        assert confirmed.success is True
+        assert ran == [plan.actions[0].action_type]
+    
+    @pytest.mark.asyncio
+    async def test_cancel_command(self):
+        """Test saying cancel stops the running plan but not itself."""
+        from sara_core.planner import Planner
+        log = []
+        executor = self._executor({'slow': 5, 'after': 0}, log)
+        running = asyncio.ensure_future(executor.execute(self._plan(('slow', []), ('after', None))))
+        await asyncio.sleep(0.05)
+        
+        intent = NLUEngine().parse("cancel that")
+        assert intent.intent_type == IntentType.CANCEL
+        stop = await executor.execute(Planner(SecurityManager()).create_plan(intent))
+        result = await running
+        
+        assert stop.success is True
+        assert stop.message == "Cancelled 2 actions"
+        assert result.cancelled is True
+        assert result.success is False
+        assert log == []
+        assert executor.cancel() == 0
+
 
 class TestContext:
     """Test Context Manager."""
@@ -58,6 +703,115 @@ class TestContext:
         assert history[0].role == "user"
         assert history[0].content == "Hello Sara"
     
+    def test_history_ring_buffer(self):
+        """Test history keeps the newest max_history entries, oldest first."""
+        context = ContextManager(max_history=3)
+        for i in range(5):
+            context.add_user_message(f"message {i}")
+        
+        assert len(context.history) == 3
+        assert [entry.content for entry in context.get_recent_context(10)] == ["message 2", "message 3", "message 4"]
+        assert [entry.content for entry in context.get_recent_context(2)] == ["message 3", "message 4"]
+        assert context.get_recent_context(0) == []
+    
+    def test_sessions_persist_and_evict(self, tmp_path):
+        """Test session history survives eviction and reopening the store."""
+        from sara_core.sessions import SessionStore
+        
+        db_path = str(tmp_path / "sessions.db")
+        store = SessionStore(db_path, max_sessions=2, flush_interval=10)
+        store.get("a").add_user_message("open notepad")
+        store.get("b").add_user_message("what time is it")
+        store.get("c").add_user_message("lock the screen")
+        
+        # "a" was evicted, with its message still waiting to be written
+        assert store.stats()['evictions'] == 1
+        assert [entry.content for entry in store.get("a").get_recent_context()] == ["open notepad"]
+        store.close()
+        
+        reopened = SessionStore(db_path)
+        assert [entry.content for entry in reopened.get("b").get_recent_context()] == ["what time is it"]
+        assert {session['session'] for session in reopened.sessions()} == {"a", "b", "c"}
+        
+        reopened.get("b").clear_context()
+        reopened.close()
+        assert SessionStore(db_path).get("b").get_recent_context() == []
+    
+    def test_sessions_concurrent_writers(self, tmp_path):
+        """Test threads writing to many sessions at once lose nothing."""
+        from concurrent.futures import ThreadPoolExecutor
+        from sara_core.sessions import SessionStore
+        
+        store = SessionStore(str(tmp_path / "sessions.db"), max_sessions=8, flush_interval=0.01, flush_batch=16)
+        
+        def chat(n):
+            for i in range(20):
+                store.get(f"tab-{n}").add_user_message(f"message {i}")
+        
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(chat, range(32)))
+        store.flush()
+        
+        assert store.stats()['written'] == 32 * 20
+        assert len(store.load("tab-7", 100)) == 20
+        store.close()
+    
+    def test_store_from_config(self, tmp_path):
+        """Test the config's context section reaches the session store."""
+        from sara_core.sessions import SessionStore
+        
+        store = SessionStore.from_config({
+            'sessions_path': str(tmp_path / "configured.db"),
+            'max_sessions': 2,
+            'max_history': 5,
+            'flush_interval': 10
+        })
+        for session in ("a", "b", "c"):
+            for n in range(8):
+                store.get(session).add_user_message(f"message {n}")
+        
+        assert store.path == tmp_path / "configured.db"
+        assert store.stats()['sessions_in_memory'] == 2
+        assert len(store.get("a").get_recent_context(10)) == 5
+        store.close()
+    
+    def test_search_history(self, tmp_path):
+        """Test full-text search over stored history, with filters."""
+        from sara_core.sessions import SessionStore
+        from sara_core.context import ContextRecord
+        
+        store = SessionStore(str(tmp_path / "sessions.db"), flush_interval=10)
+        context = store.get("tab")
+        context.add_user_message("search the web for python tutorials")
+        context.add_assistant_message("Searching for python tutorials", {'intent': 'web_search'})
+        context.add_user_message("open notepad")
+        store.get("other").add_user_message("search for weather")
+        
+        assert [entry.content for entry in context.search("python", role="user")] == ["search the web for python tutorials"]
+        assert len(context.search("searched")) == 2  # Stemmed, and matched in metadata
+        assert [entry.content for entry in context.search("note")] == ["open notepad"]
+        assert context.search("weather") == []  # Another session
+        assert len(store.search("weather")) == 1
+        assert context.search("python", since="2999-01-01T00:00:00") == []
+        assert context.search("?!") == []
+        store.close()
+        
+        # Filters apply before the limit, whatever order the rows were written in
+        store = SessionStore(str(tmp_path / "filtered.db"), flush_interval=10)
+        store.record("tab", ContextRecord(300.0, "user", "late python question"))
+        store.record("tab", ContextRecord(200.0, "user", "early python"))
+        for n in range(5):
+            store.record("tab", ContextRecord(100.0 + n, "assistant", "python"))
+        assert [entry.content for entry in store.search("python", role="user", limit=1)] == ["early python"]
+        assert [entry.content for entry in store.search("python", since=150.0, limit=2)] == ["early python", "late python question"]
+        store.close()
+        
+        # Without a store, the entries in memory are searched
+        memory = ContextManager()
+        memory.add_user_message("Search the web for cats")
+        memory.add_user_message("open notepad")
+        assert [entry.content for entry in memory.search("web cats")] == ["Search the web for cats"]
+    
     def test_set_get_variable(self):
         """Test context variables."""
         context = ContextManager()
@@ -48,6 +48,89 @@ class TestIntegrationPipeline:
         
         # Should gracefully handle unknown commands
         assert result.success is True
+    
+    @pytest.mark.asyncio
+    async def test_compound_command_pipeline(self):
+        """Test a compound command runs every clause in one plan."""
+        security = SecurityManager()
+        context = ContextManager()
+        nlu = NLUEngine()
+        planner = Planner(security)
+        executor = Executor(security, context)
+        
+        intents = nlu.parse_multi("what time is it and tell me a joke")
+        plan = planner.create_plans(intents)
+        result = await executor.execute(plan)
+        
+        assert len(intents) == 2
+        assert plan.concurrent is True
+        assert [action.clause for action in plan.actions] == [0, 1]
+        assert result.success is True
+        assert "time" in result.message.lower()
+        assert "arrays" in result.message
+    
+    @pytest.mark.asyncio
+    async def test_registered_skill_pipeline(self):
+        """Test an intent routed to a registered skill runs the skill."""
+        from sara_core.nlu import IntentType
+        from skills.base_skill import BaseSkill, SkillMetadata, SkillResult
+        
+        class EchoSkill(BaseSkill):
+            def get_metadata(self):
+                return SkillMetadata(name="Echo", description="Repeat the query")
+            
+            def validate_params(self, **kwargs):
+                return True
+            
+            async def execute(self, **kwargs):
+                return SkillResult(success=True, message=f"Echo: {kwargs['query']}")
+        
+        security = SecurityManager()
+        planner = Planner(security)
+        executor = Executor(security, ContextManager())
+        planner.register_skill(IntentType.SEARCH_WEB, EchoSkill())
+        
+        plan = planner.create_plan(NLUEngine().parse("google cheap flights"))
+        result = await executor.execute(plan)
+        
+        assert result.success is True
+        assert result.message == "Echo: cheap flights"
+    
+    @pytest.mark.asyncio
+    async def test_spoken_cancel_during_execution(self):
+        """Test "cancel" heard while a plan runs stops the plan."""
+        from main import SaraMax
+        from sara_core.nlu import IntentType
+        from skills.base_skill import BaseSkill, SkillMetadata, SkillResult
+        
+        class SlowSkill(BaseSkill):
+            def get_metadata(self):
+                return SkillMetadata(name="Slow", description="Take a while")
+            
+            def validate_params(self, **kwargs):
+                return True
+            
+            async def execute(self, **kwargs):
+                await asyncio.sleep(5)
+                return SkillResult(success=True, message="finished")
+        
+        class Voice:
+            async def listen_while(self, stop):
+                await asyncio.sleep(0.05)
+                return "cancel that"
+        
+        sara = SaraMax.__new__(SaraMax)
+        sara.security = SecurityManager()
+        sara.nlu = NLUEngine()
+        sara.planner = Planner(sara.security)
+        sara.executor = Executor(sara.security, ContextManager())
+        sara.voice = Voice()
+        sara.planner.register_skill(IntentType.SEARCH_WEB, SlowSkill())
+        
+        plan = sara.planner.create_plan(sara.nlu.parse("google cheap flights"))
+        result = await asyncio.wait_for(sara.execute_interruptible(plan), 2)
+        
+        assert result.cancelled is True
 
 
 if __name__ == "__main__":
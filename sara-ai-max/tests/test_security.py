@@ -25,6 +25,7 @@ class TestSecurityManager:
         # First instance
         security1 = SecurityManager(str(audit_path))
         security1.log_action("Action 1", PermissionLevel.LOW, True)
+        security1.close()
         
         # Second instance
         security2 = SecurityManager(str(audit_path))
@@ -33,7 +34,317 @@ class TestSecurityManager:
         recent = security2.get_recent_actions(count=1)
         assert len(recent) == 1
         assert recent[0].action == "Action 1"
+    
+    def test_legacy_audit_log_migrated(self, tmp_path):
+        """Test an audit log in the old JSON array format is converted."""
+        audit_path = tmp_path / "test_audit.json"
+        audit_path.write_text(json.dumps([
+            {"timestamp": "2026-01-22T21:30:00", "action": "Old action",
+             "permission_level": "medium", "approved": True, "result": "Success"}
+        ], indent=2))
+        
+        security = SecurityManager(str(audit_path))
+        security.log_action("New action", PermissionLevel.LOW, True)
+        security.close()
+        
+        assert audit_path.read_text().lstrip().startswith("{")
+        assert [entry["action"] for entry in security.audit.read()] == ["Old action", "New action"]
+    
+    def test_audit_segments_rotate_and_compress(self, tmp_path):
+        """Test the audit log rotates into compressed segments, keeping order."""
+        from sara_core.audit import AuditLog
+        audit_path = tmp_path / "audit.jsonl"
+        
+        log = AuditLog(str(audit_path), max_segment_bytes=200)
+        for i in range(20):
+            log.append({"timestamp": "2026-01-22T21:30:00", "n": i})
+        log.close()
+        
+        closed = log.closed_segments()
+        assert len(closed) >= 3
+        assert all(segment.name.endswith(".gz") for segment in closed)
+        assert audit_path.stat().st_size <= 200
+        
+        reopened = AuditLog(str(audit_path), max_segment_bytes=200)
+        assert [entry["n"] for entry in reopened.read()] == list(range(20))
+        assert [entry["n"] for entry in reopened.tail(7)] == list(range(13, 20))
+        reopened.close()
+    
+    def test_audit_tail_recovered_after_crash(self, tmp_path):
+        """Test a partly written last entry is dropped on open."""
+        from sara_core.audit import AuditLog
+        audit_path = tmp_path / "audit.jsonl"
+        audit_path.write_text('{"action": "Complete"}\n{"action": "Cut sh')
+        
+        log = AuditLog(str(audit_path))
+        log.append({"action": "After restart"})
+        log.close()
+        
+        assert [entry["action"] for entry in log.read()] == ["Complete", "After restart"]
 
+    
+    def test_audit_log_opened_lazily(self, tmp_path):
+        """Test the audit log is not read until it is first used."""
+        audit_path = tmp_path / "test_audit.json"
+        first = SecurityManager(str(audit_path))
+        first.log_action("Action 1", PermissionLevel.LOW, True)
+        first.close()
+        
+        security = SecurityManager(str(audit_path))
+        assert security._audit is None
+        assert security.check_permission("Test", PermissionLevel.LOW) is True
+        assert security._audit is None
+        assert security.get_recent_actions(count=5)[0].action == "Action 1"
+    
+    def test_audit_queries_use_index(self, tmp_path):
+        """Test queries by time, level and approval across compressed segments."""
+        from sara_core.audit import AuditLog
+        audit_path = tmp_path / "audit.jsonl"
+        levels = ["observe", "low", "medium", "high"]
+        
+        log = AuditLog(str(audit_path), max_segment_bytes=1000)
+        for i in range(40):
+            log.append({
+                "timestamp": f"2026-01-22T10:{i:02d}:00", "action": f"Action {i}",
+                "permission_level": levels[i % 4], "approved": i % 5 != 0
+            })
+        log.close()
+        assert len(log.closed_segments()) >= 3
+        
+        def actions(entries):
+            return [int(entry["action"].split()[1]) for entry in entries]
+        
+        for rebuilt in (False, True):
+            if rebuilt:
+                (tmp_path / "audit.jsonl.index.db").unlink()
+            log = AuditLog(str(audit_path), max_segment_bytes=1000)
+            assert actions(log.query(permission_level="high")) == list(range(3, 40, 4))
+            assert actions(log.query(approved=False)) == list(range(0, 40, 5))
+            assert actions(log.query(since="2026-01-22T10:10:00", until="2026-01-22T10:13:00")) == [10, 11, 12]
+            assert actions(log.query(permission_level="low", limit=2, newest=True)) == [33, 37]
+            log.close()
+        
+        security = SecurityManager(str(audit_path))
+        denied_high = security.get_actions(permission_level=PermissionLevel.HIGH, approved=False)
+        assert [entry.action for entry in denied_high] == ["Action 15", "Action 35"]
+
+    
+    def test_audit_read_only_leaves_index_alone(self, tmp_path):
+        """Test a read-only log uses a complete index and never writes one."""
+        from sara_core.audit import AuditLog
+        audit_path = tmp_path / "audit.jsonl"
+        index_path = tmp_path / "audit.jsonl.index.db"
+        
+        writer = AuditLog(str(audit_path))
+        for i in range(5):
+            writer.append({"timestamp": f"2026-01-22T10:0{i}:00", "action": f"Action {i}", "approved": i != 2})
+        writer.close()
+        before = sorted(path.name for path in tmp_path.iterdir())
+        
+        reader = AuditLog(str(audit_path), read_only=True)
+        assert reader.index is not None
+        assert [entry["action"] for entry in reader.query(approved=False)] == ["Action 2"]
+        reader.close()
+        assert sorted(path.name for path in tmp_path.iterdir()) == before
+        
+        # Entries the index has not caught up with are found by scanning
+        with open(audit_path, 'a') as f:
+            f.write('{"timestamp": "2026-01-22T10:09:00", "action": "Late", "approved": false}\n')
+        modified = index_path.stat().st_mtime_ns
+        reader = AuditLog(str(audit_path), read_only=True)
+        assert reader.index is None
+        assert [entry["action"] for entry in reader.query(approved=False)] == ["Action 2", "Late"]
+        reader.close()
+        assert index_path.stat().st_mtime_ns == modified
+    
+    def test_audit_writes_batched_except_high(self, tmp_path):
+        """Test low-level entries are batched while high-level ones are written at once."""
+        audit_path = tmp_path / "test_audit.json"
+        security = SecurityManager(str(audit_path), audit_flush_interval=10)
+        
+        for i in range(5):
+            security.log_action(f"Action {i}", PermissionLevel.LOW, True)
+        assert audit_path.read_text() == ""
+        
+        security.log_action("Shutdown computer", PermissionLevel.HIGH, True)
+        lines = audit_path.read_text().splitlines()
+        assert [json.loads(line)["action"] for line in lines][-1] == "Shutdown computer"
+        assert len(lines) == 6
+        
+        security.log_action("Late action", PermissionLevel.OBSERVE, True)
+        security.close()
+        stats = security.audit_stats()
+        assert stats['written'] == 7
+        assert stats['batches'] == 2
+        assert stats['dropped'] == 0
+        assert "Late action" in audit_path.read_text()
+    
+    def test_audit_writer_backpressure(self):
+        """Test a full queue makes callers wait, then drops entries."""
+        import threading
+        from sara_core.audit import AuditWriter
+        
+        release = threading.Event()
+        written = []
+        
+        class SlowLog:
+            def append_many(self, entries, sync=False):
+                release.wait()
+                written.extend(entries)
+        
+        writer = AuditWriter(lambda: SlowLog(), queue_size=2, batch_size=1, flush_interval=0, put_timeout=0.01)
+        results = [writer.submit({"n": i}) for i in range(6)]
+        # One entry is being written and two are queued; the rest had to go
+        assert results.count(False) >= 2
+        
+        release.set()
+        writer.close()
+        stats = writer.stats()
+        assert stats['backpressure'] >= 2
+        assert stats['dropped'] == results.count(False)
+        assert len(written) == results.count(True)
+    
+    def test_writer_flush_under_load(self):
+        """Test flush waits for earlier entries only, while others keep arriving."""
+        import threading
+        import time
+        from sara_core.audit import AuditWriter
+        
+        written = []
+        
+        class SlowLog:
+            def append_many(self, entries, sync=False):
+                time.sleep(0.001)
+                written.extend(entries)
+        
+        writer = AuditWriter(lambda: SlowLog(), queue_size=64, batch_size=4, flush_interval=0.01)
+        stop = threading.Event()
+        
+        def flood():
+            while not stop.is_set():
+                writer.submit({"n": "later"})
+        
+        writer.submit({"n": "first"})
+        flooder = threading.Thread(target=flood)
+        flooder.start()
+        try:
+            start = time.monotonic()
+            assert writer.flush(timeout=5) is True
+            assert time.monotonic() - start < 2
+            assert {"n": "first"} in written
+        finally:
+            stop.set()
+            flooder.join()
+            writer.close()
+        
+        # A writer that cannot keep up reports the timeout
+        blocked = threading.Event()
+        
+        class StuckLog:
+            def append_many(self, entries, sync=False):
+                blocked.wait()
+        
+        stuck = AuditWriter(lambda: StuckLog())
+        stuck.submit({"n": 1})
+        assert stuck.flush(timeout=0.1) is False
+        blocked.set()
+        stuck.close()
+
+    
+    def test_policy_rules(self, tmp_path):
+        """Test rules on type, parameters, paths and time windows, first match first."""
+        from datetime import datetime
+        from sara_core.policy import Effect, PolicyEngine
+        
+        now = [datetime(2024, 1, 1, 12, 0)]
+        engine = PolicyEngine({
+            'require_confirmation_for_high_risk': True,
+            'policy': {
+                'relative_to': str(tmp_path),
+                'rules': [
+                    {'effect': 'deny', 'action_types': ['folder_create'], 'path_prefixes': [str(tmp_path / 'locked')]},
+                    {'effect': 'confirm', 'action_types': ['app_open'], 'parameters': {'app_name': '*terminal*'}},
+                    {'effect': 'deny', 'permission_levels': ['high'], 'time_window': '23:00-06:00'},
+                ],
+            },
+        }, clock=lambda: now[0])
+        
+        assert engine.decide('folder_create', 'medium', {'folder_name': 'locked/inner'}).effect == Effect.DENY
+        assert engine.decide('folder_create', 'medium', {'folder_name': 'inner', 'location': str(tmp_path / 'locked')}).effect == Effect.DENY
+        assert engine.decide('folder_create', 'medium', {'folder_name': 'lockedout'}).effect == Effect.ALLOW
+        (tmp_path / 'locked').mkdir()
+        (tmp_path / 'shortcut').symlink_to(tmp_path / 'locked')
+        assert engine.decide('folder_create', 'medium', {'folder_name': 'shortcut/inner'}).effect == Effect.DENY
+        assert engine.decide('app_open', 'medium', {'app_name': 'Windows Terminal'}).effect == Effect.CONFIRM
+        assert engine.decide('app_open', 'medium', {'app_name': 'notepad'}).effect == Effect.ALLOW
+        
+        # No rule matches at noon, so the high-risk default applies
+        assert engine.decide('system_shutdown', 'high').effect == Effect.CONFIRM
+        now[0] = datetime(2024, 1, 1, 23, 30)
+        assert engine.decide('system_shutdown', 'high').effect == Effect.DENY
+        now[0] = datetime(2024, 1, 2, 5, 59)
+        assert engine.decide('system_shutdown', 'high').effect == Effect.DENY
+    
+    def test_policy_decisions_memoized(self):
+        """Test decisions are cached until the policy is reloaded."""
+        from sara_core.planner import ActionType
+        
+        security = SecurityManager(policy={'rules': [{'effect': 'deny', 'action_types': ['app_close']}]})
+        assert not security.check_permission("Close notepad", PermissionLevel.MEDIUM, ActionType.APP_CLOSE, {'app_name': 'notepad'})
+        assert not security.check_permission("Close notepad", PermissionLevel.MEDIUM, ActionType.APP_CLOSE, {'app_name': 'notepad'})
+        assert security.policy.cache_stats()['hits'] == 1
+        
+        security.reload_policy({'policy': {'rules': []}})
+        assert security.check_permission("Close notepad", PermissionLevel.MEDIUM, ActionType.APP_CLOSE, {'app_name': 'notepad'})
+    
+    def test_reload_during_decision(self):
+        """Test a decision made under the old policy is not cached after a reload."""
+        from sara_core.policy import Effect, PolicyEngine
+        
+        engine = PolicyEngine({'policy': {'rules': []}})
+        evaluate = engine._evaluate
+        
+        def reload_midway(*args):
+            result = evaluate(*args)
+            engine.reload({'policy': {'rules': [{'effect': 'deny', 'action_types': ['app_close']}]}})
+            return result
+        
+        engine._evaluate = reload_midway
+        assert engine.decide('app_close', 'medium').effect == Effect.ALLOW
+        engine._evaluate = evaluate
+        assert engine.decide('app_close', 'medium').effect == Effect.DENY
+    
+    def test_policy_drives_confirmation(self):
+        """Test plans ask for confirmation exactly when the policy says so."""
+        from sara_core.nlu import Intent, IntentType
+        from sara_core.planner import Planner
+        
+        shutdown = Intent(intent_type=IntentType.SHUTDOWN, confidence=1.0, entities={}, raw_text="shutdown")
+        assert Planner(SecurityManager()).create_plan(shutdown).requires_confirmation
+        assert not Planner(SecurityManager(trusted_mode=True)).create_plan(shutdown).requires_confirmation
+        
+        strict = SecurityManager(policy={'rules': [{'effect': 'confirm', 'action_types': ['app_open']}]})
+        open_app = Intent(intent_type=IntentType.OPEN_APP, confidence=1.0, entities={'app': 'notepad'}, raw_text="open notepad")
+        assert Planner(strict).create_plan(open_app).requires_confirmation
+    
+    def test_from_config(self, tmp_path):
+        """Test the config's security section reaches the security manager."""
+        from sara_core.config import load_config
+        from sara_core.planner import ActionType
+        
+        assert load_config(tmp_path / "missing.json") == {}
+        
+        config = json.loads(Path("config.example.json").read_text())
+        config['security']['audit_log_path'] = str(tmp_path / "audit.json")
+        config['security']['policy']['rules'].append({'effect': 'deny', 'action_types': ['app_close']})
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(config))
+        
+        security = SecurityManager.from_config(load_config(path)['security'])
+        assert security.audit_log_path == tmp_path / "audit.json"
+        assert security.sync_levels == {PermissionLevel.HIGH}
+        assert not security.check_permission("Close notepad", PermissionLevel.MEDIUM, ActionType.APP_CLOSE, {'app_name': 'notepad'})
+        security.close()
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -7,24 +7,47 @@ Uses Flask for the backend and HTML/CSS/JS for the frontend.
 
 from flask import Flask, render_template, request, jsonify
 import asyncio
+import uuid
 from threading import Thread
 import webbrowser
+from datetime import datetime
 from pathlib import Path
 
 from sara_core.nlu import NLUEngine
 from sara_core.planner import Planner
 from sara_core.executor import Executor
+from sara_core.config import load_config
 from sara_core.security import SecurityManager
 from sara_core.context import ContextManager
+from sara_core.sessions import SessionStore
+from automation import metrics
 
 app = Flask(__name__)
 
 # Initialize Sara components
-context = ContextManager()
-security = SecurityManager()
-nlu = NLUEngine()
+config = load_config()
+context = ContextManager(max_history=config.get('context', {}).get('max_history', 50))
+sessions = SessionStore.from_config(config.get('context', {}))
+security = SecurityManager.from_config(config.get('security', {}))
+nlu = NLUEngine.from_config(config.get('nlu', {}), watch_patterns=True)
 planner = Planner(security)
-executor = Executor(security, context)
+executor = Executor.from_config(security, context, config.get('executor', {}))
+metrics.start_sampler_from_config(config.get('automation', {}))
+
+
+SESSION_COOKIE = 'sara_session'
+
+
+def current_session() -> str:
+    """Session id of the browser tab making the request."""
+    return request.cookies.get(SESSION_COOKIE) or uuid.uuid4().hex
+
+
+def with_session(response, session_id: str):
+    """Make the browser send the session id back on its next request."""
+    if request.cookies.get(SESSION_COOKIE) != session_id:
+        response.set_cookie(SESSION_COOKIE, session_id, samesite='Strict', httponly=True)
+    return response
 
 
 @app.route('/')
@@ -48,20 +71,44 @@ def process_command():
         asyncio.set_event_loop(loop)
         
         try:
-            # Parse intent
-            intent = nlu.parse(command)
+            session_id = current_session()
+            session_context = sessions.get(session_id)
+            session_context.add_user_message(command)
             
-            # Create plan
-            plan = planner.create_plan(intent)
+            # A plan waiting for confirmation runs on "yes" and is dropped otherwise
+            plan = session_context.get_variable('pending_plan')
+            if plan is not None:
+                session_context.set_variable('pending_plan', None)
+                if 'yes' not in command.lower():
+                    session_context.add_assistant_message("Action cancelled.")
+                    return with_session(jsonify({'success': True, 'message': "Action cancelled."}), session_id)
+                plan = plan.model_copy(update={'confirmed': True})
+            else:
+                # Parse intents, one per clause
+                intents = nlu.parse_multi(command)
+                
+                # Create plan
+                plan = planner.create_plans(intents)
+                
+                if plan.requires_confirmation:
+                    session_context.set_variable('pending_plan', plan)
+                    question = f"This will {plan.description}. Confirm? (yes/no)"
+                    session_context.add_assistant_message(question)
+                    return with_session(jsonify({
+                        'success': True,
+                        'message': question,
+                        'needs_confirmation': True
+                    }), session_id)
             
             # Execute
             result = loop.run_until_complete(executor.execute(plan))
+            session_context.add_assistant_message(result.message if result.success else (result.error or ''))
             
-            return jsonify({
+            return with_session(jsonify({
                 'success': result.success,
                 'message': result.message or ('Done!' if result.success else 'Error occurred'),
                 'error': result.error
-            })
+            }), session_id)
         finally:
             loop.close()
         
@@ -69,6 +116,41 @@ def process_command():
         return jsonify({'success': False, 'error': str(e)})
 
 
+@app.route('/api/history')
+def history():
+    """Recent conversation of the requesting browser tab, optionally filtered by ?q=."""
+    session_id = current_session()
+    count = request.args.get('count', 20, type=int)
+    query = request.args.get('q')
+    since = request.args.get('since')
+    if since:
+        try:
+            since = datetime.fromisoformat(since)
+        except ValueError:
+            return jsonify({'success': False, 'error': f"Invalid since time: {since} (use ISO format)"}), 400
+    if query:
+        entries = sessions.get(session_id).search(
+            query,
+            since=since or None,
+            role=request.args.get('role'),
+            limit=count
+        )
+    else:
+        entries = sessions.get(session_id).get_recent_context(count)
+    return with_session(jsonify([entry.model_dump() for entry in entries]), session_id)
+
+
+@app.route('/api/stats')
+def stats():
+    """Report cache statistics for the dashboard."""
+    return jsonify({
+        'intent_cache': nlu.cache_stats(),
+        'result_cache': executor.cache_stats(),
+        'audit': security.audit_stats(),
+        'sessions': sessions.stats(),
+    })
+
+
 def open_browser():
     """Open browser after a short delay."""
     import time
@@ -89,4 +171,9 @@ if __name__ == '__main__':
     print("🌐 Opening browser at http://127.0.0.1:5000")
     print("Press Ctrl+C to stop")
     
-    app.run(debug=False, port=5000)
+    try:
+        app.run(debug=False, port=5000)
+    finally:
+        # Write out audit entries and messages still queued
+        security.close()
+        sessions.close()